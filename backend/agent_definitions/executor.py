@@ -1,9 +1,26 @@
 import uuid
 import os
+import time
+import asyncio
 from agents import Agent, function_tool
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Awaitable
 
-def _execute_transaction_impl(
+# Fixed user-facing messages (also pre-synthesized for TTS)
+CHALLENGE_CREATED_MESSAGE = "Transfer challenge created. Confirm with PIN to complete."
+ERROR_USER_ID_REQUIRED = "user_id is required"
+ERROR_NO_WALLET = "No wallet found for user"
+ERROR_USDC_NOT_FOUND = "USDC token not found in wallet. Please ensure you have USDC balance. Use tokenId instead of tokenAddress."
+EXECUTOR_MESSAGES = [CHALLENGE_CREATED_MESSAGE, ERROR_USER_ID_REQUIRED, ERROR_NO_WALLET, ERROR_USDC_NOT_FOUND]
+
+async def _timed(name: str, awaitable: Awaitable, timings: Dict[str, float]):
+    """Await a call and record its wall time in milliseconds under timings[name]"""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+async def _execute_transaction_impl(
     intent_action: Optional[str] = None,
     intent_asset: Optional[str] = None,
     intent_amount: Optional[float] = None,
@@ -13,9 +30,31 @@ def _execute_transaction_impl(
     """
     Execute transaction by creating a Circle transfer challenge
     Returns challengeId for frontend PIN confirmation
+
+    Circle calls run as a small dependency graph:
+        wallet ─┐
+        session ┼─> balance ─> challenge
+        app_id ─┘ (only awaited at the end)
+    wallet, session and app_id start together; per-call timings are returned in "timings_ms"
     """
+    echo_intent = {
+        "action": intent_action,
+        "asset": intent_asset,
+        "amount": intent_amount,
+        "destination": intent_destination,
+    }
+    timings: Dict[str, float] = {}
+    pending = []
+    started = time.perf_counter()
+
+    def with_timings(result: Dict[str, Any]) -> Dict[str, Any]:
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        result["timings_ms"] = dict(timings)
+        return result
+
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
+        from services.wallet_resolver import get_wallet_resolver
         
         # Get user_id from parameter or environment
         if not user_id:
@@ -23,17 +62,12 @@ def _execute_transaction_impl(
         
         if not user_id:
             return {
-                "error": "user_id is required",
+                "error": ERROR_USER_ID_REQUIRED,
                 "status": "failed",
-                "echo_intent": {
-                    "action": intent_action,
-                    "asset": intent_asset,
-                    "amount": intent_amount,
-                    "destination": intent_destination,
-                },
+                "echo_intent": echo_intent,
             }
         
-        circle = get_circle_service()
+        circle = get_async_circle_service()
         
         # Normalize "send" to "transfer"
         normalized_action = intent_action
@@ -47,35 +81,30 @@ def _execute_transaction_impl(
                 "status": "skipped",
                 "message": f"{intent_action} {intent_amount} {intent_asset} - Only transfers are supported",
                 "requires_confirmation": False,
-                "echo_intent": {
-                    "action": intent_action,
-                    "asset": intent_asset,
-                    "amount": intent_amount,
-                    "destination": intent_destination,
-                },
+                "echo_intent": echo_intent,
             }
         
-        # Get user's wallet
-        wallets_response = circle.get_wallets(user_id)
-        wallets = wallets_response.get("wallets", [])
+        # Independent calls: wallet lookup, session token and app id start together
+        wallet_task = asyncio.ensure_future(_timed("get_wallet", get_wallet_resolver().get_wallet(user_id), timings))
+        session_task = asyncio.ensure_future(_timed("get_session_token", circle.get_session_token(user_id), timings))
+        app_id_task = asyncio.ensure_future(_timed("get_app_id", circle.get_app_id(), timings))
+        pending = [wallet_task, session_task, app_id_task]
         
-        if not wallets:
-            return {
-                "error": "No wallet found for user",
+        # Get user's wallet (memory -> MongoDB -> Circle)
+        wallet = await wallet_task
+        
+        if not wallet:
+            return with_timings({
+                "error": ERROR_NO_WALLET,
                 "status": "failed",
-                "echo_intent": {
-                    "action": intent_action,
-                    "asset": intent_asset,
-                    "amount": intent_amount,
-                    "destination": intent_destination,
-                },
-            }
+                "echo_intent": echo_intent,
+            })
         
-        wallet_id = wallets[0]["id"]
-        wallet_blockchain = wallets[0].get("blockchain", "ETH-SEPOLIA")  # Default to testnet
+        wallet_id = wallet["id"]
+        wallet_blockchain = wallet.get("blockchain") or "ETH-SEPOLIA"  # Default to testnet
         
         # Get user session token
-        session = circle.get_session_token(user_id)
+        session = await session_task
         user_token = session["user_token"]
         encryption_key = session["encryption_key"]
         
@@ -83,11 +112,11 @@ def _execute_transaction_impl(
         usdc_token_id = None
         usdc_balance = 0.0
         try:
-            balance_data = circle.get_wallet_balance(
+            balance_data = await _timed("get_wallet_balance", circle.get_wallet_balance(
                 wallet_id=wallet_id,
                 user_token=user_token,
                 include_all=True
-            )
+            ), timings)
             
             token_balances = balance_data.get("tokenBalances", [])
             print(f"Found {len(token_balances)} token balances")
@@ -130,33 +159,28 @@ def _execute_transaction_impl(
         # Prefer tokenId if available (more reliable)
         if usdc_token_id:
             print(f"Creating transfer challenge with tokenId: {usdc_token_id}, amount: {amount_token_units}")
-            challenge_response = circle.create_transfer_challenge(
+            challenge_response = await _timed("create_transfer_challenge", circle.create_transfer_challenge(
                 user_token=user_token,
                 wallet_id=wallet_id,
                 destination_address=intent_destination,
                 amount=amount_token_units,
                 token_id=usdc_token_id,
                 fee_level="MEDIUM"  # Changed to MEDIUM to reduce fees
-            )
+            ), timings)
         else:
             # Use tokenAddress + blockchain as fallback
             usdc_address = usdc_token_addresses.get(wallet_blockchain)
             if not usdc_address and wallet_blockchain == "ETH-SEPOLIA":
                 # For testnet, try to use empty address (native token) or get tokenId from Circle
-                return {
-                    "error": "USDC token not found in wallet. Please ensure you have USDC balance. Use tokenId instead of tokenAddress.",
+                return with_timings({
+                    "error": ERROR_USDC_NOT_FOUND,
                     "status": "failed",
                     "requires_confirmation": False,
-                    "echo_intent": {
-                        "action": intent_action,
-                        "asset": intent_asset,
-                        "amount": intent_amount,
-                        "destination": intent_destination,
-                    },
-                }
+                    "echo_intent": echo_intent,
+                })
             
             print(f"Creating transfer challenge with tokenAddress: {usdc_address}, amount: {amount_token_units}")
-            challenge_response = circle.create_transfer_challenge_with_address(
+            challenge_response = await _timed("create_transfer_challenge", circle.create_transfer_challenge_with_address(
                 user_token=user_token,
                 wallet_id=wallet_id,
                 destination_address=intent_destination,
@@ -164,14 +188,14 @@ def _execute_transaction_impl(
                 token_address=usdc_address,
                 blockchain=wallet_blockchain,
                 fee_level="MEDIUM"  # Changed to MEDIUM to reduce fees
-            )
+            ), timings)
         
         challenge_id = challenge_response.get("challengeId")
         
-        # Get App ID for frontend
-        app_id = circle.get_app_id()
+        # App ID for frontend (fetched concurrently since the start)
+        app_id = await app_id_task
         
-        return {
+        return with_timings({
             "challenge_id": challenge_id,
             "status": "pending_confirmation",
             "requires_confirmation": True,
@@ -180,30 +204,28 @@ def _execute_transaction_impl(
             "encryption_key": encryption_key,
             "app_id": app_id,
             "wallet_id": wallet_id,
-            "message": f"Transfer challenge created. Confirm with PIN to complete.",
-            "echo_intent": {
-                "action": intent_action,
-                "asset": intent_asset,
-                "amount": intent_amount,
-                "destination": intent_destination,
-            },
-        }
+            "message": CHALLENGE_CREATED_MESSAGE,
+            "echo_intent": echo_intent,
+        })
     
     except Exception as e:
-        return {
+        return with_timings({
             "error": str(e),
             "status": "failed",
             "requires_confirmation": False,
-            "echo_intent": {
-                "action": intent_action,
-                "asset": intent_asset,
-                "amount": intent_amount,
-                "destination": intent_destination,
-            },
-        }
+            "echo_intent": echo_intent,
+        })
+    
+    finally:
+        # Don't leave independent calls running after an early return or failure
+        for task in pending:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # Mark as retrieved to avoid "never retrieved" warnings
 
 @function_tool
-def execute_transaction(
+async def execute_transaction(
     intent_action: Optional[str] = None,
     intent_asset: Optional[str] = None,
     intent_amount: Optional[float] = None,
@@ -211,7 +233,7 @@ def execute_transaction(
     user_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """Execute transaction by creating Circle transfer challenge."""
-    return _execute_transaction_impl(intent_action, intent_asset, intent_amount, intent_destination, user_id)
+    return await _execute_transaction_impl(intent_action, intent_asset, intent_amount, intent_destination, user_id)
 
 
 def build_executor_agent() -> Agent:
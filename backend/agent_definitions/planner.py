@@ -1,7 +1,10 @@
 from pydantic import BaseModel
 from agents import Agent, function_tool
 from typing import Optional
+import os
 import re
+import threading
+from utils.spoken_numbers import normalize_spoken_amounts
 
 PROMPT = (
     "You are a command parser. Given a natural language command for a financial transaction, "
@@ -17,13 +20,22 @@ class ParsedCommand(BaseModel):
     percent: Optional[float] = None     # numeric percentage (0-100)
     destination: Optional[str] = None   # address for transfers
     raw: Optional[str] = None           # original text
+    source_amount: Optional[float] = None    # fiat amount before conversion to USDC
+    source_currency: Optional[str] = None    # ISO code of the fiat amount, e.g. INR
+    fx_rate: Optional[float] = None          # USDC per unit of source_currency
 
 
-@function_tool
-def parse_natural_command(command_text: str) -> ParsedCommand:
+class FastParseResult(BaseModel):
+    command: Optional[ParsedCommand] = None  # set only when confident enough to skip the LLM
+    confidence: float = 0.0                  # 0.0-1.0
+    reason: Optional[str] = None             # why the fast path declined
+
+
+def _parse_natural_command_impl(command_text: str) -> ParsedCommand:
     """Parse a simple NL command into a structured intent."""
 
-    text = (command_text or "").strip().lower()
+    # Spelled-out amounts ("twenty five", "point five") become numerals first
+    text = normalize_spoken_amounts((command_text or "").strip()).lower()
 
     # Initialize a model instance
     intent = ParsedCommand(raw=command_text or "")
@@ -59,6 +71,164 @@ def parse_natural_command(command_text: str) -> ParsedCommand:
 
     return ParsedCommand(raw=command_text or "", action=intent.action, asset=intent.asset, amount=intent.amount, percent=intent.percent, destination=intent.destination)
 
+
+@function_tool
+def parse_natural_command(command_text: str) -> ParsedCommand:
+    """Parse a simple NL command into a structured intent."""
+    return _parse_natural_command_impl(command_text)
+
+
+# Fast-path grammar for normalized commands, e.g. the output of /api/query/enhance:
+#   "send 10 usdc to 0x..." | "transfer .5 eth to 0x..." | "buy 0.5 eth" | "sell 10% of btc"
+_AMOUNT = r"(\d+(?:\.\d+)?|\.\d+)"
+_ASSET = r"(usdc|eth|btc)"
+_ADDRESS = r"(0x[a-fA-F0-9]{40})"
+_FAST_TRANSFER = re.compile(rf"^(?:please\s+)?(send|transfer)\s+{_AMOUNT}\s*{_ASSET}\s+to\s+{_ADDRESS}$", re.IGNORECASE)
+_FAST_TRADE = re.compile(rf"^(?:please\s+)?(buy|sell)\s+{_AMOUNT}\s*(%)?\s*(?:of\s+)?(?:my\s+)?{_ASSET}$", re.IGNORECASE)
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?]+$")
+_WHITESPACE = re.compile(r"\s+")
+# Whole numbers only, including leading decimals (".5"); never digits inside a word or address
+_ANY_NUMBER = re.compile(r"(?<![\w.])(?:\d+(?:\.\d+)?|\.\d+)(?!\w)")
+_ANY_ADDRESS_PREFIX = re.compile(r"\b0x[a-fA-F0-9]*", re.IGNORECASE)
+_ANY_ASSET = re.compile(r"\b(?:usdc|eth|btc)\b", re.IGNORECASE)
+_ANY_ACTION = re.compile(r"^(?:please\s+)?(send|transfer|buy|sell)\b", re.IGNORECASE)
+
+_fast_path_lock = threading.Lock()
+_fast_path_stats = {"hits": 0, "fallbacks": 0}
+
+
+def _fast_path_threshold() -> float:
+    return float(os.getenv("PLANNER_FAST_PATH_MIN_CONFIDENCE", "0.9"))
+
+
+def _score_partial(raw: str, text: str) -> FastParseResult:
+    """
+    Confidence score for text outside the strict grammar
+    The fraction of required fields found, halved when any field is ambiguous. It is
+    reported for diagnostics only: slots found anywhere in free text are not trustworthy
+    enough to move money ("from 0x... to bob", "sell all but keep 10%"), so these commands
+    always go to the LLM planner.
+    """
+    action_match = _ANY_ACTION.match(text)
+    action = action_match.group(1).lower() if action_match else None
+    numbers = _ANY_NUMBER.findall(text)
+    assets = set(a.lower() for a in _ANY_ASSET.findall(text))
+    addresses = _ANY_ADDRESS_PREFIX.findall(text)
+    is_transfer = action in ("send", "transfer")
+
+    required = 4 if is_transfer else 3
+    found = sum([action is not None, len(numbers) >= 1, len(assets) >= 1])
+    if is_transfer:
+        found += 1 if any(len(a) == 42 for a in addresses) else 0
+    confidence = found / required
+
+    # Ambiguity: more than one candidate for a field
+    if len(numbers) > 1 or len(assets) > 1 or len(addresses) > 1:
+        confidence *= 0.5
+    confidence = round(confidence, 2)
+
+    reason = "ambiguous or incomplete command" if confidence < 1 else "outside the fast-path grammar"
+    return FastParseResult(confidence=min(confidence, 0.5), reason=reason)
+
+
+def fast_parse_command(command_text: str) -> FastParseResult:
+    """
+    Deterministic parser for already-normalized commands
+    Only exact grammar matches (confidence 1.0) return a ParsedCommand, and only when
+    that clears PLANNER_FAST_PATH_MIN_CONFIDENCE (set it above 1 to disable the fast
+    path). Anything else is scored for diagnostics, capped at 0.5, and the caller should
+    fall back to the LLM planner.
+    Hit/fallback counts are kept for get_fast_path_stats().
+    """
+    raw = command_text or ""
+    text = _WHITESPACE.sub(" ", _TRAILING_PUNCTUATION.sub("", raw.strip()))
+
+    result = None
+    m = _FAST_TRANSFER.match(text)
+    if m:
+        result = FastParseResult(
+            command=ParsedCommand(
+                raw=raw,
+                action="transfer",  # "send" is normalized here so risk limits for transfers apply
+                asset=m.group(3).upper(),
+                amount=float(m.group(2)),
+                destination=m.group(4),
+            ),
+            confidence=1.0,
+        )
+    else:
+        m = _FAST_TRADE.match(text)
+        if m:
+            is_percent = m.group(3) == "%"
+            result = FastParseResult(
+                command=ParsedCommand(
+                    raw=raw,
+                    action=m.group(1).lower(),
+                    asset=m.group(4).upper(),
+                    amount=None if is_percent else float(m.group(2)),
+                    percent=float(m.group(2)) if is_percent else None,
+                ),
+                confidence=1.0,
+            )
+
+    if result is None:
+        result = _score_partial(raw, text)
+    elif result.confidence < _fast_path_threshold():
+        result = FastParseResult(confidence=result.confidence, reason="below confidence threshold")
+
+    with _fast_path_lock:
+        _fast_path_stats["hits" if result.command is not None else "fallbacks"] += 1
+
+    return result
+
+
+def intent_matches_text(command: ParsedCommand, command_text: str) -> bool:
+    """
+    Whether a pre-parsed intent only uses slots the text actually contains
+    The action must match the leading verb, the amount or percent must be one of the
+    numbers, the asset must be named (USDC may be implied) and the destination must be the
+    address in the text. Any mismatch means the intent should not replace the planner.
+    """
+    text = _WHITESPACE.sub(" ", _TRAILING_PUNCTUATION.sub("", normalize_spoken_amounts((command_text or "").strip())))
+    numbers = {float(n) for n in _ANY_NUMBER.findall(text)}
+    assets = {a.upper() for a in _ANY_ASSET.findall(text)}
+    addresses = {a.lower() for a in _ANY_ADDRESS_PREFIX.findall(text) if len(a) == 42}
+
+    action_match = _ANY_ACTION.match(text)
+    text_action = action_match.group(1).lower() if action_match else None
+    if text_action == "send":
+        text_action = "transfer"
+    action = (command.action or "").lower() or None
+    if action == "send":
+        action = "transfer"
+    if text_action is not None and action != text_action:
+        return False
+
+    if command.amount is not None and float(command.amount) not in numbers:
+        return False
+    if command.percent is not None and (float(command.percent) not in numbers or "%" not in text):
+        return False
+    if command.asset:
+        asset = command.asset.upper()
+        if assets and asset not in assets or not assets and asset != "USDC":
+            return False
+    if command.destination:
+        if addresses != {command.destination.lower()}:
+            return False
+    elif addresses and action == "transfer":
+        return False
+    return True
+
+
+def get_fast_path_stats() -> dict:
+    """Fast-path hit/fallback counters and hit rate"""
+    with _fast_path_lock:
+        total = _fast_path_stats["hits"] + _fast_path_stats["fallbacks"]
+        return {
+            **_fast_path_stats,
+            "hit_rate": round(_fast_path_stats["hits"] / total, 4) if total else 0.0,
+        }
+
 def build_planner_agent() -> Agent:
     agent = Agent(
     name="PlannerAgent",
@@ -1,11 +1,62 @@
 from agents import Agent, function_tool
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
+from services.price_oracle import get_price_oracle
+from services.risk_rules import get_risk_engine
+from services.velocity_limits import check_velocity
 
 RISK_PROMPT = (
     "You are a risk analyst validating transaction safety against simple limits. "
     "Decide approval and list human-readable reasons when blocked."
 )
 
+# Rejection reasons, in the order they are checked (also pre-synthesized for TTS).
+# Threshold rules and their reasons are declared in data/risk_rules.json.
+REASON_PRICE_UNAVAILABLE = "No price is available for this asset"
+REASON_PRICE_STALE = "Price data for this asset is out of date"
+REASON_VELOCITY_LIMIT = "Transfer exceeds your rolling spending limit"
+RISK_REASONS = [REASON_PRICE_UNAVAILABLE, REASON_PRICE_STALE] + get_risk_engine().reasons + [REASON_VELOCITY_LIMIT]
+
+
+def risk_reasons_compatible(reasons: List[str]) -> bool:
+    """Whether one risk check can return all of these reasons together"""
+    price_reasons = [r for r in reasons if r in (REASON_PRICE_UNAVAILABLE, REASON_PRICE_STALE)]
+    if len(price_reasons) > 1:
+        return False
+    engine = get_risk_engine()
+    actions = None  # actions every reason so far applies to (None: any)
+    scope = None    # limit rows (tier x asset) every rule reason so far comes from (None: any)
+    for reason in reasons:
+        rule = engine.rule_for(reason)
+        if reason == REASON_VELOCITY_LIMIT:
+            needs_usd, reason_actions = True, frozenset({"transfer"})
+        elif rule is not None:
+            needs_usd, reason_actions = rule.metric == "usd_value", rule.actions
+            # Reasons carry the limit, so they must come from one tier and asset
+            scope = engine.reason_scope(reason) if scope is None else scope & engine.reason_scope(reason)
+            if not scope:
+                return False
+        else:
+            continue
+        # Without a price there is no USD value to compare
+        if needs_usd and price_reasons:
+            return False
+        if reason_actions is not None:
+            actions = reason_actions if actions is None else actions & reason_actions
+            if not actions:
+                return False
+    return True
+
+
+def _price_check(asset: Optional[str]):
+    """(USD price, None) or (None, rejection reason)"""
+    # Amounts without an asset are USDC, the unit every normalized command uses
+    quote = get_price_oracle().get_quote(asset or "USDC")
+    if quote is None:
+        return None, REASON_PRICE_UNAVAILABLE
+    if quote.is_stale():
+        return None, REASON_PRICE_STALE
+    return float(quote.price), None
+
 def _basic_risk_check_impl(
     intent_action: Optional[str] = None,
     intent_asset: Optional[str] = None,
@@ -13,55 +64,79 @@ def _basic_risk_check_impl(
     intent_percent: Optional[float] = None,
     portfolio_total_value_usd: float = 0.0,
     balances: List[List[Union[float, str]]] = [],
-    prices: List[List[Union[float, str]]] = [],
+    user_id: Optional[str] = None,
 ) -> dict:
     """Very simple thresholds-based risk gate.
     Rules:
-    - Percent orders must be <= 50%
-    - Absolute buy/sell amount must not exceed 30% of portfolio value (approx)
-    - Transfers must be <= $5,000 equivalent
+    - Amounts are priced with the price oracle; unknown or stale prices are rejected
+    - Threshold rules from data/risk_rules.json, with limits for the user's tier and the
+      asset (by default: percent orders <= 50%, buy/sell amount <= 30% of portfolio
+      value, transfers <= $5,000 equivalent); reasons name the limit that was hit
+    - The user's transfers over the last minute/hour/day must stay within their
+      rolling spend limits (in-memory counters, see services/velocity_limits.py)
     Inputs avoid nested object schemas to satisfy strict JSON schema.
     balances: [[symbol, amount, usd], ...]
-    prices: [[symbol, price], ...]
     """
     reasons: List[str] = []
-    approved = True
-
-    percent = intent_percent
-    amount = intent_amount
-    asset = intent_asset
     action = (intent_action or "").lower() if intent_action else None
 
-    def find_price(sym: Optional[str]) -> float:
-        if not sym:
-            return 1.0
-        for row in prices:
-            if len(row) >= 2 and isinstance(row[0], str) and row[0] == sym:
-                # row = [symbol, price]
-                try:
-                    return float(row[1])
-                except Exception:
-                    return 1.0
-        return 1.0
-
-    if percent is not None and percent > 50:
-        approved = False
-        reasons.append("Percent exceeds 50% limit")
-
-    if amount is not None:
-        usd_equiv = amount * find_price(asset)
-        source_cap = 0.30 * float(portfolio_total_value_usd or 0.0)
-        if usd_equiv > source_cap:
-            approved = False
-            reasons.append("Amount exceeds 30% portfolio cap")
-
-    if action == "transfer" and amount is not None:
-        usd_equiv = amount * find_price(asset)
-        if usd_equiv > 5000:
-            approved = False
-            reasons.append("Transfer exceeds $5,000 limit")
-
-    return {"approved": approved, "reasons": reasons}
+    usd_equiv = None
+    if intent_amount is not None:
+        price, reason = _price_check(intent_asset)
+        if reason:
+            reasons.append(reason)
+        else:
+            usd_equiv = intent_amount * price
+
+    engine = get_risk_engine()
+    reasons.extend(engine.evaluate(
+        action, intent_asset, engine.tier_for(user_id),
+        intent_percent, usd_equiv, portfolio_total_value_usd,
+    ))
+
+    if action == "transfer" and usd_equiv is not None and check_velocity(user_id, usd_equiv):
+        reasons.append(REASON_VELOCITY_LIMIT)
+
+    return {"approved": not reasons, "reasons": reasons, "usd_value": usd_equiv}
+
+def batch_risk_check(intents: List[Dict[str, Any]]) -> List[dict]:
+    """Re-score many intents at once, e.g. queued transfers after prices move.
+    intents: [{action, asset, amount, percent, portfolio_total_value_usd, user_id}, ...]
+    Prices are looked up once per asset and the threshold rules run as NumPy array
+    operations. Velocity limits are not applied, since they depend on the order in
+    which transfers execute.
+    Returns: [{approved, reasons, usd_value}, ...] in input order
+    """
+    engine = get_risk_engine()
+    price_checks = {}
+    prices, price_reasons = [], []
+    for intent in intents:
+        asset = intent.get("asset")
+        if asset not in price_checks:
+            price_checks[asset] = _price_check(asset)
+        price, reason = price_checks[asset]
+        prices.append(price)
+        price_reasons.append([reason] if reason and intent.get("amount") is not None else [])
+
+    result = engine.evaluate_batch(
+        actions=[intent.get("action") for intent in intents],
+        assets=[intent.get("asset") for intent in intents],
+        tiers=[engine.tier_for(intent.get("user_id")) for intent in intents],
+        percents=[intent.get("percent") for intent in intents],
+        amounts=[intent.get("amount") for intent in intents],
+        prices=prices,
+        portfolio_totals=[intent.get("portfolio_total_value_usd") or 0.0 for intent in intents],
+    )
+
+    verdicts = []
+    for price_reason, rule_reasons, usd_value in zip(price_reasons, result.reason_lists(), result.usd_values.tolist()):
+        reasons = price_reason + rule_reasons
+        verdicts.append({
+            "approved": not reasons,
+            "reasons": reasons,
+            "usd_value": None if usd_value != usd_value else usd_value,  # NaN -> None
+        })
+    return verdicts
 
 @function_tool
 def basic_risk_check(
@@ -71,12 +146,12 @@ def basic_risk_check(
     intent_percent: Optional[float] = None,
     portfolio_total_value_usd: float = 0.0,
     balances: List[List[Union[float, str]]] = [],
-    prices: List[List[Union[float, str]]] = [],
+    user_id: Optional[str] = None,
 ) -> dict:
     """Very simple thresholds-based risk gate."""
     return _basic_risk_check_impl(
         intent_action, intent_asset, intent_amount, intent_percent,
-        portfolio_total_value_usd, balances, prices
+        portfolio_total_value_usd, balances, user_id
     )
 
 def build_risk_analyst_agent() -> Agent:
@@ -1,10 +1,23 @@
 from agents import Agent, function_tool
 from typing import Dict, Any, Optional
 import re
+from services.address_screening import get_screening_index
+
+# Rejection reasons, in the order they are checked (also pre-synthesized for TTS)
+REASON_UNSUPPORTED_ASSET = "Unsupported asset"
+REASON_NON_POSITIVE_AMOUNT = "Amount must be positive"
+REASON_INVALID_DESTINATION = "Invalid destination address"
+REASON_SCREENED_DESTINATION = "Destination address is on a blocked list"
+SECURITY_REASONS = [REASON_UNSUPPORTED_ASSET, REASON_NON_POSITIVE_AMOUNT, REASON_INVALID_DESTINATION, REASON_SCREENED_DESTINATION]
+
+def security_reasons_compatible(reasons) -> bool:
+    """Whether one validation can return all of these reasons together (only well-formed addresses are screened)"""
+    return not (REASON_INVALID_DESTINATION in reasons and REASON_SCREENED_DESTINATION in reasons)
 
 def _security_validate_impl(intent_action: Optional[str] = None, intent_asset: Optional[str] = None, intent_amount: Optional[float] = None, intent_destination: Optional[str] = None) -> Dict[str, Any]:
-    """Basic security checks: destination format, positive amounts, known assets."""
+    """Basic security checks: destination format and screening, positive amounts, known assets."""
     reasons = []
+    matched_lists = []
     valid = True
 
     action = intent_action
@@ -23,17 +36,23 @@ def _security_validate_impl(intent_action: Optional[str] = None, intent_asset: O
 
     if asset and asset not in {"USDC", "ETH", "BTC"}:
         valid = False
-        reasons.append("Unsupported asset")
+        reasons.append(REASON_UNSUPPORTED_ASSET)
 
     if amount is not None and amount <= 0:
         valid = False
-        reasons.append("Amount must be positive")
+        reasons.append(REASON_NON_POSITIVE_AMOUNT)
 
     if dest and not re.match(r"^0x[a-fA-F0-9]{40}$", dest):
         valid = False
-        reasons.append("Invalid destination address")
+        reasons.append(REASON_INVALID_DESTINATION)
+    elif dest:
+        # Sanction/scam lists (data/screening); matched_lists names the lists that hit
+        matched_lists = get_screening_index().screen(dest)
+        if matched_lists:
+            valid = False
+            reasons.append(REASON_SCREENED_DESTINATION)
 
-    return {"valid": valid, "reasons": reasons}
+    return {"valid": valid, "reasons": reasons, "matched_lists": matched_lists}
 
 @function_tool
 def security_validate(intent_action: Optional[str] = None, intent_asset: Optional[str] = None, intent_amount: Optional[float] = None, intent_destination: Optional[str] = None) -> Dict[str, Any]:
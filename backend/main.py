@@ -1,6 +1,6 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import os
@@ -21,7 +21,7 @@ app = FastAPI(title="VoiceVault API", version="1.0.0")
 # Initialize MongoDB connection on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize MongoDB connection when server starts"""
+    """Initialize MongoDB connection, Circle HTTP pool and OpenAI client when server starts"""
     try:
         from services.mongodb_service import MongoDBService
         import os
@@ -58,9 +58,100 @@ async def startup_event():
         import traceback
         traceback.print_exc()
 
+    # Create the shared Circle connection pool and load the entity config (app id) once
+    try:
+        from services.circle_wallet_service import get_async_circle_service
+        circle = get_async_circle_service()
+        print("✅ Circle HTTP connection pool ready")
+        await circle.get_entity_config()
+        print("✅ Circle entity config loaded")
+    except Exception as e:
+        print(f"⚠️  Circle client not initialized: {e}")
+
+    # Build and validate the agent pipeline once, before the first request
+    try:
+        from services.agent_registry import warm_up_agent_registry
+        timings = warm_up_agent_registry()
+        print(f"✅ Agent pipeline registry ready: {timings}")
+    except Exception as e:
+        print(f"⚠️  Agent pipeline registry not built: {e}")
+
+    # Create the shared OpenAI client (query enhancement and the planner agent)
+    try:
+        from services.llm_client import get_openai_client
+        get_openai_client()
+        print("✅ Shared OpenAI client ready")
+    except Exception as e:
+        print(f"⚠️  OpenAI client not initialized: {e}")
+
+    # Load FX rates and keep them fresh in the background
+    try:
+        import asyncio
+        from services.fx_rates import get_fx_rate_table
+        fx_table = get_fx_rate_table()
+        if fx_table.refresh():
+            print("✅ FX rate table loaded")
+        app.state.fx_refresh_task = asyncio.create_task(fx_table.refresh_forever())
+    except Exception as e:
+        print(f"⚠️  FX rate refresh not started: {e}")
+
+    # Load asset prices and keep them fresh in the background
+    try:
+        import asyncio
+        from services.price_oracle import get_price_oracle
+        price_oracle = get_price_oracle()
+        if price_oracle.refresh():
+            print("✅ Price oracle loaded")
+        app.state.price_refresh_task = asyncio.create_task(price_oracle.refresh_forever())
+    except Exception as e:
+        print(f"⚠️  Price refresh not started: {e}")
+
+    # Rebuild per-user velocity counters and checkpoint them in the background
+    try:
+        import asyncio
+        from services.velocity_limits import get_velocity_tracker
+        velocity = get_velocity_tracker()
+        replayed = await asyncio.to_thread(velocity.rebuild)
+        print(f"✅ Velocity counters rebuilt ({replayed} recent transfers replayed)")
+        app.state.velocity_checkpoint_task = asyncio.create_task(velocity.checkpoint_forever())
+    except Exception as e:
+        print(f"⚠️  Velocity counters not rebuilt: {e}")
+
+    # Map the address screening lists and pick up new lists in the background
+    try:
+        import asyncio
+        from services.address_screening import get_screening_index
+        screening = get_screening_index()
+        await asyncio.to_thread(screening.reload)
+        print(f"✅ Address screening lists loaded ({len(screening.stats()['lists'])} lists)")
+        app.state.screening_reload_task = asyncio.create_task(screening.reload_forever())
+    except Exception as e:
+        print(f"⚠️  Address screening not started: {e}")
+
+    # Pre-synthesize fixed assistant phrases into the TTS cache in the background
+    if os.getenv("TTS_WARMUP_ENABLED", "true").lower() != "false":
+        try:
+            import asyncio
+            from services.phrase_bank import warm_tts_cache
+            app.state.tts_warmup_task = asyncio.create_task(warm_tts_cache())
+        except Exception as e:
+            print(f"⚠️  TTS warm-up not started: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close MongoDB connection when server shuts down"""
+    """Close MongoDB connection, Circle connection pool and OpenAI client when server shuts down"""
+    # Last velocity checkpoint, while MongoDB is still connected
+    velocity_checkpoint_task = getattr(app.state, "velocity_checkpoint_task", None)
+    if velocity_checkpoint_task is not None:
+        if not velocity_checkpoint_task.done():
+            velocity_checkpoint_task.cancel()
+        try:
+            from services.velocity_limits import get_velocity_tracker
+            get_velocity_tracker().checkpoint()
+            print("✅ Velocity counters checkpointed")
+        except Exception as e:
+            print(f"⚠️  Error checkpointing velocity counters: {e}")
+
     try:
         from services.mongodb_service import MongoDBService
         # Get the singleton instance and close connection
@@ -70,6 +161,36 @@ async def shutdown_event():
     except Exception as e:
         print(f"⚠️  Error closing MongoDB connection: {e}")
 
+    warmup_task = getattr(app.state, "tts_warmup_task", None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+
+    fx_refresh_task = getattr(app.state, "fx_refresh_task", None)
+    if fx_refresh_task is not None and not fx_refresh_task.done():
+        fx_refresh_task.cancel()
+
+    price_refresh_task = getattr(app.state, "price_refresh_task", None)
+    if price_refresh_task is not None and not price_refresh_task.done():
+        price_refresh_task.cancel()
+
+    screening_reload_task = getattr(app.state, "screening_reload_task", None)
+    if screening_reload_task is not None and not screening_reload_task.done():
+        screening_reload_task.cancel()
+
+    try:
+        from services.circle_wallet_service import close_async_circle_service
+        await close_async_circle_service()
+        print("✅ Circle HTTP connection pool closed")
+    except Exception as e:
+        print(f"⚠️  Error closing Circle connection pool: {e}")
+
+    try:
+        from services.llm_client import close_openai_client
+        await close_openai_client()
+        print("✅ OpenAI client closed")
+    except Exception as e:
+        print(f"⚠️  Error closing OpenAI client: {e}")
+
 # CORS middleware for Next.js frontend
 # Allow Vercel deployment URLs
 cors_origins = [
@@ -101,6 +222,7 @@ app.add_middleware(
 class VoiceRequest(BaseModel):
     text: Optional[str] = None
     audio: Optional[str] = None  # Base64 encoded audio
+    intent: Optional[dict] = None  # ParsedCommand from /api/query/enhance (include_intent=true)
 
 class TransactionResponse(BaseModel):
     transaction_id: str
@@ -122,6 +244,7 @@ class STTResponse(BaseModel):
 class TTSRequest(BaseModel):
     text: str
     voice_id: Optional[str] = None
+    stream: bool = False  # Return a chunked audio/mpeg stream instead of a buffered file
 
 # Contacts API Models
 class AddContactRequest(BaseModel):
@@ -137,11 +260,20 @@ class ContactResponse(BaseModel):
 # Query Enhancement Models
 class EnhanceQueryRequest(BaseModel):
     query: str
+    include_intent: bool = False  # Also extract the structured ParsedCommand in the same LLM call
 
 class EnhanceQueryResponse(BaseModel):
     enhanced_query: str
     original_query: str
     extracted_name: Optional[str] = None  # Name extracted from query (if any)
+    intent: Optional[dict] = None  # ParsedCommand, only when include_intent is set
+    fx_conversions: Optional[list] = None  # Local fiat -> USDC conversions applied to the query
+
+class RiskBatchRequest(BaseModel):
+    intents: list  # [{action, asset, amount, percent, portfolio_total_value_usd, user_id}, ...]
+
+class ChallengeResolveRequest(BaseModel):
+    confirmed: bool  # False when the PIN challenge failed or was cancelled
 
 # Wallet API Models
 class WalletCreateResponse(BaseModel):
@@ -201,15 +333,90 @@ async def speech_to_text(request: STTRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"STT Error: {str(e)}")
 
+@app.post("/api/elevenlabs/stt/upload", response_model=STTResponse)
+async def speech_to_text_upload(
+    request: Request,
+    user_id: Optional[str] = Query(None, description="Optional user ID to attach to the archived audio")
+):
+    """
+    Convert audio to text from a binary upload (raw body or multipart/form-data)
+    Avoids the base64 JSON body of /api/elevenlabs/stt: the size limit is enforced while
+    the upload arrives, and the same bytes are archived to MongoDB and transcribed concurrently
+    """
+    try:
+        import asyncio
+        from utils.ElevenLabsSDK import get_elevenlabs_client
+        from utils.audio_upload import read_audio_upload, AudioUploadTooLarge
+        from services.mongodb_service import MongoDBService
+        
+        try:
+            audio_bytes, content_type = await read_audio_upload(request)
+        except AudioUploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        mongo = MongoDBService()
+        client = get_elevenlabs_client()
+        
+        # Archive and transcribe the same buffer in parallel
+        archive = asyncio.to_thread(
+            mongo.save_audio,
+            audio_bytes,
+            user_id or "default_user",  # TODO: Get from auth/session
+            {"source": "stt", "format": content_type or "binary"}
+        )
+        transcribe = asyncio.to_thread(client.speech_to_text, audio_bytes)
+        archive_result, text = await asyncio.gather(archive, transcribe, return_exceptions=True)
+        
+        if isinstance(text, BaseException):
+            raise text
+        if isinstance(archive_result, BaseException):
+            # Don't fail the transcription if the archive write fails
+            print(f"⚠️  Failed to save audio to MongoDB: {archive_result}")
+        else:
+            print(f"✅ Audio saved to MongoDB with ID: {archive_result}")
+        
+        return STTResponse(text=text)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"STT Error: {str(e)}")
+
 @app.post("/api/elevenlabs/tts")
 async def text_to_speech(request: TTSRequest):
     """
     Convert text to speech using ElevenLabs Text-to-Speech API
+    With stream=true, audio chunks are forwarded as ElevenLabs produces them
     """
     try:
-        from utils.ElevenLabsSDK import get_elevenlabs_client
+        from utils.ElevenLabsSDK import get_elevenlabs_client, iterate_audio_chunks
         
         client = get_elevenlabs_client()
+        
+        if request.stream:
+            chunks = iterate_audio_chunks(
+                client.text_to_speech_stream(text=request.text, voice_id=request.voice_id)
+            )
+            # Pull the first chunk before answering so upstream errors still map to HTTP errors
+            first_chunk = await anext(chunks, b"")
+            
+            async def audio_stream():
+                try:
+                    if first_chunk:
+                        yield first_chunk
+                    async for chunk in chunks:
+                        yield chunk
+                finally:
+                    # Runs on client disconnect too, which closes the upstream request
+                    await chunks.aclose()
+            
+            return StreamingResponse(
+                audio_stream(),
+                media_type="audio/mpeg",
+                headers={"Cache-Control": "no-cache"}
+            )
+        
         audio_bytes = client.text_to_speech(text=request.text, voice_id=request.voice_id)
         
         return Response(
@@ -223,6 +430,14 @@ async def text_to_speech(request: TTSRequest):
         raise HTTPException(status_code=500, detail=f"TTS Error: {str(e)}")
         
 
+@app.get("/api/elevenlabs/tts/cache")
+async def tts_cache_stats():
+    """
+    TTS cache hit/miss counters and tier sizes
+    """
+    from utils.tts_cache import get_tts_cache
+    return get_tts_cache().stats()
+
 # Voice processing endpoint
 @app.post("/api/voice/process")
 async def process_voice(request: VoiceRequest):
@@ -244,24 +459,28 @@ async def process_voice(request: VoiceRequest):
 
 # Get portfolio endpoint
 @app.get("/api/portfolio")
-async def get_portfolio():
+async def get_portfolio(user_id: str = Query(..., description="User ID")):
     """
     Get current portfolio data
+    Built from the user's Circle wallet balance and the price oracle, served from the
+    materialized snapshot (stale snapshots are refreshed in the background)
     """
-    # TODO: Fetch from MongoDB
-    return {
-        "total_value": 18450.32,
-        "assets": [
-            {"name": "USDC", "value": 11070.19, "percentage": 60},
-            {"name": "ETH", "value": 4612.58, "percentage": 25},
-            {"name": "BTC", "value": 2767.55, "percentage": 15}
-        ],
-        "allocations": {
-            "USDC": 60,
-            "ETH": 25,
-            "BTC": 15
+    try:
+        from services.portfolio_service import get_portfolio_service
+
+        snapshot = await get_portfolio_service().get_snapshot(user_id)
+        portfolio = snapshot["portfolio"]
+        return {
+            "total_value": portfolio["total_value"],
+            "assets": portfolio["assets"],
+            "allocations": portfolio["allocations"],
+            "prices": snapshot["prices"],
+            "unpriced": snapshot["unpriced"],
+            "as_of": snapshot["snapshot_at"],
+            "stale": snapshot["stale"],
         }
-    }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting portfolio: {str(e)}")
 
 # Get transactions endpoint
 @app.get("/api/transactions")
@@ -311,6 +530,17 @@ async def test_agent(request: VoiceRequest):
     result = await Runner.run(story_agent, request.text)
     return result.final_output
 
+def _parsed_command_from_request(request: VoiceRequest):
+    """ParsedCommand from the optional `intent` field (see /api/query/enhance)"""
+    if not request.intent:
+        return None
+    from pydantic import ValidationError
+    from agent_definitions.planner import ParsedCommand
+    try:
+        return ParsedCommand(**request.intent)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid intent: {e}")
+
 # Agent execution endpoint
 @app.post("/api/agents/execute")
 async def execute_with_agents(
@@ -322,17 +552,26 @@ async def execute_with_agents(
     """
     Execute transaction using AI agent system (agent-based sequential workflow)
     Returns challengeId if transaction requires PIN confirmation
+    Commands for one user run one at a time; a repeat of the same command while it is
+    running or shortly after gets the first result, marked "deduplicated": true
     """
     try:
-        from services.agents_runner import AgentRunner
+        from services.agents_runner import AgentRunner, command_key
+        from services.command_mailbox import submit_command
 
         if not request.text:
             raise HTTPException(status_code=400, detail="text or audio is required")
 
         text = request.text or ""
+        parsed_command = _parsed_command_from_request(request)
+
         print(text, "going to the agent runner")
         runner = AgentRunner()
-        result = await runner.run(text, user_id=user_id)
+        result = await submit_command(
+            user_id,
+            command_key(text, parsed_command, runner.registry),
+            lambda: runner.run(text, user_id=user_id, parsed_command=parsed_command),
+        )
         print(result, "result from the agent runner")
         return result
     except HTTPException:
@@ -342,6 +581,120 @@ async def execute_with_agents(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/warmup")
+async def warmup():
+    """
+    Build and warm up the agent pipeline registry (already done at startup; idempotent)
+    """
+    import asyncio
+    from services.agent_registry import warm_up_agent_registry
+    try:
+        timings = await asyncio.to_thread(warm_up_agent_registry)
+        return {"status": "ok", "timings_ms": timings}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Warm-up failed: {str(e)}")
+
+@app.post("/api/agents/execute/stream")
+async def execute_with_agents_stream(
+    request: VoiceRequest,
+    user_id: Optional[str] = Query(None, description="User ID for wallet operations")
+):
+    """
+    Same as /api/agents/execute, streamed as server-sent events:
+    - "stage" events as each pipeline stage starts, finishes or rejects, e.g.
+      {"stage": "planner", "status": "finished", "summary": "sending 10 USDC to 0x1234...abcd", ...}
+      {"stage": "executor", "status": "challenge_created", "challenge_id": "...", ...}
+    - one final "result" event whose data is exactly the /api/agents/execute response
+    - an "error" event instead of "result" if the pipeline itself crashes
+    Runs in the same per-user mailbox as /api/agents/execute: a repeat of a running or
+    just-finished command streams only the shared "result" event
+    """
+    import asyncio
+    import json
+    from fastapi.encoders import jsonable_encoder
+    from services.agents_runner import AgentRunner, command_key
+    from services.command_mailbox import submit_command
+
+    if not request.text:
+        raise HTTPException(status_code=400, detail="text or audio is required")
+
+    text = request.text
+    parsed_command = _parsed_command_from_request(request)
+    queue = asyncio.Queue()
+
+    async def run_pipeline():
+        try:
+            runner = AgentRunner()
+            return await submit_command(
+                user_id,
+                command_key(text, parsed_command, runner.registry),
+                lambda: runner.run(text, user_id=user_id, parsed_command=parsed_command, on_event=queue.put_nowait),
+            )
+        finally:
+            queue.put_nowait(None)
+
+    def sse(event: str, data) -> str:
+        return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+    async def events():
+        task = asyncio.create_task(run_pipeline())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield sse("stage", event)
+            try:
+                result = await task
+            except Exception as e:
+                print("❌ Full error trace:")
+                traceback.print_exc()
+                yield sse("error", {"detail": str(e)})
+                return
+            yield sse("result", result)
+        finally:
+            # Client went away: stop waiting. The command itself finishes in the user's
+            # mailbox, so a retry gets its result instead of starting a second run
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/agents/planner/stats")
+async def planner_stats():
+    """
+    Planner fast-path hit/fallback counters
+    """
+    from agent_definitions.planner import get_fast_path_stats
+    return get_fast_path_stats()
+
+@app.post("/api/agents/challenges/{challenge_id}/resolve")
+async def resolve_challenge(
+    challenge_id: str,
+    request: ChallengeResolveRequest,
+    user_id: Optional[str] = Query(None, description="User ID for wallet operations")
+):
+    """
+    Report how a transfer's PIN challenge ended, so only confirmed transfers count
+    towards the velocity limits and are stored in transactions
+    """
+    from services.velocity_limits import resolve_transfer
+    if not resolve_transfer(user_id, challenge_id, request.confirmed):
+        raise HTTPException(status_code=404, detail="No pending transfer for this challenge")
+    return {"challenge_id": challenge_id, "confirmed": request.confirmed}
+
+@app.get("/api/agents/mailbox/stats")
+async def mailbox_stats():
+    """
+    Per-user command mailbox: users with queued commands and deduplicated repeats
+    """
+    from services.command_mailbox import get_command_mailbox
+    return get_command_mailbox().stats()
+
 # Wallet Endpoints
 @app.post("/api/wallet/create", response_model=WalletCreateResponse)
 async def create_wallet(user_id: Optional[str] = Query(None, description="Optional user ID. If not provided, a new UUID will be generated")):
@@ -350,9 +703,9 @@ async def create_wallet(user_id: Optional[str] = Query(None, description="Option
     Returns: challengeId, userToken, encryptionKey, appId for frontend WebSDK
     """
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
         
-        circle = get_circle_service()
+        circle = get_async_circle_service()
         
         # Generate user ID if not provided
         if not user_id:
@@ -360,7 +713,7 @@ async def create_wallet(user_id: Optional[str] = Query(None, description="Option
         
         # Step 1: Create user
         try:
-            user_data = circle.create_user(user_id)
+            user_data = await circle.create_user(user_id)
         except Exception as e:
             # User might already exist, continue
             error_str = str(e).lower()
@@ -382,10 +735,10 @@ async def create_wallet(user_id: Optional[str] = Query(None, description="Option
             # Don't fail the request if MongoDB save fails
         
         # Step 2: Get session token
-        session = circle.get_session_token(user_id)
+        session = await circle.get_session_token(user_id)
         
         # Step 3: Initialize user (creates wallet + PIN challenge)
-        init_response = circle.initialize_user(
+        init_response = await circle.initialize_user(
             session["user_token"],
             blockchains=["ETH-SEPOLIA"]
         )
@@ -393,12 +746,11 @@ async def create_wallet(user_id: Optional[str] = Query(None, description="Option
         # Step 4: Try to get wallet address and save to MongoDB (may not be available until PIN is confirmed)
         try:
             from services.mongodb_service import MongoDBService
-            wallets_response = circle.get_wallets(user_id)
-            print(f"🔍 Wallets response: {wallets_response}")
-            wallets = wallets_response.get("wallets", [])
+            from services.wallet_resolver import get_wallet_resolver
+            wallet = await get_wallet_resolver().get_wallet(user_id)
+            print(f"🔍 Resolved wallet: {wallet}")
             
-            if wallets and len(wallets) > 0:
-                wallet = wallets[0]
+            if wallet:
                 wallet_address = wallet.get("address")
                 wallet_id = wallet.get("id")
                 blockchain = wallet.get("blockchain")
@@ -411,7 +763,7 @@ async def create_wallet(user_id: Optional[str] = Query(None, description="Option
                         wallet_address=wallet_address,
                         wallet_id=wallet_id,
                         blockchain=blockchain,
-                        metadata={"app_id": circle.get_app_id()}
+                        metadata={"app_id": await circle.get_app_id(), "wallet_state": wallet.get("state")}
                     )
                     print(f"✅ Circle wallet saved to MongoDB: {user_id} -> {wallet_address}")
                 else:
@@ -425,7 +777,7 @@ async def create_wallet(user_id: Optional[str] = Query(None, description="Option
             # Don't fail the request if MongoDB save fails
         
         # Get App ID
-        app_id = circle.get_app_id()
+        app_id = await circle.get_app_id()
         return WalletCreateResponse(
             user_id=user_id,
             app_id=app_id,
@@ -445,23 +797,22 @@ async def get_wallet_status(user_id: str = Query(..., description="User ID to ch
     Returns: wallet info if exists, null if not
     """
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
         from services.mongodb_service import MongoDBService
+        from services.wallet_resolver import get_wallet_resolver
         
-        circle = get_circle_service()
-        wallets_response = circle.get_wallets(user_id)
-        wallets = wallets_response.get("wallets", [])
+        circle = get_async_circle_service()
+        wallet = await get_wallet_resolver().get_wallet(user_id)
         
-        if not wallets:
+        if not wallet:
             return WalletStatusResponse(exists=False, wallet=None)
         
-        wallet = wallets[0]
         wallet_address = wallet.get("address")
         wallet_id = wallet.get("id")
         blockchain = wallet.get("blockchain")
         
-        # Update MongoDB with wallet address if available
-        if wallet_address:
+        # Update MongoDB with wallet address if it only just became available
+        if wallet_address and wallet["source"] == "circle":
             try:
                 mongo = MongoDBService()
                 mongo.save_circle_user(
@@ -469,7 +820,7 @@ async def get_wallet_status(user_id: str = Query(..., description="User ID to ch
                     wallet_address=wallet_address,
                     wallet_id=wallet_id,
                     blockchain=blockchain,
-                    metadata={"app_id": circle.get_app_id(), "updated_via": "status_check"}
+                    metadata={"app_id": await circle.get_app_id(), "updated_via": "status_check", "wallet_state": wallet.get("state")}
                 )
                 print(f"✅ Wallet address updated in MongoDB: {user_id} -> {wallet_address}")
             except Exception as e:
@@ -493,10 +844,10 @@ async def get_app_id():
     Get Circle App ID for frontend
     """
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
         
-        circle = get_circle_service()
-        app_id = circle.get_app_id()
+        circle = get_async_circle_service()
+        app_id = await circle.get_app_id()
         return {"app_id": app_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -508,25 +859,25 @@ async def get_wallet_balance(user_id: str = Query(..., description="User ID")):
     Returns: Token balances with amounts and token info
     """
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
+        from services.wallet_resolver import get_wallet_resolver
         
-        circle = get_circle_service()
+        circle = get_async_circle_service()
         
-        # Get user's wallet
-        wallets_response = circle.get_wallets(user_id)
-        wallets = wallets_response.get("wallets", [])
+        # Get user's wallet (memory -> MongoDB -> Circle)
+        wallet = await get_wallet_resolver().get_wallet(user_id)
         
-        if not wallets:
+        if not wallet:
             return {"tokenBalances": [], "wallet_id": None}
         
-        wallet_id = wallets[0]["id"]
+        wallet_id = wallet["id"]
         
         # Get user session token (required for balance queries)
-        session = circle.get_session_token(user_id)
+        session = await circle.get_session_token(user_id)
         user_token = session["user_token"]
         
         # Get wallet balance
-        balance_data = circle.get_wallet_balance(
+        balance_data = await circle.get_wallet_balance(
             wallet_id=wallet_id,
             user_token=user_token,
             include_all=True
@@ -534,7 +885,7 @@ async def get_wallet_balance(user_id: str = Query(..., description="User ID")):
         
         return {
             "wallet_id": wallet_id,
-            "wallet_address": wallets[0]["address"],
+            "wallet_address": wallet["address"],
             **balance_data
         }
     except Exception as e:
@@ -552,21 +903,28 @@ async def list_transactions(
     Returns: List of transactions with pagination info
     """
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
+        from services.wallet_resolver import get_wallet_resolver
+        
+        circle = get_async_circle_service()
         
-        circle = get_circle_service()
+        # Resolve the user's wallet (memory -> MongoDB -> Circle)
+        wallet = await get_wallet_resolver().get_wallet(user_id)
+        if not wallet:
+            return TransactionListResponse(transactions=[], page_before=None, page_after=None)
         
         # Get user session token (required for transaction queries)
-        session = circle.get_session_token(user_id)
+        session = await circle.get_session_token(user_id)
         user_token = session["user_token"]
         
         # List transactions
-        transactions_data = circle.list_transactions(
+        transactions_data = await circle.list_transactions(
             user_id=user_id,
             user_token=user_token,
             page_size=page_size,
             page_before=page_before,
-            page_after=page_after
+            page_after=page_after,
+            wallet_id=wallet["id"]
         )
         
         return TransactionListResponse(
@@ -587,16 +945,16 @@ async def get_transaction(
     Returns: Transaction details
     """
     try:
-        from services.circle_wallet_service import get_circle_service
+        from services.circle_wallet_service import get_async_circle_service
         
-        circle = get_circle_service()
+        circle = get_async_circle_service()
         
         # Get user session token (required for transaction queries)
-        session = circle.get_session_token(user_id)
+        session = await circle.get_session_token(user_id)
         user_token = session["user_token"]
         
         # Get transaction
-        transaction_data = circle.get_transaction(
+        transaction_data = await circle.get_transaction(
             transaction_id=transaction_id,
             user_token=user_token
         )
@@ -684,74 +1042,90 @@ async def get_contacts(
 async def enhance_query(request: EnhanceQueryRequest):
     """
     Enhance and normalize user query to standard format
-    Converts queries like "send 100 rupees to 0x..." to "send 100 usdc to 0x..."
-    Uses simple LLM (not agents) for query normalization
+    Converts queries like "send 100 rupees to 0x..." to "send 1.19 usdc to 0x..."
+    Fiat amounts are converted to USDC locally (FX rate table); simple transfers skip the LLM,
+    otherwise a simple LLM (not agents) normalizes the query
+    With include_intent, the same call also returns the ParsedCommand, which can be passed
+    as `intent` to /api/agents/execute to skip the planner
     """
+    from openai import APITimeoutError, RateLimitError
+    from services.llm_client import LLMUnavailableError
+    from services.query_enhancer import get_query_enhancer
+
     try:
-        from openai import OpenAI
-        
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured")
-        
-        client = OpenAI(api_key=api_key)
-        
-        prompt = f"""You are a query normalizer for cryptocurrency transactions. Your task is to normalize user queries into a standard format.
+        result = await get_query_enhancer().run(request.query, include_intent=request.include_intent)
+        return EnhanceQueryResponse(original_query=request.query, **result)
+    except APITimeoutError:
+        raise HTTPException(status_code=504, detail="Query enhancement timed out")
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(int(e.retry_in), 1))})
+    except RateLimitError:
+        raise HTTPException(status_code=429, detail="Query enhancement is rate limited, try again shortly")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error enhancing query: {str(e)}")
 
-Standard format: "send [amount] usdc to [wallet_address]"
+@app.get("/api/fx/rates")
+async def fx_rates():
+    """
+    Currencies in the local FX table and when it was last refreshed
+    """
+    from services.fx_rates import get_fx_rate_table
+    return get_fx_rate_table().stats()
 
-Rules:
-1. Always convert amounts to USDC (convert rupees, dollars, USD, etc. to USDC)
-2. Extract wallet addresses (they start with 0x and are 42 characters long)
-3. Always use the format: "send [amount] usdc to [wallet_address]"
-4. If no wallet address is found, keep the original query but normalize the currency to USDC
-5. Preserve the exact amount mentioned by the user
-6. Keep it simple and direct
+@app.get("/api/prices")
+async def prices():
+    """
+    Asset prices in the price oracle with their age and staleness
+    """
+    from services.price_oracle import get_price_oracle
+    return get_price_oracle().stats()
 
-Examples:
-- "send 100 rupees to 0x1234..." → "send 100 usdc to 0x1234..."
-- "transfer 50 dollars to 0xabcd..." → "send 50 usdc to 0xabcd..."
-- "send 25 usdc to 0x5678..." → "send 25 usdc to 0x5678..."
-- "100 rupees to john" → "send 100 usdc to john" (if no address, keep name)
+@app.get("/api/security/screening")
+async def security_screening():
+    """
+    Address screening lists currently loaded and their sizes
+    """
+    from services.address_screening import get_screening_index
+    return get_screening_index().stats()
 
-User query: {request.query}
+@app.get("/api/risk/velocity")
+async def risk_velocity(user_id: str = Query(..., description="User ID")):
+    """
+    A user's rolling transfer spend (USD) against the velocity limits
+    """
+    from services.velocity_limits import get_velocity_tracker, velocity_limits_for
+    return {"spent": get_velocity_tracker().spent(user_id), "limits": velocity_limits_for(user_id)}
 
-Normalized query:"""
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Using mini for faster/cheaper responses
-            messages=[
-                {"role": "system", "content": "You are a query normalizer. Always respond with only the normalized query, nothing else."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,  # Low temperature for consistent formatting
-            max_tokens=100
-        )
-        
-        enhanced_query = response.choices[0].message.content.strip()
-        
-        # Extract name from query (if it's not a wallet address)
-        extracted_name = None
-        # Check if query contains a name (not a wallet address starting with 0x)
-        # Pattern: "send X usdc to [name]" where name is not a wallet address
-        import re
-        wallet_pattern = r"0x[a-fA-F0-9]{40}"
-        if not re.search(wallet_pattern, enhanced_query.lower()):
-            # Extract text after "to" - this might be a name
-            match = re.search(r"to\s+([^\s]+(?:\s+[^\s]+)*)", enhanced_query, re.IGNORECASE)
-            if match:
-                potential_name = match.group(1).strip()
-                # If it's not a number and not "usdc", it's likely a name
-                if not potential_name.replace(".", "").replace(",", "").isdigit() and potential_name.lower() != "usdc":
-                    extracted_name = potential_name
-        
-        return EnhanceQueryResponse(
-            enhanced_query=enhanced_query,
-            original_query=request.query,
-            extracted_name=extracted_name
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error enhancing query: {str(e)}")
+@app.post("/api/risk/batch")
+async def risk_batch(request: RiskBatchRequest):
+    """
+    Re-score many intents at once against the risk rules (velocity limits excluded)
+    Returns: one {approved, reasons, usd_value} verdict per intent, in order
+    """
+    import asyncio
+    from agent_definitions.risk_analyst import batch_risk_check
+
+    try:
+        verdicts = await asyncio.to_thread(batch_risk_check, request.intents)
+    except (TypeError, ValueError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid intents: {str(e)}")
+    return {"verdicts": verdicts, "count": len(verdicts)}
+
+@app.get("/api/query/enhance/cache")
+async def enhance_cache_stats():
+    """
+    Query enhancement cache hit/miss counters
+    """
+    from services.enhance_cache import get_enhance_cache
+    return get_enhance_cache().stats()
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """
+    Shared LLM rate limiter and circuit breaker state
+    """
+    from services.llm_client import llm_stats
+    return llm_stats()
 
 if __name__ == "__main__":
     import uvicorn
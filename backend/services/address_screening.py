@@ -0,0 +1,262 @@
+import os
+import re
+import sys
+import mmap
+import math
+import time
+import struct
+import asyncio
+import hashlib
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SCREENING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "screening")
+
+KEY_SIZE = 20
+MAGIC = b"VVSCRN01"
+# magic, bloom hash count, bloom size in bits, key count
+_HEADER = struct.Struct("<8sIQQ")
+_ADDRESS = re.compile(r"0x[a-fA-F0-9]{40}")
+
+
+def address_key(address: str) -> Optional[bytes]:
+    """20-byte key for a 0x address (case-insensitive), or None if malformed"""
+    if not address or not _ADDRESS.fullmatch(address.strip()):
+        return None
+    return bytes.fromhex(address.strip()[2:])
+
+
+def _bloom_positions(key: bytes, hashes: int, bits: int) -> Iterable[int]:
+    # Double hashing over one digest; the digest keeps vanity/structured addresses spread out
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+def build_index(addresses: Iterable[str], path: str, false_positive_rate: float = 0.001) -> int:
+    """
+    Write an index file for a list of 0x addresses (malformed lines are skipped)
+    Layout: header | Bloom filter bits | sorted, de-duplicated 20-byte keys
+    The file is written next to `path` and moved into place, so readers never see a
+    partial index. Returns: number of keys written.
+    """
+    raw = bytearray()
+    for address in addresses:
+        key = address_key(address)
+        if key is not None:
+            raw += key
+    # Fixed-width byte strings sort bytewise, matching the binary search in lookups
+    keys = np.unique(np.frombuffer(bytes(raw), dtype=f"S{KEY_SIZE}")) if raw else np.empty(0, dtype=f"S{KEY_SIZE}")
+    count = len(keys)
+
+    bits = max(64, math.ceil(-count * math.log(false_positive_rate) / (math.log(2) ** 2) / 64) * 64)
+    hashes = max(1, round(bits / max(count, 1) * math.log(2)))
+    bloom = bytearray(bits // 8)
+    key_bytes = keys.tobytes()
+    for i in range(count):
+        for position in _bloom_positions(key_bytes[i * KEY_SIZE:(i + 1) * KEY_SIZE], hashes, bits):
+            bloom[position >> 3] |= 1 << (position & 7)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, hashes, bits, count))
+            f.write(bloom)
+            f.write(key_bytes)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return count
+
+
+class MappedAddressList:
+    """
+    One screening list, memory-mapped read-only
+    Keys stay in the OS page cache instead of the Python heap; a lookup checks the Bloom
+    filter and only binary-searches the sorted keys on a Bloom hit.
+    """
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path}: truncated index")
+        magic, self.hashes, self.bits, self.count = _HEADER.unpack_from(self._map, 0)
+        self._bloom_offset = _HEADER.size
+        self._keys_offset = self._bloom_offset + self.bits // 8
+        if magic != MAGIC or self.bits % 64 or self.hashes < 1:
+            raise ValueError(f"{path}: not an address index")
+        if len(self._map) != self._keys_offset + self.count * KEY_SIZE:
+            raise ValueError(f"{path}: size does not match header")
+
+    def __contains__(self, key: bytes) -> bool:
+        mm = self._map
+        bloom = self._bloom_offset
+        for position in _bloom_positions(key, self.hashes, self.bits):
+            if not mm[bloom + (position >> 3)] >> (position & 7) & 1:
+                return False
+
+        low, high = 0, self.count
+        offset = self._keys_offset
+        while low < high:
+            mid = (low + high) // 2
+            start = offset + mid * KEY_SIZE
+            probe = mm[start:start + KEY_SIZE]
+            if probe < key:
+                low = mid + 1
+            elif probe > key:
+                high = mid
+            else:
+                return True
+        return False
+
+
+class AddressScreeningIndex:
+    """
+    Screens addresses against every list in `directory`
+    - <name>.idx files (see build_index) are memory-mapped; <name>.txt files (one address
+      per line, # comments) are compiled to <name>.idx when they are newer
+    - reload() picks up new, replaced and removed lists and swaps the whole set in one
+      assignment, so a lookup sees either the old lists or the new ones, never a mix.
+      A list that fails to load keeps its previous version.
+    - The first load compiles .txt lists, so async code awaits ensure_loaded() (a worker
+      thread) before screening; screen() only loads inline for sync callers that did not
+    """
+
+    def __init__(self, directory: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.directory = directory or os.getenv("SCREENING_DIR", DEFAULT_SCREENING_DIR)
+        self.reload_interval = reload_interval if reload_interval is not None else float(os.getenv("SCREENING_RELOAD_INTERVAL", "30"))
+        self._lists: Tuple[MappedAddressList, ...] = ()
+        self._rejected: Dict[str, Tuple[int, int, int]] = {}  # name -> signature that failed to load
+        self._loaded_at: Optional[float] = None
+        self._loading: Optional[asyncio.Future] = None
+
+    async def ensure_loaded(self) -> None:
+        """Run the first reload() in a worker thread; concurrent callers share it"""
+        if self._loaded_at is not None:
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self.reload))
+        loading = self._loading
+        try:
+            await asyncio.shield(loading)
+        finally:
+            if loading.done() and self._loading is loading:
+                self._loading = None
+
+    def screen(self, address: str) -> List[str]:
+        """Names of the lists containing address (empty when clean or malformed)"""
+        if self._loaded_at is None:
+            self.reload()
+        key = address_key(address)
+        if key is None:
+            return []
+        return [mapped.name for mapped in self._lists if key in mapped]
+
+    def reload(self) -> bool:
+        """Sync with the directory; returns True when the set of lists changed"""
+        self._loaded_at = time.time()
+        if not os.path.isdir(self.directory):
+            changed = bool(self._lists)
+            self._lists = ()
+            return changed
+
+        self._compile_text_lists()
+        current = {mapped.name: mapped for mapped in self._lists}
+        lists = []
+        changed = False
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".idx"):
+                continue
+            name, path = filename[:-4], os.path.join(self.directory, filename)
+            loaded = current.get(name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # removed while listing
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if loaded is not None and loaded.signature == signature:
+                lists.append(loaded)
+                continue
+            if self._rejected.get(name) == signature:
+                # Warned about this version already; keep serving the previous one
+                if loaded is not None:
+                    lists.append(loaded)
+                continue
+            try:
+                lists.append(MappedAddressList(name, path))
+                self._rejected.pop(name, None)
+                changed = True
+                print(f"✅ Screening list {name} loaded ({lists[-1].count} addresses)")
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Screening list {name} not loaded: {e}")
+                self._rejected[name] = signature
+                if loaded is not None:
+                    lists.append(loaded)
+        changed = changed or len(lists) != len(self._lists)
+        # Old mappings are released once in-flight lookups drop their references
+        self._lists = tuple(lists)
+        return changed
+
+    def _compile_text_lists(self) -> None:
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".txt"):
+                continue
+            source = os.path.join(self.directory, filename)
+            target = source[:-4] + ".idx"
+            try:
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                    continue
+                with open(source, "r") as f:
+                    count = build_index((line.split("#", 1)[0].strip() for line in f), target)
+                print(f"✅ Screening list {filename} compiled ({count} addresses)")
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Screening list {filename} not compiled: {e}")
+
+    async def reload_forever(self) -> None:
+        """Reload every reload_interval seconds (run as a background task after the first reload())"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await asyncio.to_thread(self.reload)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "directory": self.directory,
+            "lists": {mapped.name: mapped.count for mapped in self._lists},
+            "loaded_at": self._loaded_at,
+        }
+
+
+# Singleton
+_screening_index: Optional[AddressScreeningIndex] = None
+
+def get_screening_index() -> AddressScreeningIndex:
+    """Get or create address screening index singleton"""
+    global _screening_index
+    if _screening_index is None:
+        _screening_index = AddressScreeningIndex()
+    return _screening_index
+
+async def load_screening_index() -> None:
+    """Make sure the screening lists are loaded without blocking the event loop"""
+    await get_screening_index().ensure_loaded()
+
+
+if __name__ == "__main__":
+    # python -m services.address_screening <addresses.txt> <name>.idx
+    if len(sys.argv) != 3:
+        print("usage: python -m services.address_screening <addresses.txt> <output.idx>")
+        sys.exit(1)
+    with open(sys.argv[1], "r") as source:
+        written = build_index((line.split("#", 1)[0].strip() for line in source), sys.argv[2])
+    print(f"Wrote {written} addresses to {sys.argv[2]}")
@@ -0,0 +1,117 @@
+import time
+import threading
+from typing import Dict, List, Optional
+
+from agents import Agent, AgentOutputSchema
+
+from agent_definitions import planner, portfolio_manager, risk_analyst, security_validator, executor, auditor
+from tools import agent_tools
+from services import address_screening, fx_rates, portfolio_service, velocity_limits
+from services.price_oracle import get_price_oracle
+from utils.spoken_numbers import normalize_spoken_amounts
+
+
+class AgentPipelineRegistry:
+    """
+    Everything the agent pipeline needs, built once per process and shared by every request
+    - The six Agent objects (with their function-tool and output schemas)
+    - The stage implementations AgentRunner calls directly, imported up front so the
+      first request does not pay for module imports
+    Construction validates every tool and output schema, so a broken agent definition
+    fails at startup rather than on a user's request.
+    """
+
+    def __init__(self):
+        self.planner_agent = planner.build_planner_agent()
+        self.portfolio_agent = portfolio_manager.build_portfolio_manager_agent()
+        self.risk_agent = risk_analyst.build_risk_analyst_agent()
+        self.security_agent = security_validator.build_security_validator_agent()
+        self.executor_agent = executor.build_executor_agent()
+        self.auditor_agent = auditor.build_auditor_agent()
+
+        # Stage implementations
+        self.ParsedCommand = planner.ParsedCommand
+        self.fast_parse_command = planner.fast_parse_command
+        self.intent_matches_text = planner.intent_matches_text
+        self.normalize_spoken_amounts = normalize_spoken_amounts
+        self.convert_currency_mentions = fx_rates.convert_currency_mentions
+        self.apply_fx_conversion = fx_rates.apply_fx_conversion
+        self.get_portfolio = portfolio_service.get_portfolio_data
+        self.invalidate_portfolio = portfolio_service.invalidate_portfolio
+        self.record_transfer = velocity_limits.record_transfer
+        self.risk_check = risk_analyst._basic_risk_check_impl
+        self.load_screening_index = address_screening.load_screening_index
+        self.security_validate = security_validator._security_validate_impl
+        self.execute_transaction = executor._execute_transaction_impl
+        self.audit_transaction = agent_tools._mock_audit_transaction_impl
+
+        self._validate()
+        self.warmed_up = False
+
+    @property
+    def agents(self) -> List[Agent]:
+        return [
+            self.planner_agent, self.portfolio_agent, self.risk_agent,
+            self.security_agent, self.executor_agent, self.auditor_agent,
+        ]
+
+    def _validate(self) -> None:
+        for agent in self.agents:
+            for tool in agent.tools:
+                schema = getattr(tool, "params_json_schema", None)
+                if not isinstance(schema, dict) or schema.get("type") != "object":
+                    raise ValueError(f"{agent.name}: tool {getattr(tool, 'name', tool)} has no valid parameter schema")
+            if agent.output_type is not None:
+                # Raises if the output type cannot be expressed as a (strict) JSON schema
+                AgentOutputSchema(agent.output_type).json_schema()
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Run the local parsing stages once so regexes compiled on first use and the FX
+        and price tables are ready before the first request
+        Returns: per-step timings in ms
+        """
+        timings = {}
+
+        def timed(name, fn, *args, **kwargs):
+            started = time.perf_counter()
+            fn(*args, **kwargs)
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+        sample = "send twenty five rupees to 0x0000000000000000000000000000000000000000"
+        timed("spoken_numbers", self.normalize_spoken_amounts, sample)
+        timed("fx_rates", self.convert_currency_mentions, "send 25 rupees to bob")
+        timed("prices", get_price_oracle().get_quote, "USDC")
+        timed("parse_natural_command", planner._parse_natural_command_impl, "send 25 usdc to 0x0000000000000000000000000000000000000000")
+        timed("risk_check", self.risk_check, intent_action="transfer", intent_asset="USDC", intent_amount=1.0)
+        timed("security_validate", self.security_validate, intent_action="transfer", intent_asset="USDC", intent_amount=1.0,
+              intent_destination="0x0000000000000000000000000000000000000000")
+
+        self.warmed_up = True
+        return timings
+
+
+# Singleton
+_agent_registry: Optional[AgentPipelineRegistry] = None
+_agent_registry_lock = threading.Lock()
+
+def get_agent_registry() -> AgentPipelineRegistry:
+    """Get or create agent pipeline registry singleton"""
+    global _agent_registry
+    if _agent_registry is None:
+        with _agent_registry_lock:
+            if _agent_registry is None:
+                _agent_registry = AgentPipelineRegistry()
+    return _agent_registry
+
+def warm_up_agent_registry() -> Dict[str, float]:
+    """
+    Build the registry (if needed) and warm it up; safe to call repeatedly
+    Returns: timings in ms, including "build"
+    """
+    started = time.perf_counter()
+    registry = get_agent_registry()
+    timings = {"build": round((time.perf_counter() - started) * 1000, 2)}
+    if not registry.warmed_up:
+        timings.update(registry.warm_up())
+    return timings
@@ -1,194 +1,412 @@
 import os
+import json
+import time
 import uuid
-import requests
-from typing import Dict, Any, Optional
+import hashlib
+import asyncio
+import threading
+import httpx
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class CircleWalletService:
+CIRCLE_BASE_URL = "https://api.circle.com/v1/w3s"
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """
+    Create the shared keep-alive HTTP/2 connection pool used for Circle calls
+    All requests go to a single host, so the pool limits are effectively per-host limits
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("CIRCLE_HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("CIRCLE_HTTP_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("CIRCLE_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("CIRCLE_HTTP_TIMEOUT", "10")),
+        connect=float(os.getenv("CIRCLE_HTTP_CONNECT_TIMEOUT", "5")),
+    )
+    return httpx.AsyncClient(base_url=CIRCLE_BASE_URL, http2=True, limits=limits, timeout=timeout)
+
+
+class SessionTokenCache:
+    """
+    Per-user cache for Circle session tokens
+    - Tokens are valid for 60 minutes; expiry is measured from when the request was sent
+    - A token is never served within `safety_margin` seconds of its expiry
+    - Once a token is inside the `refresh_ahead` window it is still served, but a
+      background refresh is started so the next caller gets a fresh one
+    - Concurrent misses for the same user share a single upstream call
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        safety_margin: Optional[float] = None,
+        refresh_ahead: Optional[float] = None
+    ):
+        self.ttl = ttl if ttl is not None else float(os.getenv("CIRCLE_SESSION_TOKEN_TTL", "3600"))
+        self.safety_margin = safety_margin if safety_margin is not None else float(os.getenv("CIRCLE_SESSION_TOKEN_SAFETY_MARGIN", "120"))
+        self.refresh_ahead = refresh_ahead if refresh_ahead is not None else float(os.getenv("CIRCLE_SESSION_TOKEN_REFRESH_AHEAD", "600"))
+        self._entries: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, user_id: str, fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Return a cached session for user_id, calling fetch(user_id) on a miss
+        """
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+
+        if entry is not None:
+            session, expires_at = entry
+            if now < expires_at - self.safety_margin:
+                if now >= expires_at - self.refresh_ahead and user_id not in self._inflight:
+                    self._start_fetch(user_id, fetch)
+                return dict(session)
+            # Too close to expiry to hand out
+            self._entries.pop(user_id, None)
+
+        task = self._inflight.get(user_id) or self._start_fetch(user_id, fetch)
+        # Shield so one cancelled caller does not cancel the fetch for everyone else
+        session = await asyncio.shield(task)
+        return dict(session)
+
+    def invalidate(self, user_id: str, user_token: Optional[str] = None) -> None:
+        """
+        Drop the cached token for a user (e.g. after a 401)
+        With user_token, only drop it if it is still the cached one, so a token that
+        another caller already replaced is kept
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None and (user_token is None or entry[0].get("user_token") == user_token):
+            self._entries.pop(user_id, None)
+
+    def user_for_token(self, user_token: str) -> Optional[str]:
+        """User whose cached session holds user_token (None if it is not cached)"""
+        for user_id, (session, _) in self._entries.items():
+            if session.get("user_token") == user_token:
+                return user_id
+        return None
+
+    def _start_fetch(self, user_id: str, fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch(user_id, fetch))
+        self._inflight[user_id] = task
+        task.add_done_callback(lambda t: self._on_fetch_done(user_id, t))
+        return task
+
+    async def _fetch(self, user_id: str, fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        requested_at = time.monotonic()
+        session = await fetch(user_id)
+        self._entries[user_id] = (session, requested_at + self.ttl)
+        return session
+
+    def _on_fetch_done(self, user_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(user_id) is task:
+            self._inflight.pop(user_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Background refreshes have no awaiting caller; log so failures are visible
+            print(f"⚠️  Session token refresh failed for {user_id}: {task.exception()}")
+
+
+class EntityConfigCache:
+    """
+    Process-wide cache for Circle's entity config (GET /config/entity)
+    The config (and appId in particular) is effectively static per API key, so:
+    - It is loaded once (at startup, or on first use) and kept in memory
+    - After `ttl` seconds it is refreshed in the background while the old value keeps being served
+    - Every successful fetch is written to a local snapshot file, which is used on cold start
+      so a fresh process (e.g. a serverless invocation) can answer without calling Circle
+    """
+
+    def __init__(self, ttl: Optional[float] = None, snapshot_path: Optional[str] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("CIRCLE_CONFIG_TTL", "86400"))
+        self.snapshot_path = snapshot_path or os.getenv("CIRCLE_CONFIG_SNAPSHOT_PATH", "/tmp/circle_entity_config.json")
+        self._config: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0  # wall-clock time, so snapshot age carries across processes
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def get(self, api_key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Return the entity config, calling fetch() only when nothing is cached or on disk
+        """
+        if self._config is None:
+            self._load_snapshot(api_key)
+
+        if self._config is not None:
+            if time.time() - self._fetched_at >= self.ttl and not self._is_inflight():
+                self._start_fetch(api_key, fetch)
+            return dict(self._config)
+
+        task = self._inflight if self._is_inflight() else self._start_fetch(api_key, fetch)
+        return dict(await asyncio.shield(task))
+
+    def _is_inflight(self) -> bool:
+        # Tasks are bound to the loop that created them (the sync facade runs its own loop)
+        task = self._inflight
+        return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+    def _start_fetch(self, api_key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch(api_key, fetch))
+        self._inflight = task
+        task.add_done_callback(self._on_fetch_done)
+        return task
+
+    async def _fetch(self, api_key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        config = await fetch()
+        self._config = config
+        self._fetched_at = time.time()
+        self._save_snapshot(api_key)
+        return config
+
+    def _on_fetch_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️  Circle entity config refresh failed: {task.exception()}")
+
+    @staticmethod
+    def _key_fingerprint(api_key: str) -> str:
+        # Never write the key itself to disk; only check the snapshot belongs to it
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def _load_snapshot(self, api_key: str) -> None:
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if snapshot.get("key_fingerprint") != self._key_fingerprint(api_key) or not snapshot.get("config"):
+            return
+
+        self._config = snapshot["config"]
+        self._fetched_at = float(snapshot.get("fetched_at", 0.0))
+        print(f"✅ Circle entity config loaded from snapshot: {self.snapshot_path}")
+
+    def _save_snapshot(self, api_key: str) -> None:
+        snapshot = {
+            "key_fingerprint": self._key_fingerprint(api_key),
+            "fetched_at": self._fetched_at,
+            "config": self._config,
+        }
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"⚠️  Could not write Circle entity config snapshot: {e}")
+
+
+_entity_config_cache = EntityConfigCache()
+
+
+class AsyncCircleWalletService:
     """
-    Circle User Controlled Wallets REST API wrapper
+    Async Circle User Controlled Wallets REST API wrapper
     Based on: https://developers.circle.com/interactive-quickstarts/user-controlled-wallets
+    Uses one pooled httpx.AsyncClient so FastAPI handlers never block the event loop
     """
-    
-    def __init__(self):
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = os.getenv("CIRCLE_API_KEY")
         if not self.api_key:
             raise ValueError("CIRCLE_API_KEY must be set in .env")
-        
-        self.base_url = "https://api.circle.com/v1/w3s"
+
+        self.base_url = CIRCLE_BASE_URL
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
-    
-    def get_app_id(self) -> str:
+        self.http = http_client or _build_http_client()
+        self.session_tokens = SessionTokenCache()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool"""
+        await self.http.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        user_token: Optional[str] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a request to Circle and return the parsed JSON body
+        A 401 on a cached session token (revoked or expired early) drops that token and
+        retries once with a fresh one.
+        Raises httpx.HTTPStatusError on non-2xx responses
+        """
+        async def send(token: Optional[str]) -> httpx.Response:
+            headers = self.headers
+            if token:
+                headers = {**self.headers, "X-User-Token": token}
+            return await self.http.request(method, path, headers=headers, json=json_body, params=params)
+
+        response = await send(user_token)
+        if response.status_code == 401 and user_token:
+            user_id = self.session_tokens.user_for_token(user_token)
+            if user_id is not None:
+                self.session_tokens.invalidate(user_id, user_token)
+                session = await self.get_session_token(user_id)
+                response = await send(session["user_token"])
+        response.raise_for_status()
+        return response.json()
+
+    async def get_app_id(self) -> str:
         """
         Get App ID from Circle config
+        Served from the process-wide entity config cache
         Returns: App ID string
         """
-        url = f"{self.base_url}/config/entity"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        print("response",response.json())
-        return response.json()["data"]["appId"]
-    
-    def create_user(self, user_id: str) -> Dict[str, Any]:
+        config = await self.get_entity_config()
+        return config["appId"]
+
+    async def get_entity_config(self) -> Dict[str, Any]:
+        """
+        Get Circle entity config (cached process-wide, see EntityConfigCache)
+        """
+        return await _entity_config_cache.get(self.api_key, self.fetch_entity_config)
+
+    async def fetch_entity_config(self) -> Dict[str, Any]:
+        """
+        Request the entity config from Circle, bypassing the cache
+        """
+        body = await self._request("GET", "/config/entity")
+        return body["data"]
+
+    async def create_user(self, user_id: str) -> Dict[str, Any]:
         """
         Step 1: Create a new user
         """
-        url = f"{self.base_url}/users"
-        payload = {"userId": user_id}
-        
-        response = requests.post(url, json=payload, headers=self.headers)
-        response.raise_for_status()
-        return response.json()["data"]
-    
-    def get_session_token(self, user_id: str) -> Dict[str, Any]:
+        body = await self._request("POST", "/users", json_body={"userId": user_id})
+        return body["data"]
+
+    async def get_session_token(self, user_id: str) -> Dict[str, Any]:
         """
         Step 2: Get user session token (60-min validity)
+        Served from the per-user token cache; only misses hit Circle
         Returns: {userToken, encryptionKey}
         """
-        url = f"{self.base_url}/users/token"
-        payload = {"userId": user_id}
-        
-        response = requests.post(url, json=payload, headers=self.headers)
-        response.raise_for_status()
-        
-        data = response.json()["data"]
+        return await self.session_tokens.get(user_id, self.fetch_session_token)
+
+    async def fetch_session_token(self, user_id: str) -> Dict[str, Any]:
+        """
+        Request a fresh session token from Circle, bypassing the cache
+        Returns: {userToken, encryptionKey}
+        """
+        body = await self._request("POST", "/users/token", json_body={"userId": user_id})
+
+        data = body["data"]
         return {
             "user_token": data["userToken"],
             "encryption_key": data["encryptionKey"]
         }
-    
-    def initialize_user(self, user_token: str, blockchains: list = None) -> Dict[str, Any]:
+
+    async def initialize_user(self, user_token: str, blockchains: list = None) -> Dict[str, Any]:
         """
         Step 3: Initialize user and create wallet
         Returns: {challengeId} - for PIN setup via WebSDK
         """
         if blockchains is None:
             blockchains = ["ETH-SEPOLIA"]  # Testnet
-        
-        url = f"{self.base_url}/user/initialize"
+
         payload = {
             "idempotencyKey": str(uuid.uuid4()),
             "blockchains": blockchains,
             "accountType": "SCA"  # Smart Contract Account
         }
-        
-        headers = {**self.headers, "X-User-Token": user_token}
-        
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        
-        return response.json()["data"]
-    
-    def get_wallets(self, user_id: str) -> Dict[str, Any]:
+
+        body = await self._request("POST", "/user/initialize", user_token=user_token, json_body=payload)
+        return body["data"]
+
+    async def get_wallets(self, user_id: str) -> Dict[str, Any]:
         """
         Get all wallets for a user
         """
-        url = f"{self.base_url}/wallets?userId={user_id}"
-        
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        
-        return response.json()["data"]
-    
-    def get_wallet_balance(self, wallet_id: str, user_token: str, include_all: bool = True) -> Dict[str, Any]:
+        body = await self._request("GET", "/wallets", params={"userId": user_id})
+        return body["data"]
+
+    async def get_wallet_balance(self, wallet_id: str, user_token: str, include_all: bool = True) -> Dict[str, Any]:
         """
         Get token balance for a wallet
         Requires user_token for authentication
-        
+
         Args:
             wallet_id: Wallet ID
             user_token: User session token
             include_all: Return all resources with monitored and non-monitored tokens (default: True)
-        
+
         Returns:
             Wallet balance data with tokenBalances array
         """
-        url = f"{self.base_url}/wallets/{wallet_id}/balances"
-        
         params = {
             "includeAll": include_all
         }
-        
-        headers = {**self.headers, "X-User-Token": user_token}
-        
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        return response.json()["data"]
-    
-    def list_transactions(self, user_id: str, user_token: str, page_size: int = 50, page_before: Optional[str] = None, page_after: Optional[str] = None) -> Dict[str, Any]:
+
+        body = await self._request("GET", f"/wallets/{wallet_id}/balances", user_token=user_token, params=params)
+        return body["data"]
+
+    async def list_transactions(self, user_id: str, user_token: str, page_size: int = 50, page_before: Optional[str] = None, page_after: Optional[str] = None, wallet_id: Optional[str] = None) -> Dict[str, Any]:
         """
         List transactions for a user
         Requires user_token for authentication
-        
+
         Args:
             user_id: User ID
             user_token: User session token
             page_size: Number of transactions per page (default: 50)
             page_before: Cursor for pagination (before)
             page_after: Cursor for pagination (after)
-        
+            wallet_id: Already-resolved wallet ID (skips the wallet lookup)
+
         Returns:
             List of transactions
         """
-        # First, get the user's wallet
-        wallets_response = self.get_wallets(user_id)
-        wallets = wallets_response.get("wallets", [])
-        
-        if not wallets:
-            # Return empty list if no wallet exists
-            return {"transactions": [], "pageBefore": None, "pageAfter": None}
-        
-        # Use the first wallet to get transactions
-        wallet_id = wallets[0]["id"]
-        
-        # List transactions for the wallet
-        url = f"{self.base_url}/transactions"
-        
+        if not wallet_id:
+            # First, get the user's wallet
+            wallets_response = await self.get_wallets(user_id)
+            wallets = wallets_response.get("wallets", [])
+
+            if not wallets:
+                # Return empty list if no wallet exists
+                return {"transactions": [], "pageBefore": None, "pageAfter": None}
+
+            # Use the first wallet to get transactions
+            wallet_id = wallets[0]["id"]
+
         params = {
             "walletId": wallet_id,
             "pageSize": page_size
         }
-        
+
         if page_before:
             params["pageBefore"] = page_before
         if page_after:
             params["pageAfter"] = page_after
-        
-        headers = {**self.headers, "X-User-Token": user_token}
-        
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        return response.json()["data"]
-    
-    def get_transaction(self, transaction_id: str, user_token: str) -> Dict[str, Any]:
+
+        body = await self._request("GET", "/transactions", user_token=user_token, params=params)
+        return body["data"]
+
+    async def get_transaction(self, transaction_id: str, user_token: str) -> Dict[str, Any]:
         """
         Get a single transaction by ID
         Requires user_token for authentication
-        
+
         Args:
             transaction_id: Transaction ID
             user_token: User session token
-        
+
         Returns:
             Transaction details
         """
-        url = f"{self.base_url}/transactions/{transaction_id}"
-        
-        headers = {**self.headers, "X-User-Token": user_token}
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        return response.json()["data"]
-    
-    def create_transfer_challenge(
+        body = await self._request("GET", f"/transactions/{transaction_id}", user_token=user_token)
+        return body["data"]
+
+    async def create_transfer_challenge(
         self,
         user_token: str,
         wallet_id: str,
@@ -200,7 +418,7 @@ class CircleWalletService:
         """
         Create a transfer challenge for user confirmation
         Requires user_token for authentication
-        
+
         Args:
             user_token: User session token
             wallet_id: Source wallet ID
@@ -208,12 +426,10 @@ class CircleWalletService:
             amount: Amount in token units (string, e.g., "1000000" for 1 USDC with 6 decimals)
             token_id: Token ID to transfer
             fee_level: Fee level (LOW, MEDIUM, HIGH) - default HIGH
-        
+
         Returns:
             Challenge data with challengeId
         """
-        url = f"{self.base_url}/user/transactions/transfer"
-        
         payload = {
             "idempotencyKey": str(uuid.uuid4()),
             "walletId": wallet_id,
@@ -222,15 +438,11 @@ class CircleWalletService:
             "tokenId": token_id,
             "feeLevel": fee_level
         }
-        
-        headers = {**self.headers, "X-User-Token": user_token}
-        
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        
-        return response.json()["data"]
-    
-    def create_transfer_challenge_with_address(
+
+        body = await self._request("POST", "/user/transactions/transfer", user_token=user_token, json_body=payload)
+        return body["data"]
+
+    async def create_transfer_challenge_with_address(
         self,
         user_token: str,
         wallet_id: str,
@@ -243,7 +455,7 @@ class CircleWalletService:
         """
         Create a transfer challenge using tokenAddress + blockchain (alternative to tokenId)
         Requires user_token for authentication
-        
+
         Args:
             user_token: User session token
             wallet_id: Source wallet ID
@@ -252,12 +464,10 @@ class CircleWalletService:
             token_address: Token contract address (e.g., USDC address)
             blockchain: Blockchain network (e.g., "ETH-SEPOLIA")
             fee_level: Fee level (LOW, MEDIUM, HIGH) - default HIGH
-        
+
         Returns:
             Challenge data with challengeId
         """
-        url = f"{self.base_url}/user/transactions/transfer"
-        
         payload = {
             "idempotencyKey": str(uuid.uuid4()),
             "walletId": wallet_id,
@@ -267,17 +477,70 @@ class CircleWalletService:
             "blockchain": blockchain,
             "feeLevel": fee_level
         }
-        
-        headers = {**self.headers, "X-User-Token": user_token}
-        
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        
-        return response.json()["data"]
 
+        body = await self._request("POST", "/user/transactions/transfer", user_token=user_token, json_body=payload)
+        return body["data"]
+
+
+class CircleWalletService:
+    """
+    Synchronous facade over AsyncCircleWalletService
+    Each call is run on a private background event loop, so it is safe to use
+    from plain sync code (scripts, sync function tools) without touching the server loop
+    """
+
+    def __init__(self):
+        self._service = AsyncCircleWalletService()
+        self.api_key = self._service.api_key
+        self.base_url = self._service.base_url
+        self.headers = self._service.headers
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="circle-sync-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self, coro):
+        """Run a coroutine on the background loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def get_app_id(self) -> str:
+        return self._run(self._service.get_app_id())
 
-# Singleton
+    def create_user(self, user_id: str) -> Dict[str, Any]:
+        return self._run(self._service.create_user(user_id))
+
+    def get_session_token(self, user_id: str) -> Dict[str, Any]:
+        return self._run(self._service.get_session_token(user_id))
+
+    def initialize_user(self, user_token: str, blockchains: list = None) -> Dict[str, Any]:
+        return self._run(self._service.initialize_user(user_token, blockchains))
+
+    def get_wallets(self, user_id: str) -> Dict[str, Any]:
+        return self._run(self._service.get_wallets(user_id))
+
+    def get_wallet_balance(self, wallet_id: str, user_token: str, include_all: bool = True) -> Dict[str, Any]:
+        return self._run(self._service.get_wallet_balance(wallet_id, user_token, include_all))
+
+    def list_transactions(self, user_id: str, user_token: str, page_size: int = 50, page_before: Optional[str] = None, page_after: Optional[str] = None, wallet_id: Optional[str] = None) -> Dict[str, Any]:
+        return self._run(self._service.list_transactions(user_id, user_token, page_size, page_before, page_after, wallet_id))
+
+    def get_transaction(self, transaction_id: str, user_token: str) -> Dict[str, Any]:
+        return self._run(self._service.get_transaction(transaction_id, user_token))
+
+    def create_transfer_challenge(self, user_token: str, wallet_id: str, destination_address: str, amount: str, token_id: str, fee_level: str = "HIGH") -> Dict[str, Any]:
+        return self._run(self._service.create_transfer_challenge(
+            user_token, wallet_id, destination_address, amount, token_id, fee_level
+        ))
+
+    def create_transfer_challenge_with_address(self, user_token: str, wallet_id: str, destination_address: str, amount: str, token_address: str, blockchain: str, fee_level: str = "HIGH") -> Dict[str, Any]:
+        return self._run(self._service.create_transfer_challenge_with_address(
+            user_token, wallet_id, destination_address, amount, token_address, blockchain, fee_level
+        ))
+
+
+# Singletons
 _circle_service: Optional[CircleWalletService] = None
+_async_circle_service: Optional[AsyncCircleWalletService] = None
 
 def get_circle_service() -> CircleWalletService:
     """Get or create Circle service singleton"""
@@ -286,3 +549,16 @@ def get_circle_service() -> CircleWalletService:
         _circle_service = CircleWalletService()
     return _circle_service
 
+def get_async_circle_service() -> AsyncCircleWalletService:
+    """Get or create async Circle service singleton (shares one connection pool)"""
+    global _async_circle_service
+    if _async_circle_service is None:
+        _async_circle_service = AsyncCircleWalletService()
+    return _async_circle_service
+
+async def close_async_circle_service() -> None:
+    """Close the shared Circle connection pool (call on shutdown)"""
+    global _async_circle_service
+    if _async_circle_service is not None:
+        await _async_circle_service.aclose()
+        _async_circle_service = None
@@ -0,0 +1,136 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+Command = Callable[[], Awaitable[Any]]
+
+
+class CommandMailbox:
+    """
+    Per-user mailbox for agent commands
+    - Commands for one user run one at a time, in arrival order; different users run in
+      parallel (each user with queued work has its own worker task, which exits when idle)
+    - A command whose key matches one that is queued or running for the same user is not
+      queued again: it waits for that command and shares its result
+    - A command whose key matches one that finished within `dedup_window` seconds gets
+      that result straight away (only results that `remember` accepts are kept)
+    Waiting callers are shielded: a client that disconnects does not cancel the command,
+    so its retry can pick up the result.
+    """
+
+    def __init__(self, dedup_window: Optional[float] = None):
+        self.dedup_window = dedup_window if dedup_window is not None else float(os.getenv("COMMAND_DEDUP_WINDOW", "10"))
+        self._queues: Dict[str, Deque[Tuple[Optional[str], Command, asyncio.Future, Callable[[Any], bool]]]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        # (user_id, key) -> (finished_at, result), oldest first
+        self._recent: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.deduplicated = 0
+
+    async def submit(
+        self,
+        user_id: str,
+        key: Optional[str],
+        command: Command,
+        remember: Callable[[Any], bool] = lambda result: True
+    ) -> Tuple[Any, bool]:
+        """
+        Run command in user_id's mailbox (key=None: serialize without deduplication)
+        Returns: (result, deduplicated) where deduplicated is True when the result came
+        from an earlier command with the same key
+        """
+        self._expire()
+        if key is not None:
+            recent = self._recent.get((user_id, key))
+            if recent is not None:
+                self.deduplicated += 1
+                return recent[1], True
+            pending = self._pending.get((user_id, key))
+            if pending is not None:
+                self.deduplicated += 1
+                return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the outcome as retrieved even if every caller has gone away
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if key is not None:
+            self._pending[(user_id, key)] = future
+        self._queues.setdefault(user_id, deque()).append((key, command, future, remember))
+        if user_id not in self._workers:
+            self._workers[user_id] = asyncio.ensure_future(self._drain(user_id))
+        return await asyncio.shield(future), False
+
+    async def _drain(self, user_id: str) -> None:
+        queue = self._queues[user_id]
+        try:
+            while queue:
+                key, command, future, remember = queue.popleft()
+                try:
+                    result = await command()
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+                    if key is not None and remember(result):
+                        self._recent[(user_id, key)] = (time.time(), result)
+                        self._recent.move_to_end((user_id, key))
+                finally:
+                    if key is not None and self._pending.get((user_id, key)) is future:
+                        del self._pending[(user_id, key)]
+        finally:
+            # No await between the last empty check and here, so nothing can be enqueued
+            # for this user without a worker
+            del self._workers[user_id]
+            del self._queues[user_id]
+            for key, _, future, _ in queue:
+                future.cancel()
+                self._pending.pop((user_id, key), None)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.dedup_window
+        while self._recent:
+            entry, (finished_at, _) = next(iter(self._recent.items()))
+            if finished_at > cutoff:
+                break
+            del self._recent[entry]
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire()
+        return {
+            "active_users": len(self._workers),
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "remembered": len(self._recent),
+            "deduplicated": self.deduplicated,
+            "dedup_window_seconds": self.dedup_window,
+        }
+
+
+# Singleton
+_command_mailbox: Optional[CommandMailbox] = None
+
+def get_command_mailbox() -> CommandMailbox:
+    """Get or create command mailbox singleton"""
+    global _command_mailbox
+    if _command_mailbox is None:
+        _command_mailbox = CommandMailbox()
+    return _command_mailbox
+
+def _reusable(result: Any) -> bool:
+    # A failed attempt should not be replayed to the user's retry
+    return not (isinstance(result, dict) and (result.get("status") == "failed" or result.get("error")))
+
+async def submit_command(user_id: Optional[str], key: Optional[str], command: Command) -> Any:
+    """
+    Run an agent pipeline command in the user's mailbox (DEFAULT_USER_ID when user_id is
+    missing, like the executor). Results shared with a duplicate are marked deduplicated.
+    """
+    user_id = user_id or os.getenv("DEFAULT_USER_ID") or ""
+    result, deduplicated = await get_command_mailbox().submit(user_id, key, command, remember=_reusable)
+    if deduplicated and isinstance(result, dict):
+        result = {**result, "deduplicated": True}
+    return result
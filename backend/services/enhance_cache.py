@@ -0,0 +1,318 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+# Addresses first in the alternation, they contain digits
+_SLOT_RE = re.compile(r"(?P<addr>0x[a-fA-F0-9]{40})|(?P<num>\d+(?:,\d{3})*(?:\.\d+)?)")
+_PLACEHOLDER_RE = re.compile(r"<(addr|num)_(\d+)>")
+
+
+class _Uncacheable(Exception):
+    """The result cannot be expressed as a template of the query's slots"""
+
+
+def canonicalize(query: str) -> Optional[Tuple[str, List[str], List[str]]]:
+    """
+    Split a query into a template and its slots
+    "Send 1,000 USDC to 0xAbC..." -> ("send <num_0> usdc to <addr_0>", ["0xAbC..."], ["1000"])
+    The template is case-folded and whitespace-collapsed; slots keep their original
+    text (numbers lose grouping commas). Returns None for queries that already contain
+    placeholder-like text.
+    """
+    collapsed = " ".join(query.split())
+    if _PLACEHOLDER_RE.search(collapsed.casefold()):
+        return None
+
+    addresses: List[str] = []
+    numbers: List[str] = []
+
+    def sub(match):
+        if match.group("addr"):
+            addresses.append(match.group("addr"))
+            return f"<addr_{len(addresses) - 1}>"
+        numbers.append(match.group("num").replace(",", ""))
+        return f"<num_{len(numbers) - 1}>"
+
+    template = _SLOT_RE.sub(sub, collapsed)
+    return template.casefold(), addresses, numbers
+
+
+def _slot_for_address(value: str, addresses: List[str]) -> int:
+    matches = [i for i, address in enumerate(addresses) if address.lower() == value.lower()]
+    if len(matches) != 1:
+        raise _Uncacheable(f"address {value} does not map to exactly one slot")
+    return matches[0]
+
+
+def _slot_for_number(value: Any, numbers: List[str]) -> int:
+    try:
+        target = Decimal(str(value).replace(",", ""))
+        matches = [i for i, number in enumerate(numbers) if Decimal(number) == target]
+    except InvalidOperation:
+        raise _Uncacheable(f"{value} is not a number")
+    if len(matches) != 1:
+        raise _Uncacheable(f"number {value} does not map to exactly one slot")
+    return matches[0]
+
+
+def _templatize(text: str, addresses: List[str], numbers: List[str]) -> str:
+    """Replace every address and number in text with its slot, failing on any literal"""
+    if _PLACEHOLDER_RE.search(text.casefold()):
+        raise _Uncacheable("text contains placeholder-like tokens")
+
+    def sub(match):
+        if match.group("addr"):
+            return f"<addr_{_slot_for_address(match.group('addr'), addresses)}>"
+        return f"<num_{_slot_for_number(match.group('num'), numbers)}>"
+
+    return _SLOT_RE.sub(sub, text)
+
+
+def _restore(template: str, addresses: List[str], numbers: List[str]) -> str:
+    def sub(match):
+        kind, index = match.group(1), int(match.group(2))
+        slots = addresses if kind == "addr" else numbers
+        if index >= len(slots):
+            raise _Uncacheable(f"template slot {match.group(0)} missing from query")
+        return slots[index]
+    return _PLACEHOLDER_RE.sub(sub, template)
+
+
+def _same_slot_values(text: str, addresses: List[str], numbers: List[str]) -> bool:
+    """True when text has exactly the query's addresses and numbers: none added, none dropped"""
+    found_addresses, found_numbers = set(), set()
+    for match in _SLOT_RE.finditer(text):
+        if match.group("addr"):
+            found_addresses.add(match.group("addr").lower())
+        else:
+            found_numbers.add(Decimal(match.group("num").replace(",", "")))
+    return (found_addresses == {address.lower() for address in addresses}
+            and found_numbers == {Decimal(number) for number in numbers})
+
+
+def _check_uses_every_slot(template: str, addresses: List[str], numbers: List[str]) -> None:
+    """A template that drops one of the query's amounts or addresses would lose it for every query sharing the entry"""
+    used = set(_PLACEHOLDER_RE.findall(template))
+    for kind, slots in (("addr", addresses), ("num", numbers)):
+        for index in range(len(slots)):
+            if (kind, str(index)) not in used:
+                raise _Uncacheable(f"enhanced query drops <{kind}_{index}>")
+
+
+class EnhanceCache:
+    """
+    Cache for /api/query/enhance results, keyed on the canonical form of the query
+    Results are stored as templates over the query's slots (amounts and 0x addresses),
+    so "send 10 usdc to alice" and "Send 25 USDC to  alice" share one entry. Results that
+    contain any amount or address not taken from the query, or whose enhanced query
+    drops one of the query's, are never cached, and every hit is re-checked against the
+    query before it is returned.
+    Tiers:
+    - In-process LRU with a TTL
+    - Optional MongoDB collection with a TTL index (ENHANCE_CACHE_MONGO_ENABLED=true),
+      shared between workers
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        mongo_enabled: Optional[bool] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("ENHANCE_CACHE_MAX_ENTRIES", "5000"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ENHANCE_CACHE_TTL", "86400"))
+        if mongo_enabled is None:
+            mongo_enabled = os.getenv("ENHANCE_CACHE_MONGO_ENABLED", "false").lower() == "true"
+        self.mongo_enabled = mongo_enabled
+        self._mongo_ready = False
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._counters = {
+            "memory_hits": 0, "mongo_hits": 0, "misses": 0,
+            "writes": 0, "uncacheable": 0, "rejected": 0,
+        }
+
+    @staticmethod
+    def make_key(template: str, include_intent: bool) -> str:
+        from services.query_enhancer import ENHANCE_MODEL
+        mode = "intent" if include_intent else "plain"
+        return hashlib.sha256(f"{ENHANCE_MODEL}|{mode}|{template}".encode("utf-8")).hexdigest()
+
+    async def get(self, query: str, include_intent: bool) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result for query
+        Returns: {enhanced_query, extracted_name, intent} with the query's own amounts
+        and addresses filled in, or None
+        """
+        canonical = canonicalize(query)
+        if canonical is None:
+            self._counters["misses"] += 1
+            return None
+        template, addresses, numbers = canonical
+        key = self.make_key(template, include_intent)
+
+        entry = self._get_cached(key)
+        source = "memory_hits"
+        if entry is None and self.mongo_enabled:
+            entry = await self._load_from_mongodb(key)
+            source = "mongo_hits"
+            if entry is not None:
+                self._put(key, entry)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+
+        result = self._fill(entry, addresses, numbers)
+        if result is None:
+            # Never serve a result that disagrees with the query; drop the entry instead
+            self._counters["rejected"] += 1
+            self._cache.pop(key, None)
+            return None
+
+        self._counters[source] += 1
+        return result
+
+    async def put(self, query: str, include_intent: bool, result: Dict[str, Any]) -> bool:
+        """
+        Store a result for query
+        Returns False when the result cannot be expressed in terms of the query's slots
+        """
+        canonical = canonicalize(query)
+        if canonical is None:
+            self._counters["uncacheable"] += 1
+            return False
+        template, addresses, numbers = canonical
+
+        try:
+            entry = self._make_entry(result, addresses, numbers)
+        except _Uncacheable:
+            self._counters["uncacheable"] += 1
+            return False
+
+        key = self.make_key(template, include_intent)
+        self._put(key, entry)
+        self._counters["writes"] += 1
+        if self.mongo_enabled:
+            await self._save_to_mongodb(key, entry)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory tier size"""
+        hits = self._counters["memory_hits"] + self._counters["mongo_hits"]
+        lookups = hits + self._counters["misses"] + self._counters["rejected"]
+        return {
+            **self._counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._cache),
+            "mongo_enabled": self.mongo_enabled,
+        }
+
+    def _make_entry(self, result: Dict[str, Any], addresses: List[str], numbers: List[str]) -> Dict[str, Any]:
+        extracted_name = result.get("extracted_name")
+        enhanced_query = _templatize(result["enhanced_query"], addresses, numbers)
+        _check_uses_every_slot(enhanced_query, addresses, numbers)
+        entry = {
+            "enhanced_query": enhanced_query,
+            "extracted_name": _templatize(extracted_name, addresses, numbers) if extracted_name else None,
+            "intent": None,
+        }
+
+        intent = result.get("intent")
+        if intent is not None:
+            entry["intent"] = {
+                "action": intent.get("action"),
+                "asset": intent.get("asset"),
+                "amount_slot": _slot_for_number(intent["amount"], numbers) if intent.get("amount") is not None else None,
+                "percent_slot": _slot_for_number(intent["percent"], numbers) if intent.get("percent") is not None else None,
+                "destination_slot": _slot_for_address(intent["destination"], addresses) if intent.get("destination") else None,
+            }
+        return entry
+
+    def _fill(self, entry: Dict[str, Any], addresses: List[str], numbers: List[str]) -> Optional[Dict[str, Any]]:
+        try:
+            enhanced_query = _restore(entry["enhanced_query"], addresses, numbers)
+            extracted_name = _restore(entry["extracted_name"], addresses, numbers) if entry.get("extracted_name") else None
+            intent = None
+            if entry.get("intent") is not None:
+                intent = self._fill_intent(entry["intent"], enhanced_query, addresses, numbers)
+        except (_Uncacheable, IndexError, KeyError):
+            return None
+
+        if not _same_slot_values(enhanced_query, addresses, numbers):
+            return None
+        return {"enhanced_query": enhanced_query, "extracted_name": extracted_name, "intent": intent}
+
+    @staticmethod
+    def _fill_intent(
+        template: Dict[str, Any],
+        enhanced_query: str,
+        addresses: List[str],
+        numbers: List[str]
+    ) -> Dict[str, Any]:
+        def number(slot):
+            return float(numbers[slot]) if slot is not None else None
+
+        destination_slot = template.get("destination_slot")
+        return {
+            "action": template.get("action"),
+            "asset": template.get("asset"),
+            "amount": number(template.get("amount_slot")),
+            "percent": number(template.get("percent_slot")),
+            "destination": addresses[destination_slot] if destination_slot is not None else None,
+            # Bound to the text it describes, see AgentRunner.run
+            "raw": enhanced_query,
+        }
+
+    def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._cache.pop(key, None)
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _put(self, key: str, entry: Dict[str, Any]) -> None:
+        self._cache[key] = (entry, time.monotonic() + self.ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _mongodb(self):
+        from services.mongodb_service import MongoDBService
+        mongo = MongoDBService()
+        if not self._mongo_ready:
+            mongo.ensure_enhance_cache_indexes(int(self.ttl))
+            self._mongo_ready = True
+        return mongo
+
+    async def _load_from_mongodb(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            doc = await asyncio.to_thread(lambda: self._mongodb().get_enhance_cache_entry(key))
+        except Exception as e:
+            print(f"⚠️  Enhance cache lookup in MongoDB failed: {e}")
+            return None
+        return doc.get("entry") if doc else None
+
+    async def _save_to_mongodb(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            await asyncio.to_thread(lambda: self._mongodb().save_enhance_cache_entry(key, entry))
+        except Exception as e:
+            print(f"⚠️  Enhance cache write to MongoDB failed: {e}")
+
+
+# Singleton
+_enhance_cache: Optional[EnhanceCache] = None
+
+def get_enhance_cache() -> EnhanceCache:
+    """Get or create query enhancement cache singleton"""
+    global _enhance_cache
+    if _enhance_cache is None:
+        _enhance_cache = EnhanceCache()
+    return _enhance_cache
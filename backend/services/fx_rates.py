@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import time
+import asyncio
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from utils.spoken_numbers import format_amount
+
+DEFAULT_RATES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fx_rates.json")
+
+# A read that finds the table missing or stale refreshes from the source at most this often (seconds)
+READ_REFRESH_INTERVAL = 1.0
+
+# USDC has 6 decimals on-chain
+USDC_QUANTUM = Decimal("0.000001")
+
+# Spoken/written forms per ISO code. Longer aliases win, so "pakistani rupees" beats "rupees".
+CURRENCY_LEXICON: Dict[str, List[str]] = {
+    "USD": ["us dollars", "dollars", "dollar", "bucks", "usd"],
+    "INR": ["indian rupees", "rupees", "rupee", "inr"],
+    "PKR": ["pakistani rupees", "pkr"],
+    "EUR": ["euros", "euro", "eur"],
+    "GBP": ["pounds", "pound", "quid", "gbp"],
+    "AED": ["dirhams", "dirham", "aed"],
+    "SAR": ["riyals", "riyal", "sar"],
+    "CAD": ["canadian dollars", "cad"],
+    "AUD": ["australian dollars", "aud"],
+    "JPY": ["yen", "jpy"],
+}
+
+# Symbols written before the amount ("$20", "₹ 500", "rs. 500")
+CURRENCY_PREFIXES: Dict[str, str] = {
+    "$": "USD",
+    "₹": "INR",
+    "rs.": "INR",
+    "rs": "INR",
+    "€": "EUR",
+    "£": "GBP",
+}
+
+_AMOUNT = r"\d+(?:,\d{3})*(?:\.\d+)?"
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+_ALIAS_TO_CODE = {alias: code for code, aliases in CURRENCY_LEXICON.items() for alias in aliases}
+_CURRENCY_MENTION = re.compile(
+    # The lookahead stops a partial amount match and skips "$20 usdc", which is already in USDC
+    rf"(?:(?<!\w)(?P<prefix>{_alternation(CURRENCY_PREFIXES)})\s?(?P<prefix_amount>{_AMOUNT})(?!\d|[.,]\d|\s*usdc\b)"
+    rf"|\b(?P<amount>{_AMOUNT})\s*(?P<word>{_alternation(_ALIAS_TO_CODE)})\b)",
+    re.IGNORECASE,
+)
+
+
+class FXConversion(BaseModel):
+    source_amount: Decimal
+    source_currency: str     # ISO code, e.g. INR
+    rate: Decimal            # USDC per unit of source_currency
+    usdc_amount: Decimal
+
+
+class CurrencyConversionResult(BaseModel):
+    text: str                            # input with every converted mention rewritten to "<amount> usdc"
+    conversions: List[FXConversion] = []
+
+
+class FileRateSource:
+    """
+    Rate source backed by a local JSON file: {"rates": {"INR": "0.0119", ...}}
+    Stand-in for a live FX feed; any object with the same fetch() can replace it
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("FX_RATES_FILE", DEFAULT_RATES_FILE)
+
+    def fetch(self) -> Dict[str, Decimal]:
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        return {code.upper(): Decimal(str(rate)) for code, rate in data.get("rates", {}).items()}
+
+
+class FXRateTable:
+    """
+    In-process table of USDC conversion rates
+    - refresh() swaps in a new table from the source; on failure the last good table is kept
+    - Rates older than `max_age` seconds are not used, so conversions never run on stale data;
+      a read that finds the table stale refreshes it first (throttled to READ_REFRESH_INTERVAL)
+    """
+
+    def __init__(self, source=None, refresh_interval: Optional[float] = None, max_age: Optional[float] = None):
+        self.source = source or FileRateSource()
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv("FX_REFRESH_INTERVAL", "3600"))
+        self.max_age = max_age if max_age is not None else float(os.getenv("FX_MAX_AGE", "86400"))
+        self._rates: Dict[str, Decimal] = {}
+        self._updated_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+
+    def refresh(self) -> bool:
+        """Reload rates from the source; returns False (keeping the old table) on failure"""
+        self._attempted_at = time.time()
+        try:
+            rates = self.source.fetch()
+        except (OSError, ValueError, InvalidOperation) as e:
+            print(f"⚠️  FX rate refresh failed, keeping previous table: {e}")
+            return False
+        rates = {code: rate for code, rate in rates.items() if rate > 0}
+        if not rates:
+            print("⚠️  FX rate source returned no rates, keeping previous table")
+            return False
+        self._rates = rates
+        self._updated_at = time.time()
+        return True
+
+    async def refresh_forever(self) -> None:
+        """Refresh every refresh_interval seconds (run as a background task after the first refresh())"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"⚠️  FX rate refresh crashed, retrying next interval: {e}")
+
+    def get_rate(self, currency: str) -> Optional[Decimal]:
+        """USDC per unit of currency, or None if unknown or the table is stale"""
+        if self._is_stale() and (self._attempted_at is None or time.time() - self._attempted_at >= READ_REFRESH_INTERVAL):
+            self.refresh()
+        if self._is_stale():
+            return None
+        return self._rates.get(currency.upper())
+
+    def _is_stale(self) -> bool:
+        return self._updated_at is None or time.time() - self._updated_at > self.max_age
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "currencies": sorted(self._rates),
+            "updated_at": self._updated_at,
+            "stale": self._is_stale(),
+        }
+
+
+def convert_currency_mentions(text: str, table: Optional[FXRateTable] = None) -> CurrencyConversionResult:
+    """
+    Rewrite fiat amounts in text to USDC using the local rate table
+    "send 100 rupees to bob" -> "send 1.19 usdc to bob" (with the conversion recorded)
+    Mentions whose currency has no fresh rate are left untouched for the LLM to handle.
+    """
+    table = table or get_fx_rate_table()
+    conversions: List[FXConversion] = []
+
+    def sub(match):
+        if match.group("prefix"):
+            currency = CURRENCY_PREFIXES[match.group("prefix").lower()]
+            amount_text = match.group("prefix_amount")
+        else:
+            currency = _ALIAS_TO_CODE[match.group("word").lower()]
+            amount_text = match.group("amount")
+
+        rate = table.get_rate(currency)
+        if rate is None:
+            return match.group(0)
+
+        source_amount = Decimal(amount_text.replace(",", ""))
+        usdc_amount = (source_amount * rate).quantize(USDC_QUANTUM, rounding=ROUND_HALF_EVEN)
+        conversions.append(FXConversion(
+            source_amount=source_amount,
+            source_currency=currency,
+            rate=rate,
+            usdc_amount=usdc_amount,
+        ))
+        return f"{format_amount(usdc_amount)} usdc"
+
+    converted = _CURRENCY_MENTION.sub(sub, text or "")
+    return CurrencyConversionResult(text=converted, conversions=conversions)
+
+
+def apply_fx_conversion(command, conversions: List[FXConversion]):
+    """
+    Record the conversion behind a ParsedCommand's amount (source amount, currency, rate)
+    Only applied when there was exactly one conversion and it produced command.amount
+    """
+    if len(conversions) != 1 or command.amount is None:
+        return command
+    conversion = conversions[0]
+    if Decimal(str(command.amount)) != conversion.usdc_amount:
+        return command
+    return command.model_copy(update={
+        "source_amount": float(conversion.source_amount),
+        "source_currency": conversion.source_currency,
+        "fx_rate": float(conversion.rate),
+    })
+
+
+# Singleton
+_fx_rate_table: Optional[FXRateTable] = None
+
+def get_fx_rate_table() -> FXRateTable:
+    """Get or create FX rate table singleton"""
+    global _fx_rate_table
+    if _fx_rate_table is None:
+        _fx_rate_table = FXRateTable()
+    return _fx_rate_table
@@ -0,0 +1,360 @@
+import os
+import time
+import random
+import asyncio
+import httpx
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+
+class LLMUnavailableError(Exception):
+    """The circuit breaker is open: the provider has been failing and calls fail fast"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"LLM provider unavailable, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """OpenAI reset headers: "20ms", "1s", "6m0s", "1h2m3.5s" -> seconds"""
+    if not value:
+        return None
+    total, number = 0.0, ""
+    i = 0
+    try:
+        while i < len(value):
+            ch = value[i]
+            if ch.isdigit() or ch == ".":
+                number += ch
+                i += 1
+                continue
+            unit = "ms" if value.startswith("ms", i) else ch
+            total += float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+            number = ""
+            i += len(unit)
+        return total + (float(number) if number else 0.0)
+    except (KeyError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Delay requested by the server (retry-after-ms, or retry-after in seconds or as an HTTP date)"""
+    if headers is None:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+    except ValueError:
+        pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[float], bool]:
+    """
+    Classify an exception from an OpenAI call (directly, or wrapped by the Agents SDK)
+    Returns: (retryable, retry_after seconds or None, provider_failure)
+    provider_failure marks errors that mean the provider is down (timeouts, connection
+    errors, 5xx); only those count towards the circuit breaker.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen and not isinstance(error, openai.OpenAIError):
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    if error is None:
+        return False, None, False
+
+    if isinstance(error, openai.APIConnectionError):
+        # Includes APITimeoutError
+        return True, None, True
+    if isinstance(error, openai.RateLimitError):
+        if getattr(error, "code", None) == "insufficient_quota":
+            return False, None, False
+        return True, retry_after_seconds(error.response.headers), False
+    if isinstance(error, openai.APIStatusError):
+        retry_after = retry_after_seconds(error.response.headers)
+        if error.status_code >= 500:
+            return True, retry_after, True
+        if error.status_code in (408, 409):
+            return True, retry_after, False
+    return False, None, False
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide token bucket in front of every HTTP request the shared LLM client makes
+    (on_request is an httpx hook, so an agent run that makes several requests takes
+    one token per request)
+    - Starts at `requests_per_minute` with bursts of up to `burst` requests
+    - Adapts from response headers: x-ratelimit-limit-requests sets the refill rate,
+      x-ratelimit-remaining-requests caps the tokens on hand, and when nothing is
+      left every caller waits for x-ratelimit-reset-requests
+    - A 429 pauses all callers for its Retry-After and halves the rate; each
+      successful response then restores it gradually (AIMD)
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, burst: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute or float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+        self.burst = burst or int(os.getenv("LLM_BURST", "20"))
+        self._max_rate = self.requests_per_minute / 60
+        self._rate = self._max_rate
+        self._min_rate = self._max_rate / 16
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._counters = {"acquired": 0, "waited": 0, "throttled": 0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        """Wait for a request slot (callers are served in arrival order)"""
+        waited = False
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    waited = True
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                waited = True
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+        self._counters["acquired"] += 1
+        if waited:
+            self._counters["waited"] += 1
+
+    def observe(self, status_code: int, headers) -> None:
+        """Adapt to an OpenAI response"""
+        now = time.monotonic()
+        self._refill(now)
+
+        try:
+            limit = float(headers.get("x-ratelimit-limit-requests") or 0)
+            remaining = headers.get("x-ratelimit-remaining-requests")
+            remaining = float(remaining) if remaining is not None else None
+        except ValueError:
+            limit, remaining = 0, None
+        if limit > 0:
+            self._max_rate = limit / 60
+            self._min_rate = self._max_rate / 16
+            self._rate = min(self._rate, self._max_rate)
+        if remaining is not None:
+            self._tokens = min(self._tokens, remaining)
+            if remaining < 1:
+                self.pause(_parse_duration(headers.get("x-ratelimit-reset-requests")) or 1.0)
+
+        if status_code == 429:
+            self._counters["throttled"] += 1
+            self._rate = max(self._min_rate, self._rate / 2)
+            self._tokens = 0.0
+            self.pause(retry_after_seconds(headers) or 1.0)
+        elif status_code < 400:
+            self._rate = min(self._max_rate, self._rate + self._max_rate / 20)
+
+    async def on_request(self, request: httpx.Request) -> None:
+        """httpx request hook: waits for a slot before the request is sent"""
+        await self.acquire()
+
+    async def on_response(self, response: httpx.Response) -> None:
+        """httpx response hook, sees every LLM response including the Agents SDK's"""
+        self.observe(response.status_code, response.headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "requests_per_minute": round(self._rate * 60, 1),
+            "max_requests_per_minute": round(self._max_rate * 60, 1),
+            "tokens": round(self._tokens, 2),
+            "paused_for": round(max(self._paused_until - time.monotonic(), 0.0), 2),
+        }
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the provider is down
+    - closed: calls go through; `failure_threshold` consecutive provider failures open it
+    - open: calls raise LLMUnavailableError for `reset_timeout` seconds
+    - half_open: one trial call goes through; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+        self.reset_timeout = reset_timeout if reset_timeout is not None else float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        if self.state == "open":
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise LLMUnavailableError(remaining)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                raise LLMUnavailableError(self.reset_timeout)
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"⚠️  LLM circuit breaker opened after {self._failures} provider failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """The call ended without telling us anything about the provider"""
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+    base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    cap = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+async def call_llm(
+    fn: Callable[[], Awaitable[Any]],
+    name: str = "llm",
+    max_attempts: Optional[int] = None
+) -> Any:
+    """
+    Run one LLM call (one or more OpenAI requests) under the shared circuit breaker;
+    each request it makes is paced by the rate limiter on the shared client
+    fn is called once per attempt; retryable errors (429, timeouts, connection errors,
+    5xx) are retried with jittered backoff, anything else is raised immediately.
+    Raises LLMUnavailableError without calling fn while the breaker is open.
+    """
+    max_attempts = max_attempts or int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+    breaker = get_circuit_breaker()
+
+    for attempt in range(max_attempts):
+        breaker.before_call()
+        try:
+            result = await fn()
+        except Exception as e:
+            retryable, retry_after, provider_failure = classify_error(e)
+            if provider_failure:
+                breaker.record_failure()
+            elif retryable:
+                # 429/408/409: the provider is up
+                breaker.record_success()
+            else:
+                breaker.release()
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            delay = backoff_delay(attempt, retry_after)
+            print(f"⚠️  {name}: retryable error on attempt {attempt + 1}/{max_attempts} ({type(e).__name__}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        except BaseException:
+            # Cancelled mid-call
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+def build_openai_client(limiter: Optional[AdaptiveRateLimiter] = None) -> AsyncOpenAI:
+    """
+    Create an AsyncOpenAI client with a keep-alive connection pool whose requests wait
+    on the rate limiter and whose responses feed it. The client only talks to the LLM
+    provider, so every request is limited, whatever OPENAI_BASE_URL points at.
+    SDK-level retries are off: call_llm owns retries.
+    The per-call timeout is applied on each request, not here
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not configured")
+
+    limiter = limiter or get_llm_limiter()
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "50")),
+        max_keepalive_connections=int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    http_client = DefaultAsyncHttpxClient(
+        http2=True,
+        limits=limits,
+        event_hooks={"request": [limiter.on_request], "response": [limiter.on_response]},
+    )
+    return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+
+def llm_stats() -> Dict[str, Any]:
+    return {"limiter": get_llm_limiter().stats(), "circuit_breaker": get_circuit_breaker().stats()}
+
+
+# Singleton
+_llm_limiter: Optional[AdaptiveRateLimiter] = None
+_circuit_breaker: Optional[CircuitBreaker] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
+def get_llm_limiter() -> AdaptiveRateLimiter:
+    """Get or create the process-wide LLM rate limiter"""
+    global _llm_limiter
+    if _llm_limiter is None:
+        _llm_limiter = AdaptiveRateLimiter()
+    return _llm_limiter
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get or create the process-wide LLM circuit breaker"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Get or create the shared AsyncOpenAI client
+    It is also installed as the Agents SDK default client, so agent runs share the
+    connection pool and rate limiter with direct completions
+    """
+    global _openai_client
+    if _openai_client is None:
+        from agents import set_default_openai_client
+        _openai_client = build_openai_client()
+        set_default_openai_client(_openai_client, use_for_tracing=False)
+    return _openai_client
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI connection pool (call on shutdown)"""
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
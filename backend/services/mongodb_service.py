@@ -7,6 +7,7 @@ import base64
 class MongoDBService:
     _instance = None
     _client = None
+    _circle_user_listeners = []
     
     def __new__(cls):
         """Singleton pattern to ensure one MongoDB connection"""
@@ -24,6 +25,8 @@ class MongoDBService:
             self.audio_files = self.db.audio_files
             self.circle_users = self.db.circle_users
             self.contacts = self.db.contacts
+            self.enhance_cache = self.db.enhance_cache
+            self.velocity_counters = self.db.velocity_counters
         else:
             # Reuse existing connection
             self.db = MongoDBService._client.get_database("voicevault")
@@ -32,12 +35,30 @@ class MongoDBService:
             self.audio_files = self.db.audio_files
             self.circle_users = self.db.circle_users
             self.contacts = self.db.contacts
+            self.enhance_cache = self.db.enhance_cache
+            self.velocity_counters = self.db.velocity_counters
     
     @property
     def client(self):
         """Return the MongoDB client"""
         return MongoDBService._client
     
+    @classmethod
+    def add_circle_user_listener(cls, callback):
+        """
+        Register a callback(user_id) invoked after a circle_users document is written
+        Used by in-process caches (e.g. WalletResolver) to invalidate their entries
+        """
+        if callback not in cls._circle_user_listeners:
+            cls._circle_user_listeners.append(callback)
+    
+    def _notify_circle_user_changed(self, user_id: str):
+        for callback in MongoDBService._circle_user_listeners:
+            try:
+                callback(user_id)
+            except Exception as e:
+                print(f"Error notifying circle_users listener: {e}")
+    
     def create_transaction(self, transaction_data: dict):
         """Insert a new transaction"""
         return self.transactions.insert_one(transaction_data)
@@ -46,6 +67,13 @@ class MongoDBService:
         """Get all transactions for a user"""
         return list(self.transactions.find({"user_id": user_id}))
     
+    def get_transactions_since(self, since: datetime, tx_type: str = "transfer"):
+        """Get settled transactions of one type (all users) created at or after since"""
+        return list(self.transactions.find(
+            {"type": tx_type, "created_at": {"$gte": since}, "status": {"$nin": ["pending", "failed"]}},
+            {"_id": 0, "user_id": 1, "value": 1, "created_at": 1}
+        ))
+    
     def update_portfolio(self, user_id: str, portfolio_data: dict):
         """Update user portfolio"""
         return self.portfolios.update_one(
@@ -166,6 +194,7 @@ class MongoDBService:
             {"$set": {**user_doc, "updated_at": datetime.utcnow()}},
             upsert=True
         )
+        self._notify_circle_user_changed(user_id)
         
         # Get the document ID
         if result.upserted_id:
@@ -205,6 +234,7 @@ class MongoDBService:
             {"$set": {**user_doc, "updated_at": datetime.utcnow()}},
             upsert=True
         )
+        self._notify_circle_user_changed(user_id)
         
         # Get the document ID
         if result.upserted_id:
@@ -254,8 +284,42 @@ class MongoDBService:
             {"user_id": user_id},
             {"$set": update_data}
         )
+        self._notify_circle_user_changed(user_id)
         return result.modified_count > 0
     
+    def ensure_enhance_cache_indexes(self, ttl_seconds: int):
+        """
+        Create indexes for the query enhancement cache
+        Entries expire ttl_seconds after created_at (MongoDB TTL index)
+        """
+        self.enhance_cache.create_index("key", unique=True)
+        self.enhance_cache.create_index("created_at", expireAfterSeconds=ttl_seconds)
+    
+    def get_enhance_cache_entry(self, key: str) -> Optional[dict]:
+        """Get a cached query enhancement template by cache key"""
+        return self.enhance_cache.find_one({"key": key})
+    
+    def save_enhance_cache_entry(self, key: str, entry: dict):
+        """Insert or replace a cached query enhancement template"""
+        return self.enhance_cache.update_one(
+            {"key": key},
+            {"$set": {"key": key, "entry": entry, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+    
+    # Velocity counter checkpoints
+    def save_velocity_checkpoint(self, user_id: str, windows: dict, checkpoint_at: float):
+        """Insert or replace a user's rolling spend counters"""
+        return self.velocity_counters.update_one(
+            {"user_id": user_id},
+            {"$set": {"user_id": user_id, "windows": windows, "checkpoint_at": checkpoint_at}},
+            upsert=True
+        )
+    
+    def get_velocity_checkpoints(self) -> list:
+        """Get every user's rolling spend counters"""
+        return list(self.velocity_counters.find({}, {"_id": 0}))
+    
     def add_contact(self, user_id: str, wallet_address: str, name: str) -> str:
         """
         Add a contact for a user
@@ -0,0 +1,142 @@
+import os
+import json
+import asyncio
+import tempfile
+from itertools import combinations
+from typing import Callable, Dict, List, Optional
+
+# Messages returned by wallet endpoints in main.py
+WALLET_MESSAGES = [
+    "Wallet initialized. Complete PIN setup via WebSDK.",
+]
+
+# Longest combination of rejection reasons to pre-synthesize
+MAX_REASON_COMBINATION = 3
+
+
+def _reason_combinations(reasons: List[str], compatible: Callable[[List[str]], bool]) -> List[List[str]]:
+    """
+    Every non-empty combination of reasons that a single check can actually return,
+    in the order the checks append them
+    """
+    result = []
+    for size in range(1, min(len(reasons), MAX_REASON_COMBINATION) + 1):
+        result.extend(list(combo) for combo in combinations(reasons, size) if compatible(list(combo)))
+    return result
+
+
+def collect_phrases() -> List[str]:
+    """
+    Collect every fixed message the backend can hand to TTS, using the same
+    constants and message builders as the code that emits them
+    """
+    from services.agents_runner import RUNNER_MESSAGES, risk_rejection_message, security_rejection_message
+    from agent_definitions.executor import EXECUTOR_MESSAGES
+    from agent_definitions.risk_analyst import RISK_REASONS, risk_reasons_compatible
+    from agent_definitions.security_validator import SECURITY_REASONS, security_reasons_compatible
+
+    phrases = list(RUNNER_MESSAGES) + list(EXECUTOR_MESSAGES) + list(WALLET_MESSAGES)
+    phrases.append(risk_rejection_message([]))
+    phrases.extend(risk_rejection_message(combo) for combo in _reason_combinations(RISK_REASONS, risk_reasons_compatible))
+    phrases.append(security_rejection_message([]))
+    phrases.extend(security_rejection_message(combo) for combo in _reason_combinations(SECURITY_REASONS, security_reasons_compatible))
+
+    # De-duplicate, keep order
+    return list(dict.fromkeys(phrases))
+
+
+def _manifest_path() -> str:
+    return os.getenv(
+        "TTS_WARMUP_MANIFEST",
+        os.path.join(tempfile.gettempdir(), "voicevault_tts_manifest.json")
+    )
+
+
+def _load_manifest(path: str) -> Dict[str, str]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("phrases", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path: str, phrases: Dict[str, str]) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"phrases": phrases}, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️  Could not write TTS warm-up manifest: {e}")
+
+
+async def warm_tts_cache(concurrency: Optional[int] = None) -> Dict[str, int]:
+    """
+    Pre-synthesize the phrase bank into the TTS cache
+
+    Phrases are synthesized in parallel (at most `concurrency` upstream calls at once)
+    with the same default voice settings the /api/elevenlabs/tts endpoint uses, so the
+    cache keys match. A manifest of cache keys already synthesized lets restarts skip them.
+
+    Returns:
+        Counts of {"total", "skipped", "synthesized", "failed"}
+    """
+    from utils.ElevenLabsSDK import get_elevenlabs_client
+
+    if concurrency is None:
+        concurrency = int(os.getenv("TTS_WARMUP_CONCURRENCY", "4"))
+
+    # On Vercel the default cache lives in the instance's temp dir, so every cold
+    # instance would pay to synthesize the whole bank again
+    if os.getenv("VERCEL") and not os.getenv("TTS_CACHE_DIR"):
+        print("⚠️  TTS warm-up skipped, set TTS_CACHE_DIR to a persistent cache directory")
+        return {"total": 0, "skipped": 0, "synthesized": 0, "failed": 0}
+
+    try:
+        client = get_elevenlabs_client()
+    except Exception as e:
+        print(f"⚠️  TTS warm-up skipped, ElevenLabs client unavailable: {e}")
+        return {"total": 0, "skipped": 0, "synthesized": 0, "failed": 0}
+
+    cache = client.tts_cache
+    if cache is None:
+        return {"total": 0, "skipped": 0, "synthesized": 0, "failed": 0}
+
+    manifest_path = _manifest_path()
+    manifest = _load_manifest(manifest_path)
+    voice_id = client.get_default_voice_id()
+
+    todo = []
+    phrases = collect_phrases()
+    for phrase in phrases:
+        key = client.tts_cache_key(phrase, voice_id)
+        # The manifest can outlive evicted cache files, so confirm the entry is still there
+        if key in manifest and cache.contains(key):
+            continue
+        manifest.pop(key, None)
+        todo.append((key, phrase))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def synthesize(key: str, phrase: str) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                await asyncio.to_thread(client.text_to_speech, phrase, voice_id)
+                manifest[key] = phrase
+            except Exception as e:
+                failed += 1
+                print(f"⚠️  TTS warm-up failed for '{phrase}': {e}")
+
+    await asyncio.gather(*(synthesize(key, phrase) for key, phrase in todo))
+    _save_manifest(manifest_path, manifest)
+
+    summary = {
+        "total": len(phrases),
+        "skipped": len(phrases) - len(todo),
+        "synthesized": len(todo) - failed,
+        "failed": failed,
+    }
+    print(f"✅ TTS phrase bank warm-up: {summary}")
+    return summary
@@ -0,0 +1,234 @@
+import os
+import time
+import asyncio
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from models.portfolio import Asset, Portfolio
+from services.price_oracle import PriceOracle, base_symbol, get_price_oracle
+
+
+def build_portfolio(user_id: str, token_balances: List[Dict[str, Any]], prices: PriceOracle) -> Dict[str, Any]:
+    """
+    Value Circle token balances with the price oracle
+    Tokens are grouped by base symbol ("ETH-SEPOLIA" counts as ETH). Tokens without a
+    fresh price are kept at value 0 and listed in `unpriced`.
+    Returns: {portfolio: Portfolio, prices: {symbol: price}, unpriced: [symbol, ...]}
+    """
+    amounts: Dict[str, Decimal] = {}
+    for balance in token_balances:
+        symbol = base_symbol((balance.get("token") or {}).get("symbol"))
+        try:
+            amount = Decimal(str(balance.get("amount") or "0"))
+        except InvalidOperation:
+            continue
+        if symbol and amount > 0:
+            amounts[symbol] = amounts.get(symbol, Decimal(0)) + amount
+
+    values: Dict[str, Decimal] = {}
+    used_prices: Dict[str, float] = {}
+    unpriced: List[str] = []
+    for symbol, amount in amounts.items():
+        price = prices.get_price(symbol)
+        if price is None:
+            unpriced.append(symbol)
+            values[symbol] = Decimal(0)
+            continue
+        used_prices[symbol] = float(price)
+        values[symbol] = amount * price
+
+    total = sum(values.values(), Decimal(0))
+    assets = []
+    for symbol in sorted(amounts, key=lambda s: values[s], reverse=True):
+        percentage = float(values[symbol] / total * 100) if total > 0 else 0.0
+        assets.append(Asset(
+            name=symbol,
+            value=round(float(values[symbol]), 2),
+            amount=float(amounts[symbol]),
+            percentage=round(percentage, 2),
+        ))
+
+    portfolio = Portfolio(
+        user_id=user_id,
+        total_value=round(float(total), 2),
+        assets=assets,
+        allocations={asset.name: asset.percentage for asset in assets},
+    )
+    return {"portfolio": portfolio, "prices": used_prices, "unpriced": unpriced}
+
+
+def risk_inputs(snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Snapshot in the primitive-friendly shape the risk check takes (empty portfolio for None)"""
+    if snapshot is None:
+        return {"total_value_usd": 0.0, "balances": [], "allocations_pct": [], "prices": [], "as_of": None, "stale": True}
+    portfolio = snapshot["portfolio"]
+    return {
+        "total_value_usd": portfolio["total_value"],
+        # balances: [[symbol, amount, usd], ...]
+        "balances": [[asset["name"], asset["amount"], asset["value"]] for asset in portfolio["assets"]],
+        # allocations_pct: [[symbol, percent], ...]
+        "allocations_pct": [[asset["name"], asset["percentage"]] for asset in portfolio["assets"]],
+        # prices: [[symbol, price], ...]
+        "prices": [[symbol, price] for symbol, price in snapshot["prices"].items()],
+        "as_of": snapshot["snapshot_at"],
+        "stale": snapshot.get("stale", False),
+    }
+
+
+class PortfolioService:
+    """
+    Per-user portfolio built from the Circle wallet balance and the price oracle,
+    materialized into the `portfolios` collection
+    Reads are stale-while-revalidate, so risk checks and dashboards rarely wait on Circle:
+    - Snapshot younger than `fresh_ttl`: served as is
+    - Older, but younger than `max_stale`: served (flagged stale) while a background
+      refresh runs
+    - Older than `max_stale`, invalidated, or missing: refreshed before returning
+    Snapshots are looked up in memory, then MongoDB (shared between workers), and
+    concurrent refreshes for one user share a single Circle round trip.
+    """
+
+    def __init__(self, fresh_ttl: Optional[float] = None, max_stale: Optional[float] = None, prices: Optional[PriceOracle] = None):
+        self.fresh_ttl = fresh_ttl if fresh_ttl is not None else float(os.getenv("PORTFOLIO_FRESH_TTL", "30"))
+        self.max_stale = max_stale if max_stale is not None else float(os.getenv("PORTFOLIO_MAX_STALE", "600"))
+        self.prices = prices or get_price_oracle()
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_snapshot(self, user_id: str) -> Dict[str, Any]:
+        """
+        Current snapshot for user_id
+        Returns: {user_id, portfolio (Portfolio dict), prices, unpriced, wallet_id, snapshot_at, stale}
+        """
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None:
+            snapshot = await self._load_from_mongodb(user_id)
+            if snapshot is not None:
+                self._snapshots[user_id] = snapshot
+
+        if snapshot is not None:
+            age = time.time() - snapshot["snapshot_at"]
+            if age < self.fresh_ttl:
+                return {**snapshot, "stale": False}
+            if age < self.max_stale:
+                if user_id not in self._inflight:
+                    self._start_refresh(user_id)
+                return {**snapshot, "stale": True}
+
+        task = self._inflight.get(user_id) or self._start_refresh(user_id)
+        # Shield so one cancelled caller does not cancel the refresh for everyone else
+        snapshot = await asyncio.shield(task)
+        return {**snapshot, "stale": False}
+
+    def invalidate(self, user_id: str) -> None:
+        """Force the next read to refresh (e.g. after a transfer)"""
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is not None:
+            self._snapshots[user_id] = {**snapshot, "snapshot_at": 0.0}
+
+    async def refresh(self, user_id: str) -> Dict[str, Any]:
+        """Rebuild the snapshot from Circle and materialize it"""
+        from services.circle_wallet_service import get_async_circle_service
+        from services.wallet_resolver import get_wallet_resolver
+
+        wallet = await get_wallet_resolver().get_wallet(user_id)
+        token_balances = []
+        if wallet:
+            circle = get_async_circle_service()
+            session = await circle.get_session_token(user_id)
+            balance = await circle.get_wallet_balance(wallet["id"], session["user_token"], include_all=True)
+            token_balances = balance.get("tokenBalances", [])
+
+        built = build_portfolio(user_id, token_balances, self.prices)
+        snapshot = {
+            "user_id": user_id,
+            "portfolio": built["portfolio"].model_dump(),
+            "prices": built["prices"],
+            "unpriced": built["unpriced"],
+            "wallet_id": wallet["id"] if wallet else None,
+            "snapshot_at": time.time(),
+        }
+        self._snapshots[user_id] = snapshot
+        await self._save_to_mongodb(user_id, snapshot)
+        return snapshot
+
+    def _start_refresh(self, user_id: str) -> asyncio.Task:
+        task = asyncio.ensure_future(self.refresh(user_id))
+        self._inflight[user_id] = task
+        task.add_done_callback(lambda t: self._on_refresh_done(user_id, t))
+        return task
+
+    def _on_refresh_done(self, user_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(user_id) is task:
+            self._inflight.pop(user_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Background refreshes have no awaiting caller; log so failures are visible
+            print(f"⚠️  Portfolio refresh failed for {user_id}: {task.exception()}")
+
+    async def _load_from_mongodb(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            from services.mongodb_service import MongoDBService
+            doc = await asyncio.to_thread(MongoDBService().get_portfolio, user_id)
+        except Exception as e:
+            print(f"⚠️  Portfolio lookup in MongoDB failed: {e}")
+            return None
+        # Documents written before snapshots were materialized have no snapshot_at
+        if not doc or "snapshot_at" not in doc:
+            return None
+        return {
+            "user_id": user_id,
+            "portfolio": Portfolio(
+                user_id=user_id,
+                total_value=doc["total_value"],
+                assets=doc["assets"],
+                allocations=doc["allocations"],
+            ).model_dump(),
+            "prices": doc.get("prices", {}),
+            "unpriced": doc.get("unpriced", []),
+            "wallet_id": doc.get("wallet_id"),
+            "snapshot_at": doc["snapshot_at"],
+        }
+
+    async def _save_to_mongodb(self, user_id: str, snapshot: Dict[str, Any]) -> None:
+        portfolio = snapshot["portfolio"]
+        data = {
+            "total_value": portfolio["total_value"],
+            "assets": portfolio["assets"],
+            "allocations": portfolio["allocations"],
+            "prices": snapshot["prices"],
+            "unpriced": snapshot["unpriced"],
+            "wallet_id": snapshot["wallet_id"],
+            "snapshot_at": snapshot["snapshot_at"],
+        }
+        try:
+            from services.mongodb_service import MongoDBService
+            await asyncio.to_thread(MongoDBService().update_portfolio, user_id, data)
+        except Exception as e:
+            print(f"⚠️  Portfolio write to MongoDB failed: {e}")
+
+
+# Singleton
+_portfolio_service: Optional[PortfolioService] = None
+
+def get_portfolio_service() -> PortfolioService:
+    """Get or create portfolio service singleton"""
+    global _portfolio_service
+    if _portfolio_service is None:
+        _portfolio_service = PortfolioService()
+    return _portfolio_service
+
+async def get_portfolio_data(user_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Portfolio for the risk stage
+    Falls back to DEFAULT_USER_ID like the executor; without a user the portfolio is empty,
+    so amount-based risk rules fail closed
+    """
+    user_id = user_id or os.getenv("DEFAULT_USER_ID")
+    if not user_id:
+        return risk_inputs(None)
+    return risk_inputs(await get_portfolio_service().get_snapshot(user_id))
+
+def invalidate_portfolio(user_id: Optional[str]) -> None:
+    user_id = user_id or os.getenv("DEFAULT_USER_ID")
+    if user_id:
+        get_portfolio_service().invalidate(user_id)
@@ -0,0 +1,147 @@
+import os
+import csv
+import json
+import time
+import asyncio
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_PRICES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "prices.json")
+
+# A read that finds a missing or stale quote refreshes from the source at most this often (seconds)
+READ_REFRESH_INTERVAL = 1.0
+
+
+def base_symbol(symbol: str) -> str:
+    """Circle testnet symbols carry the chain: "ETH-SEPOLIA" -> "ETH" """
+    return (symbol or "").split("-")[0].upper()
+
+
+class PriceQuote(NamedTuple):
+    symbol: str
+    price: Decimal         # USD per unit
+    updated_at: float      # epoch seconds
+    expires_at: float
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) >= self.expires_at
+
+
+class FilePriceSource:
+    """
+    Price source backed by a local file; stand-in for a live price feed. Any object with
+    the same fetch() can replace it.
+    - JSON: {"prices": {"ETH": "3000", ...}, "ttl": {"USDC": 86400}}
+    - CSV:  symbol,price[,ttl] with a header row
+    fetch() returns {symbol: (price, ttl seconds or None for the oracle default)}
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PRICES_FILE", DEFAULT_PRICES_FILE)
+
+    def fetch(self) -> Dict[str, Tuple[Decimal, Optional[float]]]:
+        if self.path.lower().endswith(".csv"):
+            return self._fetch_csv()
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        ttls = {symbol.upper(): float(ttl) for symbol, ttl in data.get("ttl", {}).items()}
+        return {
+            symbol.upper(): (Decimal(str(price)), ttls.get(symbol.upper()))
+            for symbol, price in data.get("prices", {}).items()
+        }
+
+    def _fetch_csv(self) -> Dict[str, Tuple[Decimal, Optional[float]]]:
+        prices = {}
+        with open(self.path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                ttl = (row.get("ttl") or "").strip()
+                prices[row["symbol"].strip().upper()] = (Decimal(row["price"].strip()), float(ttl) if ttl else None)
+        return prices
+
+
+class PriceOracle:
+    """
+    In-process USD price table indexed by symbol
+    - Each quote has its own TTL (per-symbol from the source, else `ttl`), so a feed that
+      stops quoting one asset only makes that asset stale
+    - refresh() upserts every quote the source returns; on failure the existing quotes
+      are kept and age out on their own
+    - Lookups are a single dict access; a missing or stale quote first triggers a refresh
+      (throttled to READ_REFRESH_INTERVAL), and quotes still stale after it are flagged,
+      never silently served by get_price()
+    """
+
+    def __init__(self, source=None, ttl: Optional[float] = None, refresh_interval: Optional[float] = None):
+        self.source = source or FilePriceSource()
+        self.ttl = ttl if ttl is not None else float(os.getenv("PRICE_TTL", "300"))
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv("PRICE_REFRESH_INTERVAL", "60"))
+        self._quotes: Dict[str, PriceQuote] = {}
+        self._attempted_at: Optional[float] = None
+
+    def refresh(self) -> bool:
+        """Load quotes from the source; returns False (keeping existing quotes) on failure"""
+        self._attempted_at = time.time()
+        try:
+            fetched = self.source.fetch()
+        except (OSError, ValueError, KeyError, InvalidOperation) as e:
+            print(f"⚠️  Price refresh failed, keeping previous quotes: {e}")
+            return False
+        now = time.time()
+        for symbol, (price, ttl) in fetched.items():
+            if price < 0:
+                continue
+            self._quotes[symbol] = PriceQuote(symbol, price, now, now + (ttl if ttl is not None else self.ttl))
+        return True
+
+    async def refresh_forever(self) -> None:
+        """Refresh every refresh_interval seconds (run as a background task after the first refresh())"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"⚠️  Price refresh crashed, retrying next interval: {e}")
+
+    def get_quote(self, symbol: str) -> Optional[PriceQuote]:
+        """Quote for symbol (possibly stale, check is_stale()), or None if never quoted"""
+        symbol = base_symbol(symbol)
+        quote = self._quotes.get(symbol)
+        now = time.time()
+        if (quote is None or quote.is_stale(now)) and (
+            self._attempted_at is None or now - self._attempted_at >= READ_REFRESH_INTERVAL
+        ):
+            self.refresh()
+            quote = self._quotes.get(symbol)
+        return quote
+
+    def get_price(self, symbol: str) -> Optional[Decimal]:
+        """USD price of one unit of symbol, or None if unknown or stale"""
+        quote = self.get_quote(symbol)
+        if quote is None or quote.is_stale():
+            return None
+        return quote.price
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "quotes": {
+                symbol: {
+                    "price": float(quote.price),
+                    "age_seconds": round(now - quote.updated_at, 1),
+                    "stale": quote.is_stale(now),
+                }
+                for symbol, quote in sorted(self._quotes.items())
+            },
+            "stale": sorted(symbol for symbol, quote in self._quotes.items() if quote.is_stale(now)),
+        }
+
+
+# Singleton
+_price_oracle: Optional[PriceOracle] = None
+
+def get_price_oracle() -> PriceOracle:
+    """Get or create price oracle singleton"""
+    global _price_oracle
+    if _price_oracle is None:
+        _price_oracle = PriceOracle()
+    return _price_oracle
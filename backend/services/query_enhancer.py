@@ -0,0 +1,274 @@
+import os
+import re
+import asyncio
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from openai import AsyncOpenAI
+from agent_definitions.planner import ParsedCommand
+from services.llm_client import call_llm, get_openai_client
+
+ENHANCE_MODEL = "gpt-4o-mini"  # Using mini for faster/cheaper responses
+
+NORMALIZE_SYSTEM_PROMPT = "You are a query normalizer. Always respond with only the normalized query, nothing else."
+
+NORMALIZE_PROMPT = """You are a query normalizer for cryptocurrency transactions. Your task is to normalize user queries into a standard format.
+
+Standard format: "send [amount] usdc to [wallet_address]"
+
+Rules:
+1. Write USDC, USD and dollar amounts as usdc; other currencies have already been converted where a rate is known, so never relabel an amount in another currency as usdc
+2. Extract wallet addresses (they start with 0x and are 42 characters long)
+3. Always use the format: "send [amount] usdc to [wallet_address]"
+4. If no wallet address is found, keep the recipient name in place of the address
+5. Preserve the exact amount mentioned by the user
+6. Keep it simple and direct
+
+Examples:
+- "transfer 50 dollars to 0xabcd..." → "send 50 usdc to 0xabcd..."
+- "send 25 usdc to 0x5678..." → "send 25 usdc to 0x5678..."
+- "100 usdc to john" → "send 100 usdc to john" (if no address, keep name)
+
+User query: {query}
+
+Normalized query:"""
+
+WALLET_ADDRESS_PATTERN = r"0x[a-fA-F0-9]{40}"
+
+# Transfers already in (or one verb away from) the standard format, e.g. after FX conversion:
+#   "send 1.19 usdc to bob" | "5 usdc to 0x..."
+# The recipient must be an address or a single name; anything longer ("ali khan",
+# "bob tomorrow", "my brother") goes to the LLM
+_LOCAL_TRANSFER = re.compile(
+    r"^(?:please\s+)?(?:(?:send|transfer|pay)\s+)?(\d+(?:\.\d+)?)\s*usdc\s+to\s+"
+    r"(0x[a-fA-F0-9]{40}|[a-z][a-z'-]*)$",
+    re.IGNORECASE,
+)
+# Single words after "to" that are not a contact name
+_NOT_RECIPIENT_NAMES = {"usdc", "me", "myself", "him", "her", "them", "us"}
+
+COMBINED_SYSTEM_PROMPT = """You are a query normalizer and command parser for cryptocurrency transactions.
+For the user's query, return in one response:
+1. enhanced_query: the query normalized to the standard format "send [amount] usdc to [wallet_address]"
+2. extracted_name: the recipient name if the recipient is a name instead of a 0x wallet address, otherwise null
+3. intent: the structured command parsed from enhanced_query
+
+Normalization rules:
+- Write USDC, USD and dollar amounts as usdc; never relabel an amount in another currency as usdc, keep its currency name
+- Wallet addresses start with 0x and are 42 characters long; copy them exactly
+- If no wallet address is found, keep the recipient name in place of the address
+- Preserve the exact amount mentioned by the user
+- Keep it simple and direct
+
+Intent rules:
+- action is one of "transfer", "buy", "sell" ("send" means "transfer")
+- asset is one of "USDC", "ETH", "BTC"
+- amount is the numeric amount, percent is the numeric percentage (0-100) when the user gives one
+- destination is the 0x wallet address, or null when only a name was given
+- Use null for anything the query does not state
+
+Examples:
+- "transfer 100 dollars to 0x1234..." -> enhanced_query "send 100 usdc to 0x1234...", intent {action: "transfer", asset: "USDC", amount: 100, destination: "0x1234..."}
+- "100 usdc to john" -> enhanced_query "send 100 usdc to john", extracted_name "john", intent {action: "transfer", asset: "USDC", amount: 100, destination: null}"""
+
+
+class EnhancedCommand(BaseModel):
+    enhanced_query: str
+    extracted_name: Optional[str]
+    intent: ParsedCommand
+
+
+def _normalize_intent(intent: ParsedCommand, enhanced_query: str) -> ParsedCommand:
+    """Bring LLM output in line with the planner's conventions"""
+    action = (intent.action or "").lower() or None
+    if action == "send":
+        action = "transfer"
+    return ParsedCommand(
+        action=action,
+        asset=intent.asset.upper() if intent.asset else None,
+        amount=intent.amount,
+        percent=intent.percent,
+        destination=intent.destination,
+        # The intent is only valid for this exact text; AgentRunner checks it before skipping the planner
+        raw=enhanced_query,
+    )
+
+
+def extract_recipient_name(enhanced_query: str) -> Optional[str]:
+    """Name after "to" in a normalized query, or None when the recipient is a wallet address"""
+    # Pattern: "send X usdc to [name]" where name is not a wallet address
+    if re.search(WALLET_ADDRESS_PATTERN, enhanced_query.lower()):
+        return None
+    match = re.search(r"to\s+([^\s]+(?:\s+[^\s]+)*)", enhanced_query, re.IGNORECASE)
+    if not match:
+        return None
+    potential_name = match.group(1).strip()
+    # If it's not a number and not "usdc", it's likely a name
+    if potential_name.replace(".", "").replace(",", "").isdigit() or potential_name.lower() == "usdc":
+        return None
+    return potential_name
+
+
+def local_enhance(query: str) -> Optional[EnhancedCommand]:
+    """Normalize simple USDC transfers without an LLM call; None when the query needs the LLM"""
+    text = re.sub(r"\s+", " ", re.sub(r"[\s.!?]+$", "", (query or "").strip()))
+    match = _LOCAL_TRANSFER.match(text)
+    if not match:
+        return None
+
+    amount, recipient = match.group(1), match.group(2)
+    if recipient.lower() in _NOT_RECIPIENT_NAMES:
+        return None
+    is_address = re.fullmatch(WALLET_ADDRESS_PATTERN, recipient) is not None
+    enhanced_query = f"send {amount} usdc to {recipient}"
+    return EnhancedCommand(
+        enhanced_query=enhanced_query,
+        extracted_name=None if is_address else recipient,
+        intent=ParsedCommand(
+            action="transfer",
+            asset="USDC",
+            amount=float(amount),
+            destination=recipient if is_address else None,
+            raw=enhanced_query,
+        ),
+    )
+
+
+class QueryEnhancer:
+    """
+    Query normalization for /api/query/enhance on the process-wide AsyncOpenAI client
+    - Connections are pooled and reused across requests
+    - At most `max_concurrency` completions are in flight; extra callers wait for a slot
+    - Each attempt is bounded by `timeout` seconds; rate limiting, retries and the
+      circuit breaker are shared with the planner (see call_llm)
+    - The client is only created on first LLM use, so the local (no-LLM) path works
+      without OPENAI_API_KEY
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self._client = client
+        self.max_concurrency = max_concurrency or int(os.getenv("ENHANCE_MAX_CONCURRENCY", "16"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("ENHANCE_TIMEOUT", "15"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = get_openai_client()
+        return self._client
+
+    async def enhance(self, query: str) -> str:
+        """Normalize a query to "send [amount] usdc to [recipient]" """
+        async with self._semaphore:
+            response = await call_llm(lambda: self.client.chat.completions.create(
+                model=ENHANCE_MODEL,
+                messages=[
+                    {"role": "system", "content": NORMALIZE_SYSTEM_PROMPT},
+                    {"role": "user", "content": NORMALIZE_PROMPT.format(query=query)}
+                ],
+                temperature=0.1,  # Low temperature for consistent formatting
+                max_tokens=100,
+                timeout=self.timeout
+            ), name="enhance_query")
+        return response.choices[0].message.content.strip()
+
+    async def enhance_and_parse(self, query: str) -> EnhancedCommand:
+        """
+        Normalize a query and extract its ParsedCommand in a single structured-output call
+
+        Args:
+            query: Raw user query (transcript)
+
+        Returns:
+            EnhancedCommand with enhanced_query, extracted_name and intent
+        """
+        async with self._semaphore:
+            completion = await call_llm(lambda: self.client.chat.completions.parse(
+                model=ENHANCE_MODEL,
+                messages=[
+                    {"role": "system", "content": COMBINED_SYSTEM_PROMPT},
+                    {"role": "user", "content": query}
+                ],
+                response_format=EnhancedCommand,
+                temperature=0.1,
+                max_tokens=200,
+                timeout=self.timeout
+            ), name="enhance_query")
+
+        message = completion.choices[0].message
+        if message.parsed is None:
+            raise ValueError(f"Query could not be parsed: {message.refusal or 'empty response'}")
+
+        result = message.parsed
+        enhanced_query = result.enhanced_query.strip()
+        return EnhancedCommand(
+            enhanced_query=enhanced_query,
+            extracted_name=result.extracted_name or None,
+            intent=_normalize_intent(result.intent, enhanced_query),
+        )
+
+    async def run(self, query: str, include_intent: bool = False) -> Dict[str, Any]:
+        """
+        Full /api/query/enhance pipeline
+        1. Spelled-out amounts become numerals, then fiat amounts are converted to USDC
+           with the local FX table
+        2. Simple transfers are normalized locally
+        3. Otherwise the result cache, then the LLM (plain or with intent extraction)
+
+        Returns:
+            {enhanced_query, extracted_name, intent, fx_conversions}
+        """
+        from services.enhance_cache import get_enhance_cache
+        from services.fx_rates import convert_currency_mentions, apply_fx_conversion
+        from utils.spoken_numbers import normalize_spoken_amounts
+
+        fx = convert_currency_mentions(normalize_spoken_amounts(query))
+        text = fx.text
+
+        local = local_enhance(text)
+        if local is not None:
+            result = {
+                "enhanced_query": local.enhanced_query,
+                "extracted_name": local.extracted_name,
+                "intent": local.intent.model_dump() if include_intent else None,
+            }
+        else:
+            cache = get_enhance_cache()
+            result = await cache.get(text, include_intent)
+            if result is None:
+                if include_intent:
+                    # Normalization, name extraction and intent extraction in one structured-output call
+                    parsed = await self.enhance_and_parse(text)
+                    result = {
+                        "enhanced_query": parsed.enhanced_query,
+                        "extracted_name": parsed.extracted_name,
+                        "intent": parsed.intent.model_dump(),
+                    }
+                else:
+                    enhanced_query = await self.enhance(text)
+                    result = {
+                        "enhanced_query": enhanced_query,
+                        "extracted_name": extract_recipient_name(enhanced_query),
+                        "intent": None,
+                    }
+                await cache.put(text, include_intent, result)
+
+        if result["intent"] is not None and fx.conversions:
+            result["intent"] = apply_fx_conversion(ParsedCommand(**result["intent"]), fx.conversions).model_dump()
+        result["fx_conversions"] = [conversion.model_dump(mode="json") for conversion in fx.conversions] or None
+        return result
+
+
+# Singleton
+_query_enhancer: Optional[QueryEnhancer] = None
+
+def get_query_enhancer() -> QueryEnhancer:
+    """Get or create query enhancer singleton"""
+    global _query_enhancer
+    if _query_enhancer is None:
+        _query_enhancer = QueryEnhancer()
+    return _query_enhancer
@@ -0,0 +1,297 @@
+import os
+import json
+import operator
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "risk_rules.json")
+
+# op -> (scalar comparison, array comparison); NaN compares False, so missing values never violate
+_OPERATORS = {
+    ">": (operator.gt, np.greater),
+    ">=": (operator.ge, np.greater_equal),
+    "<": (operator.lt, np.less),
+    "<=": (operator.le, np.less_equal),
+}
+_METRICS = ("percent", "usd_value")
+
+
+class CompiledRule(NamedTuple):
+    name: str
+    reason: str                   # template; {limit} is the resolved limit, e.g. "Transfer exceeds your ${limit} limit"
+    metric: str                   # "percent" or "usd_value"
+    op: str
+    param: int                    # column of the limit in the plan's limit table
+    of_portfolio: bool            # limit is a percentage of the portfolio total
+    actions: Optional[frozenset]  # None applies to every action
+
+
+class RiskBatchResult:
+    """
+    Verdicts for a batch of intents
+    - approved: bool array, one per intent
+    - violations: bool matrix (intents x rules), in rule order
+    - usd_values: amount * price per intent (NaN when either is missing)
+    """
+
+    def __init__(
+        self,
+        approved: np.ndarray,
+        violations: np.ndarray,
+        usd_values: np.ndarray,
+        reasons: List[List[str]],
+        reason_rows: np.ndarray
+    ):
+        """reasons: rule reasons per limit row; reason_rows: the limit row of each intent"""
+        self.approved = approved
+        self.violations = violations
+        self.usd_values = usd_values
+        self._reasons = reasons
+        self._reason_rows = reason_rows
+
+    def __len__(self) -> int:
+        return len(self.approved)
+
+    def reasons(self, index: int) -> List[str]:
+        row = self._reasons[int(self._reason_rows[index])]
+        return [row[r] for r in np.flatnonzero(self.violations[index])]
+
+    def reason_lists(self) -> List[List[str]]:
+        """Reasons for every intent; each distinct (limit row, violations) combination is built once"""
+        rules = self.violations.shape[1]
+        if not rules:
+            return [[] for _ in range(len(self))]
+        masks = self.violations.astype(np.int64) @ (np.int64(1) << np.arange(rules, dtype=np.int64))
+        unique, inverse = np.unique(self._reason_rows.astype(np.int64) << rules | masks, return_inverse=True)
+        combos = []
+        for key in unique.tolist():
+            row, mask = self._reasons[key >> rules], key & ((1 << rules) - 1)
+            combos.append([reason for r, reason in enumerate(row) if mask >> r & 1])
+        return [list(combos[i]) for i in inverse.tolist()]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {"approved": approved, "reasons": reasons}
+            for approved, reasons in zip(self.approved.tolist(), self.reason_lists())
+        ]
+
+
+class RiskRuleEngine:
+    """
+    Threshold rules declared in config (data/risk_rules.json), compiled once
+    - Limits are resolved for every (tier, asset) pair up front into a
+      tiers x assets x limits table; assets without overrides share an "other" column
+    - Rules become (metric, comparison, limit column) triples checked in declaration order
+    - Reasons are templates: {limit} is filled with the pair's resolved limit up front
+    evaluate() checks one intent with plain Python; evaluate_batch() checks many at once
+    with NumPy array operations over amounts, prices and portfolio totals.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        defaults = config.get("defaults") or {}
+        tiers = config.get("tiers") or {}
+        assets = config.get("assets") or {}
+
+        self.default_tier = config.get("default_tier") or "standard"
+        self.user_tiers: Dict[str, str] = dict(config.get("user_tiers") or {})
+        self.tiers = sorted(set(tiers) | {self.default_tier})
+        asset_names = set(assets)
+        for tier in tiers.values():
+            asset_names |= set((tier or {}).get("assets") or {})
+        self.assets = sorted(name.upper() for name in asset_names)
+        self.params = sorted(defaults)
+
+        self._tier_index = {tier: i for i, tier in enumerate(self.tiers)}
+        # Last column is every asset without an override
+        self._asset_index = {asset: i for i, asset in enumerate(self.assets)}
+        self._other_asset = len(self.assets)
+
+        param_index = {param: i for i, param in enumerate(self.params)}
+        self._limits = np.empty((len(self.tiers), len(self.assets) + 1, len(self.params)), dtype=float)
+        for t, tier in enumerate(self.tiers):
+            tier_config = tiers.get(tier) or {}
+            for a, asset in enumerate(self.assets + [None]):
+                resolved = dict(defaults)
+                if asset is not None:
+                    resolved.update(_overrides(assets, asset))
+                resolved.update({k: v for k, v in tier_config.items() if k != "assets"})
+                if asset is not None:
+                    resolved.update(_overrides(tier_config.get("assets") or {}, asset))
+                for param, value in resolved.items():
+                    if param not in param_index:
+                        raise ValueError(f"Unknown risk limit {param} (declare it in defaults)")
+                    self._limits[t, a, param_index[param]] = float(value)
+        # Tuples for the single-intent path, which is faster without NumPy
+        self._scalar_limits = {
+            (t, a): tuple(self._limits[t, a].tolist())
+            for t in range(len(self.tiers)) for a in range(len(self.assets) + 1)
+        }
+
+        self.rules: List[CompiledRule] = []
+        for rule in config.get("rules") or []:
+            if rule.get("metric") not in _METRICS:
+                raise ValueError(f"Risk rule {rule.get('name')}: metric must be one of {_METRICS}")
+            if rule.get("op") not in _OPERATORS:
+                raise ValueError(f"Risk rule {rule.get('name')}: unsupported op {rule.get('op')}")
+            if rule.get("limit") not in param_index:
+                raise ValueError(f"Risk rule {rule.get('name')}: unknown limit {rule.get('limit')}")
+            actions = rule.get("actions")
+            self.rules.append(CompiledRule(
+                name=rule["name"],
+                reason=rule["reason"],
+                metric=rule["metric"],
+                op=rule["op"],
+                param=param_index[rule["limit"]],
+                of_portfolio=rule.get("of") == "portfolio_total",
+                actions=frozenset(action.lower() for action in actions) if actions else None,
+            ))
+
+        # Rule reasons per limit row (tier x asset, flattened), with the limit filled in
+        self._rule_reasons: List[List[str]] = []
+        self._reason_scopes: Dict[str, set] = {}   # reason -> limit rows that produce it
+        self._reason_rule: Dict[str, CompiledRule] = {}
+        for t in range(len(self.tiers)):
+            for a in range(len(self.assets) + 1):
+                row = len(self._rule_reasons)
+                limits = self._scalar_limits[(t, a)]
+                reasons = []
+                for rule in self.rules:
+                    try:
+                        reason = rule.reason.format(limit=_format_limit(limits[rule.param]))
+                    except (KeyError, IndexError, ValueError) as e:
+                        raise ValueError(f"Risk rule {rule.name}: bad reason template ({e})")
+                    reasons.append(reason)
+                    self._reason_scopes.setdefault(reason, set()).add(row)
+                    self._reason_rule[reason] = rule
+                self._rule_reasons.append(reasons)
+
+    @property
+    def reasons(self) -> List[str]:
+        """Every rejection reason the rules can produce (for any tier and asset), in rule order"""
+        by_rule = {rule.name: [] for rule in self.rules}
+        for reason, rule in self._reason_rule.items():
+            by_rule[rule.name].append(reason)
+        return [reason for reasons in by_rule.values() for reason in reasons]
+
+    def rule_for(self, reason: str) -> Optional[CompiledRule]:
+        """Rule that produced a rejection reason (None for reasons from elsewhere)"""
+        return self._reason_rule.get(reason)
+
+    def reason_scope(self, reason: str) -> frozenset:
+        """Limit rows (tier x asset pairs) whose limits produce this reason text"""
+        return frozenset(self._reason_scopes.get(reason, ()))
+
+    def _row(self, tier: str, asset: Optional[str]) -> Tuple[int, int]:
+        return (self._tier_index.get(tier, self._tier_index[self.default_tier]),
+                self._asset_index.get((asset or "").upper(), self._other_asset))
+
+    def tier_for(self, user_id: Optional[str]) -> str:
+        return self.user_tiers.get(user_id or "", self.default_tier)
+
+    def limits_for(self, tier: str, asset: Optional[str]) -> Dict[str, float]:
+        """Resolved limits for one (tier, asset) pair"""
+        return dict(zip(self.params, self._scalar_limits[self._row(tier, asset)]))
+
+    def evaluate(
+        self,
+        action: Optional[str],
+        asset: Optional[str],
+        tier: str,
+        percent: Optional[float],
+        usd_value: Optional[float],
+        portfolio_total: float
+    ) -> List[str]:
+        """Reasons the intent violates, in rule order (empty when approved)"""
+        t, a = self._row(tier, asset)
+        limits = self._scalar_limits[(t, a)]
+        rule_reasons = self._rule_reasons[t * (len(self.assets) + 1) + a]
+        action = (action or "").lower()
+        reasons = []
+        for rule, reason in zip(self.rules, rule_reasons):
+            if rule.actions is not None and action not in rule.actions:
+                continue
+            value = percent if rule.metric == "percent" else usd_value
+            if value is None:
+                continue
+            threshold = limits[rule.param]
+            if rule.of_portfolio:
+                threshold = threshold / 100 * float(portfolio_total or 0.0)
+            if _OPERATORS[rule.op][0](value, threshold):
+                reasons.append(reason)
+        return reasons
+
+    def evaluate_batch(
+        self,
+        actions: Sequence[Optional[str]],
+        assets: Sequence[Optional[str]],
+        tiers: Sequence[str],
+        percents: Sequence[Optional[float]],
+        amounts: Sequence[Optional[float]],
+        prices: Sequence[Optional[float]],
+        portfolio_totals: Sequence[float]
+    ) -> RiskBatchResult:
+        """
+        Evaluate many intents at once
+        All sequences have one entry per intent; None (or NaN) percents, amounts or
+        prices skip the rules that need them, like evaluate().
+        """
+        n = len(actions)
+        actions_arr = np.array([(action or "").lower() for action in actions], dtype=object)
+        tier_idx = self._lookup(tiers, self._tier_index, self._tier_index[self.default_tier])
+        asset_idx = self._lookup([(asset or "").upper() for asset in assets], self._asset_index, self._other_asset)
+        limits = self._limits[tier_idx, asset_idx]            # intents x limits
+
+        percents_arr = np.array(percents, dtype=float)        # None -> NaN
+        usd = np.array(amounts, dtype=float) * np.array(prices, dtype=float)
+        totals = np.nan_to_num(np.array(portfolio_totals, dtype=float))
+
+        violations = np.zeros((n, len(self.rules)), dtype=bool)
+        for r, rule in enumerate(self.rules):
+            values = percents_arr if rule.metric == "percent" else usd
+            threshold = limits[:, rule.param]
+            if rule.of_portfolio:
+                threshold = threshold / 100 * totals
+            hit = _OPERATORS[rule.op][1](values, threshold)
+            if rule.actions is not None:
+                hit &= np.isin(actions_arr, list(rule.actions))
+            violations[:, r] = hit
+
+        rows = tier_idx * (len(self.assets) + 1) + asset_idx
+        return RiskBatchResult(~violations.any(axis=1), violations, usd, self._rule_reasons, rows)
+
+    @staticmethod
+    def _lookup(values: Sequence[str], index: Dict[str, int], default: int) -> np.ndarray:
+        """Map labels to table indices, looking each distinct label up once"""
+        if len(values) == 0:
+            return np.zeros(0, dtype=int)
+        unique, inverse = np.unique(np.array(values, dtype=str), return_inverse=True)
+        return np.array([index.get(value, default) for value in unique], dtype=int)[inverse]
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "RiskRuleEngine":
+        with open(path or os.getenv("RISK_RULES_FILE", DEFAULT_RULES_FILE), "r") as f:
+            return cls(json.load(f))
+
+
+def _format_limit(value: float) -> str:
+    """5000.0 -> "5,000", 12.5 -> "12.5" """
+    return f"{value:,.0f}" if value == int(value) else f"{value:,.2f}".rstrip("0")
+
+
+def _overrides(table: Dict[str, Any], asset: str) -> Dict[str, Any]:
+    for name, values in table.items():
+        if name.upper() == asset:
+            return values or {}
+    return {}
+
+
+# Singleton
+_risk_engine: Optional[RiskRuleEngine] = None
+
+def get_risk_engine() -> RiskRuleEngine:
+    """Get or create the compiled risk rule engine"""
+    global _risk_engine
+    if _risk_engine is None:
+        _risk_engine = RiskRuleEngine.from_file()
+    return _risk_engine
@@ -0,0 +1,197 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+class StageHalt(Exception):
+    """
+    Raised by a stage to end the pipeline early with `payload` as the response
+    (a rejection, or an early result such as "pending PIN confirmation")
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        super().__init__(payload.get("message") if isinstance(payload, dict) else str(payload))
+        self.payload = payload
+
+
+class StageTimeout(Exception):
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"{name} stage timed out after {timeout:g}s")
+
+
+class Stage:
+    """
+    One node of a StageDAG
+    - fn(context, results) is awaited once every stage in `deps` has a result;
+      `results` maps finished stage names to their return values
+    - needs(results): extra dependencies chosen once `deps` have finished, from their
+      results (e.g. only buy/sell orders need the portfolio)
+    - on_demand: the stage starts right away, but the run only waits for it, or ends on
+      its failure, once some stage's needs() asks for it; otherwise it is cancelled when
+      everything else is done. An on-demand stage cannot appear in another stage's deps.
+    - timeout: seconds before the stage is cancelled and reported through on_error
+    - on_error(exc) turns an unexpected exception into the pipeline's response
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]],
+        deps: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        on_error: Optional[Callable[[Exception], Dict[str, Any]]] = None,
+        needs: Optional[Callable[[Dict[str, Any]], Iterable[str]]] = None,
+        on_demand: bool = False
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.needs = needs
+        self.on_demand = on_demand
+        self.timeout = timeout
+        self.on_error = on_error or (lambda e: {"error": str(e), "status": "failed"})
+
+
+class DAGOutcome:
+    def __init__(self, results: Dict[str, Any], timings_ms: Dict[str, float], halted_by: Optional[str], payload: Any):
+        self.results = results
+        self.timings_ms = timings_ms
+        self.halted_by = halted_by   # stage whose halt/error ended the run, None if every stage finished
+        self.payload = payload       # that stage's response, None if every stage finished
+
+
+class StageDAG:
+    """
+    Runs stages as soon as their dependencies finish, so independent stages overlap
+    and end-to-end latency follows the critical path.
+
+    Stages must be declared after their dependencies. As soon as a stage halts or
+    fails, every other in-flight stage is cancelled and nothing new is started, so a
+    rejection never waits on slow siblings (e.g. a security rejection does not wait for
+    the portfolio fetch). Declaration order only decides which response is reported when
+    several stages halt in the same step: the earliest-declared one wins.
+    Dependencies that depend on the request go through Stage.needs / on_demand.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._order = {}
+        for index, stage in enumerate(stages):
+            if stage.name in self._order:
+                raise ValueError(f"Duplicate stage {stage.name}")
+            for dep in stage.deps:
+                if dep not in self._order:
+                    raise ValueError(f"Stage {stage.name} depends on {dep}, which must be declared before it")
+                if stages[self._order[dep]].on_demand:
+                    raise ValueError(f"Stage {stage.name} depends on on-demand stage {dep} (use needs)")
+            self._order[stage.name] = index
+
+    async def run(
+        self,
+        context: Dict[str, Any],
+        on_event: Optional[Callable[[str, str, Any], None]] = None
+    ) -> DAGOutcome:
+        """
+        on_event(kind, stage name, value) is called as stages progress:
+        "started" (value None), "finished" (result), "halted" (StageHalt payload),
+        "failed" (on_error response) and "cancelled" (value None). An on-demand stage's
+        halt or failure is reported when a stage first needs it.
+        """
+        started = time.perf_counter()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        tasks: Dict[asyncio.Task, Stage] = {}
+        launched = set()
+        requested = set()   # on-demand stages some stage needs
+        deferred = {}       # on-demand stage -> (event kind, payload) of a halt/failure nobody needed yet
+        halt = None  # (order, stage name, payload)
+
+        def emit(kind: str, stage: Stage, value: Any = None):
+            if on_event is None:
+                return
+            try:
+                on_event(kind, stage.name, value)
+            except Exception as e:
+                print(f"Error in stage event handler: {e}")
+
+        async def run_stage(stage: Stage):
+            stage_started = time.perf_counter()
+            try:
+                if stage.timeout is None:
+                    return await stage.fn(context, results)
+                try:
+                    return await asyncio.wait_for(stage.fn(context, results), stage.timeout)
+                except asyncio.TimeoutError:
+                    raise StageTimeout(stage.name, stage.timeout)
+            finally:
+                timings[stage.name] = round((time.perf_counter() - stage_started) * 1000, 2)
+
+        def stop(stage: Stage, payload: Any):
+            nonlocal halt
+            order = self._order[stage.name]
+            if halt is None or order < halt[0]:
+                halt = (order, stage.name, payload)
+
+        def launch_ready():
+            for stage in self.stages:
+                if stage.name in launched or not all(dep in results for dep in stage.deps):
+                    continue
+                needed = tuple(stage.needs(results)) if stage.needs is not None else ()
+                for name in needed:
+                    if name not in requested:
+                        requested.add(name)
+                        if name in deferred:
+                            kind, payload = deferred.pop(name)
+                            needed_stage = self.stages[self._order[name]]
+                            emit(kind, needed_stage, payload)
+                            stop(needed_stage, payload)
+                if halt is None and all(name in results for name in needed):
+                    launched.add(stage.name)
+                    emit("started", stage)
+                    tasks[asyncio.create_task(run_stage(stage))] = stage
+
+        def waiting_on(stage: Stage) -> bool:
+            return not stage.on_demand or stage.name in requested
+
+        try:
+            launch_ready()
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = tasks.pop(task)
+                    if task.cancelled():
+                        timings.pop(stage.name, None)
+                        emit("cancelled", stage)
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        results[stage.name] = task.result()
+                        emit("finished", stage, results[stage.name])
+                        continue
+                    kind = "halted" if isinstance(error, StageHalt) else "failed"
+                    payload = error.payload if kind == "halted" else stage.on_error(error)
+                    if not waiting_on(stage):
+                        # Nobody needs it yet; it only ends the run if a stage does
+                        deferred[stage.name] = (kind, payload)
+                        continue
+                    emit(kind, stage, payload)
+                    stop(stage, payload)
+
+                if halt is None:
+                    launch_ready()
+                if halt is not None or not any(waiting_on(stage) for stage in tasks.values()):
+                    # The run is over: siblings still in flight (or on-demand stages nobody
+                    # needed) are cancelled
+                    for task in tasks:
+                        task.cancel()
+        finally:
+            # Caller cancelled or a bug escaped: never leave stages running
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        if halt is not None:
+            return DAGOutcome(results, timings, halt[1], halt[2])
+        return DAGOutcome(results, timings, None, None)
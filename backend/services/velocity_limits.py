@@ -0,0 +1,293 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# name -> (window seconds, risk rule limit holding the USD limit for the user's tier)
+WINDOWS = {
+    "minute": (60, "velocity_minute_usd"),
+    "hour": (3600, "velocity_hour_usd"),
+    "day": (86400, "velocity_day_usd"),
+}
+
+# Buckets per window: a bucket is dropped only once all of it has left the window,
+# so totals over-count by at most 1/BUCKETS of the window (never under-count)
+BUCKETS = 60
+
+
+class RollingWindow:
+    """
+    Rolling sum over `span` seconds kept in a ring of fixed-width buckets
+    add() and total() are O(1) amortized: buckets are only touched when time moves
+    past them, and the running sum is adjusted as they expire.
+    """
+
+    def __init__(self, span: float, buckets: int = BUCKETS):
+        self.span = span
+        self.width = span / buckets
+        self._sums = [0.0] * buckets
+        self._ids = [-1] * buckets      # absolute bucket number held in each slot
+        self._head = -1                 # newest bucket number seen
+        self._total = 0.0
+
+    def _advance(self, now: float) -> int:
+        current = int(now // self.width)
+        if current > self._head:
+            n = len(self._sums)
+            # Expire the slots the window moved past (at most one full lap)
+            for bucket in range(max(self._head + 1, current - n + 1), current + 1):
+                slot = bucket % n
+                self._total -= self._sums[slot]
+                self._sums[slot] = 0.0
+                self._ids[slot] = bucket
+            if current - self._head >= n:
+                self._total = 0.0
+            self._head = current
+        return current
+
+    def add(self, value: float, at: Optional[float] = None) -> None:
+        now = time.time()
+        at = now if at is None else at
+        head = self._advance(now)
+        bucket = int(at // self.width)
+        if bucket <= head - len(self._sums) or bucket > head:
+            return  # outside the window
+        slot = bucket % len(self._sums)
+        self._sums[slot] += value
+        self._total += value
+
+    def total(self, now: Optional[float] = None) -> float:
+        self._advance(now if now is not None else time.time())
+        return max(self._total, 0.0)
+
+    def dump(self) -> Dict[str, float]:
+        """Non-empty buckets as {bucket number: sum}"""
+        return {str(bucket): value for bucket, value in zip(self._ids, self._sums) if value}
+
+    def load(self, buckets: Dict[str, float]) -> None:
+        for bucket, value in buckets.items():
+            self.add(float(value), at=(int(bucket) + 0.5) * self.width)
+
+
+class VelocityTracker:
+    """
+    Per-user rolling USD spend over the last minute, hour and day
+    Limits are per risk tier (velocity_*_usd in data/risk_rules.json, see velocity_limits_for)
+    - check() and record() only touch memory, so the risk gate adds no database round trip
+    - checkpoint() writes changed users' buckets to MongoDB (velocity_counters)
+    - rebuild() restores checkpoints on startup and replays transfers from the
+      transactions collection that happened after each user's checkpoint
+    - A transfer waiting on the user's PIN is held as a reservation: check() counts it, but it
+      is only recorded and persisted once resolve() confirms it. A failed challenge, or one
+      not resolved within pending_ttl seconds, is dropped.
+    Counters are per process; with several workers each one enforces the limits on the
+    transfers it handled since its last rebuild.
+    """
+
+    def __init__(self, checkpoint_interval: Optional[float] = None, pending_ttl: Optional[float] = None):
+        self.checkpoint_interval = checkpoint_interval if checkpoint_interval is not None else float(os.getenv("VELOCITY_CHECKPOINT_INTERVAL", "30"))
+        self.pending_ttl = pending_ttl if pending_ttl is not None else float(os.getenv("VELOCITY_PENDING_TTL", "600"))
+        self._users: Dict[str, Dict[str, RollingWindow]] = {}
+        # challenge_id -> (user_id, created at, transaction), oldest first
+        self._reserved: Dict[str, Tuple[str, float, Dict[str, Any]]] = {}
+        self._dirty: Set[str] = set()
+        self._pending_writes: Set[asyncio.Task] = set()
+
+    def _windows(self, user_id: str) -> Dict[str, RollingWindow]:
+        windows = self._users.get(user_id)
+        if windows is None:
+            windows = {name: RollingWindow(span) for name, (span, _) in WINDOWS.items()}
+            self._users[user_id] = windows
+        return windows
+
+    def check(self, user_id: str, usd_amount: float, limits: Dict[str, float]) -> List[str]:
+        """Names of the windows that usd_amount would push over their limit (limits: window -> USD)"""
+        now = time.time()
+        self._expire_reservations(now)
+        windows = self._users.get(user_id) or {}
+        exceeded = []
+        for name, (span, _) in WINDOWS.items():
+            total = windows[name].total(now) if name in windows else 0.0
+            total += sum(
+                float(transaction.get("value") or 0.0)
+                for owner, at, transaction in self._reserved.values()
+                if owner == user_id and now - at < span
+            )
+            if total + usd_amount > limits[name]:
+                exceeded.append(name)
+        return exceeded
+
+    def record(self, user_id: str, usd_amount: float, at: Optional[float] = None) -> None:
+        for window in self._windows(user_id).values():
+            window.add(usd_amount, at)
+        self._dirty.add(user_id)
+
+    def spent(self, user_id: str) -> Dict[str, float]:
+        windows = self._users.get(user_id) or {}
+        return {name: round(window.total(), 2) for name, window in windows.items()}
+
+    def checkpoint(self) -> int:
+        """Write changed users' counters to MongoDB; returns the number of users written"""
+        from services.mongodb_service import MongoDBService
+        mongo = MongoDBService()
+        dirty, self._dirty = self._dirty, set()
+        written = 0
+        try:
+            for user_id in dirty:
+                windows = {name: window.dump() for name, window in self._users[user_id].items()}
+                mongo.save_velocity_checkpoint(user_id, windows, time.time())
+                written += 1
+        except Exception:
+            # Retry the users that were not written next time
+            self._dirty |= dirty
+            raise
+        return written
+
+    async def checkpoint_forever(self) -> None:
+        """Checkpoint every checkpoint_interval seconds (run as a background task)"""
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await asyncio.to_thread(self.checkpoint)
+            except Exception as e:
+                print(f"⚠️  Velocity checkpoint failed: {e}")
+
+    def rebuild(self) -> int:
+        """
+        Restore counters from MongoDB (checkpoints, then newer transfers)
+        Returns: the number of transfers replayed
+        """
+        from services.mongodb_service import MongoDBService
+        mongo = MongoDBService()
+
+        checkpointed_at: Dict[str, float] = {}
+        for doc in mongo.get_velocity_checkpoints():
+            windows = self._windows(doc["user_id"])
+            for name, buckets in (doc.get("windows") or {}).items():
+                if name in windows:
+                    windows[name].load(buckets)
+            checkpointed_at[doc["user_id"]] = doc.get("checkpoint_at", 0.0)
+
+        longest = max(span for span, _ in WINDOWS.values())
+        since = datetime.utcnow() - timedelta(seconds=longest)
+        replayed = 0
+        for tx in mongo.get_transactions_since(since):
+            created_at = tx.get("created_at")
+            if not tx.get("user_id") or not isinstance(created_at, datetime):
+                continue
+            at = created_at.replace(tzinfo=timezone.utc).timestamp() if created_at.tzinfo is None else created_at.timestamp()
+            if at <= checkpointed_at.get(tx["user_id"], 0.0):
+                continue
+            self.record(tx["user_id"], float(tx.get("value") or 0.0), at)
+            replayed += 1
+        return replayed
+
+    def record_transfer(self, user_id: str, transaction: Dict[str, Any]) -> None:
+        """
+        Count a transfer and persist it to the transactions collection in the background
+        transaction: Transaction fields (user_id, type, asset, amount, value, date, status, ...)
+        A "pending" transfer with a challenge_id is only reserved until resolve()
+        """
+        if transaction.get("status") == "pending" and transaction.get("challenge_id"):
+            self._expire_reservations(time.time())
+            self._reserved[transaction["challenge_id"]] = (user_id, time.time(), transaction)
+            return
+        self._persist(user_id, transaction)
+
+    def resolve(self, challenge_id: str, confirmed: bool, user_id: Optional[str] = None) -> bool:
+        """
+        Settle a reserved transfer once its challenge completes: a confirmed one is counted
+        at the time it was created and persisted as completed, a failed one is dropped
+        Returns: False when no reservation for challenge_id (and user_id, if given) is held
+        """
+        self._expire_reservations(time.time())
+        reserved = self._reserved.get(challenge_id)
+        if reserved is None or (user_id is not None and reserved[0] != user_id):
+            return False
+        del self._reserved[challenge_id]
+        owner, at, transaction = reserved
+        if confirmed:
+            self._persist(owner, {**transaction, "status": "completed"}, at)
+        return True
+
+    def _expire_reservations(self, now: float) -> None:
+        cutoff = now - self.pending_ttl
+        while self._reserved:
+            challenge_id, (_, at, _) = next(iter(self._reserved.items()))
+            if at > cutoff:
+                break
+            del self._reserved[challenge_id]
+
+    def _persist(self, user_id: str, transaction: Dict[str, Any], at: Optional[float] = None) -> None:
+        self.record(user_id, float(transaction.get("value") or 0.0), at)
+
+        def write():
+            from services.mongodb_service import MongoDBService
+            MongoDBService().create_transaction(transaction)
+
+        task = asyncio.ensure_future(asyncio.to_thread(write))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    def _on_write_done(self, task: asyncio.Task) -> None:
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️  Transaction write to MongoDB failed: {task.exception()}")
+
+
+# Singleton
+_velocity_tracker: Optional[VelocityTracker] = None
+
+def get_velocity_tracker() -> VelocityTracker:
+    """Get or create velocity tracker singleton"""
+    global _velocity_tracker
+    if _velocity_tracker is None:
+        _velocity_tracker = VelocityTracker()
+    return _velocity_tracker
+
+def velocity_limits_for(user_id: Optional[str]) -> Dict[str, float]:
+    """USD limit per window for the user's risk tier"""
+    from services.risk_rules import get_risk_engine
+    engine = get_risk_engine()
+    limits = engine.limits_for(engine.tier_for(user_id), None)
+    return {name: limits[param] for name, (_, param) in WINDOWS.items()}
+
+def check_velocity(user_id: Optional[str], usd_amount: float) -> List[str]:
+    """Windows a transfer would exceed (DEFAULT_USER_ID when user_id is missing, like the executor)"""
+    user_id = user_id or os.getenv("DEFAULT_USER_ID")
+    if not user_id:
+        return []
+    return get_velocity_tracker().check(user_id, usd_amount, velocity_limits_for(user_id))
+
+def record_transfer(user_id: Optional[str], intent: Dict[str, Any], usd_value: float, status: str, challenge_id: Optional[str] = None) -> None:
+    """
+    Count an accepted transfer towards the user's velocity limits and store it in transactions
+    (a pending PIN challenge is held until resolve_transfer)
+    """
+    from models.transaction import Transaction
+
+    user_id = user_id or os.getenv("DEFAULT_USER_ID")
+    if not user_id:
+        return
+    now = datetime.utcnow()
+    transaction = Transaction(
+        user_id=user_id,
+        type="transfer",
+        asset=intent.get("asset") or "USDC",
+        amount=float(intent.get("amount") or 0.0),
+        value=usd_value,
+        date=now.date().isoformat(),
+        status=status,
+        created_at=now,
+    ).model_dump(exclude_none=True)
+    transaction["destination"] = intent.get("destination")
+    transaction["challenge_id"] = challenge_id
+    get_velocity_tracker().record_transfer(user_id, transaction)
+
+def resolve_transfer(user_id: Optional[str], challenge_id: str, confirmed: bool) -> bool:
+    """Settle a pending transfer after its PIN challenge; False if this process holds no such challenge"""
+    user_id = user_id or os.getenv("DEFAULT_USER_ID")
+    if not user_id:
+        return False
+    return get_velocity_tracker().resolve(challenge_id, confirmed, user_id)
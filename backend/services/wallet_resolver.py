@@ -0,0 +1,116 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class WalletResolver:
+    """
+    Read-through resolver for a user's primary Circle wallet
+    Lookup order:
+    1. In-process LRU (bounded, with a TTL so other workers' writes are picked up)
+    2. circle_users document in MongoDB (written by save_circle_user)
+    3. Circle GET /wallets
+    Entries are dropped whenever MongoDBService writes the user's circle_users document.
+    Missing wallets are never cached, since a wallet only appears once PIN setup completes.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("WALLET_CACHE_MAX_ENTRIES", "10000"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("WALLET_CACHE_TTL", "300"))
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+        from services.mongodb_service import MongoDBService
+        MongoDBService.add_circle_user_listener(self.invalidate)
+
+    async def get_wallet(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve the user's first wallet
+        Returns: {id, address, blockchain, state, source} or None if the user has no wallet yet
+        source is one of "memory", "mongodb", "circle"
+        """
+        wallet = self._get_cached(user_id)
+        if wallet is not None:
+            return {**wallet, "source": "memory"}
+
+        wallet = await self._load_from_mongodb(user_id)
+        if wallet is not None:
+            self._put(user_id, wallet)
+            return {**wallet, "source": "mongodb"}
+
+        wallet = await self._load_from_circle(user_id)
+        if wallet is not None:
+            # Only cache wallets that already have an on-chain address
+            if wallet.get("address"):
+                self._put(user_id, wallet)
+            return {**wallet, "source": "circle"}
+
+        return None
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached wallet for a user"""
+        self._cache.pop(user_id, None)
+
+    def _get_cached(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        wallet, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._cache.pop(user_id, None)
+            return None
+        self._cache.move_to_end(user_id)
+        return wallet
+
+    def _put(self, user_id: str, wallet: Dict[str, Any]) -> None:
+        self._cache[user_id] = (wallet, time.monotonic() + self.ttl)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _load_from_mongodb(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            from services.mongodb_service import MongoDBService
+            doc = await asyncio.to_thread(MongoDBService().get_circle_user, user_id)
+        except Exception as e:
+            print(f"⚠️  Wallet lookup in MongoDB failed, falling back to Circle: {e}")
+            return None
+
+        # Users saved before PIN confirmation have no wallet yet
+        if not doc or not doc.get("wallet_id") or not doc.get("wallet_address"):
+            return None
+
+        return {
+            "id": doc["wallet_id"],
+            "address": doc["wallet_address"],
+            "blockchain": doc.get("blockchain"),
+            "state": (doc.get("metadata") or {}).get("wallet_state"),
+        }
+
+    async def _load_from_circle(self, user_id: str) -> Optional[Dict[str, Any]]:
+        from services.circle_wallet_service import get_async_circle_service
+
+        wallets_response = await get_async_circle_service().get_wallets(user_id)
+        wallets = wallets_response.get("wallets", [])
+        if not wallets:
+            return None
+
+        wallet = wallets[0]
+        return {
+            "id": wallet["id"],
+            "address": wallet.get("address"),
+            "blockchain": wallet.get("blockchain"),
+            "state": wallet.get("state"),
+        }
+
+
+# Singleton
+_wallet_resolver: Optional[WalletResolver] = None
+
+def get_wallet_resolver() -> WalletResolver:
+    """Get or create wallet resolver singleton"""
+    global _wallet_resolver
+    if _wallet_resolver is None:
+        _wallet_resolver = WalletResolver()
+    return _wallet_resolver
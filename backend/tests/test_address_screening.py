@@ -0,0 +1,24 @@
+import asyncio
+import threading
+
+from services.address_screening import AddressScreeningIndex
+
+BLOCKED = "0x" + "ab" * 20
+CLEAN = "0x" + "cd" * 20
+
+
+def test_ensure_loaded_compiles_lists_off_the_event_loop(tmp_path, monkeypatch):
+    (tmp_path / "scams.txt").write_text(f"# reported\n{BLOCKED}\nnot an address\n")
+    index = AddressScreeningIndex(directory=str(tmp_path))
+    loop_thread = threading.get_ident()
+    reload_threads = []
+    reload = index.reload
+    monkeypatch.setattr(index, "reload", lambda: reload_threads.append(threading.get_ident()) or reload())
+
+    async def run():
+        await asyncio.gather(index.ensure_loaded(), index.ensure_loaded())
+        return index.screen(BLOCKED.upper().replace("0X", "0x")), index.screen(CLEAN)
+
+    assert asyncio.run(run()) == (["scams"], [])
+    assert len(reload_threads) == 1 and reload_threads[0] != loop_thread
+    assert (tmp_path / "scams.idx").exists()
@@ -0,0 +1,103 @@
+import asyncio
+
+from services.command_mailbox import CommandMailbox
+
+
+def command(log, name, delay=0.01, result=None, error=None):
+    async def run():
+        log.append(f"start {name}")
+        await asyncio.sleep(delay)
+        log.append(f"end {name}")
+        if error is not None:
+            raise error
+        return result if result is not None else name
+    return run
+
+
+def test_one_users_commands_run_in_order_and_users_run_in_parallel():
+    mailbox = CommandMailbox(dedup_window=10)
+    log = []
+
+    async def run():
+        return await asyncio.gather(
+            mailbox.submit("alice", None, command(log, "a1")),
+            mailbox.submit("alice", None, command(log, "a2")),
+            mailbox.submit("bob", None, command(log, "b1")),
+        )
+
+    results = asyncio.run(run())
+    assert [result for result, _ in results] == ["a1", "a2", "b1"]
+    assert log.index("end a1") < log.index("start a2")
+    assert log.index("start b1") < log.index("end a1")
+    assert mailbox.stats()["active_users"] == 0
+
+
+def test_repeat_of_a_running_command_shares_its_result():
+    mailbox = CommandMailbox(dedup_window=10)
+    log = []
+
+    async def run():
+        return await asyncio.gather(
+            mailbox.submit("alice", "send 10", command(log, "first")),
+            mailbox.submit("alice", "send 10", command(log, "second")),
+        )
+
+    assert asyncio.run(run()) == [("first", False), ("first", True)]
+    assert log == ["start first", "end first"]
+
+
+def test_recent_results_are_replayed_within_the_window_only():
+    log = []
+
+    async def run(mailbox):
+        first = await mailbox.submit("alice", "send 10", command(log, "first"))
+        second = await mailbox.submit("alice", "send 10", command(log, "second"))
+        return first, second
+
+    assert asyncio.run(run(CommandMailbox(dedup_window=10))) == (("first", False), ("first", True))
+    assert asyncio.run(run(CommandMailbox(dedup_window=0))) == (("first", False), ("second", False))
+
+
+def test_failed_results_are_not_remembered():
+    mailbox = CommandMailbox(dedup_window=10)
+    log = []
+
+    async def run():
+        failed = await mailbox.submit("alice", "k", command(log, "first", result={"status": "failed"}),
+                                      remember=lambda result: result.get("status") != "failed")
+        retried = await mailbox.submit("alice", "k", command(log, "second", result={"status": "ok"}))
+        return failed, retried
+
+    assert asyncio.run(run()) == (({"status": "failed"}, False), ({"status": "ok"}, False))
+
+
+def test_disconnected_caller_does_not_cancel_the_command():
+    mailbox = CommandMailbox(dedup_window=10)
+    log = []
+
+    async def run():
+        caller = asyncio.create_task(mailbox.submit("alice", "k", command(log, "first", delay=0.05)))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        # The retry joins the command that is still running
+        return await mailbox.submit("alice", "k", command(log, "second"))
+
+    assert asyncio.run(run()) == ("first", True)
+    assert log == ["start first", "end first"]
+
+
+def test_exception_reaches_every_waiter_and_the_queue_moves_on():
+    mailbox = CommandMailbox(dedup_window=10)
+    log = []
+
+    async def run():
+        return await asyncio.gather(
+            mailbox.submit("alice", "k", command(log, "boom", error=RuntimeError("boom"))),
+            mailbox.submit("alice", "k", command(log, "dup")),
+            mailbox.submit("alice", None, command(log, "next")),
+            return_exceptions=True,
+        )
+
+    boom, dup, following = asyncio.run(run())
+    assert isinstance(boom, RuntimeError) and isinstance(dup, RuntimeError)
+    assert following == ("next", False)
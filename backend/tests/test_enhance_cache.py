@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from services.enhance_cache import EnhanceCache, canonicalize
+
+ADDRESS = "0x" + "ab" * 20
+OTHER_ADDRESS = "0x" + "cd" * 20
+
+
+def cache():
+    return EnhanceCache(max_entries=10, ttl=60, mongo_enabled=False)
+
+
+def test_canonicalize_splits_slots():
+    assert canonicalize(f"Send 1,000  USDC to {ADDRESS}") == ("send <num_0> usdc to <addr_0>", [ADDRESS], ["1000"])
+    assert canonicalize("send <num_0> usdc") is None
+
+
+def test_hit_fills_in_the_new_querys_slots():
+    enhance_cache = cache()
+    result = {
+        "enhanced_query": f"send 10 usdc to {ADDRESS}",
+        "extracted_name": None,
+        "intent": {"action": "transfer", "asset": "USDC", "amount": 10, "destination": ADDRESS},
+    }
+
+    async def run():
+        assert await enhance_cache.put(f"send 10 usdc to {ADDRESS}", True, result)
+        return await enhance_cache.get(f"Send 25 USDC to {OTHER_ADDRESS}", True)
+
+    hit = asyncio.run(run())
+    assert hit["enhanced_query"] == f"send 25 usdc to {OTHER_ADDRESS}"
+    assert hit["intent"]["amount"] == 25.0
+    assert hit["intent"]["destination"] == OTHER_ADDRESS
+    assert hit["intent"]["raw"] == hit["enhanced_query"]
+
+
+@pytest.mark.parametrize("query, enhanced_query", [
+    # A value the query does not contain
+    ("send ten usdc to bob", "send 10 usdc to bob"),
+    # A value from the query that the enhanced query drops
+    ("send 10 usdc to bob in 2 parts", "send 10 usdc to bob"),
+    (f"send 10 usdc to {ADDRESS}", "send 10 usdc to bob"),
+])
+def test_results_not_covering_the_querys_slots_are_not_cached(query, enhanced_query):
+    enhance_cache = cache()
+
+    async def run():
+        stored = await enhance_cache.put(query, False, {"enhanced_query": enhanced_query})
+        return stored, await enhance_cache.get(query, False)
+
+    assert asyncio.run(run()) == (False, None)
+    assert enhance_cache.stats()["uncacheable"] == 1
+
+
+def test_entry_disagreeing_with_the_query_is_dropped():
+    enhance_cache = cache()
+    key = enhance_cache.make_key("send <num_0> usdc to bob", False)
+    # e.g. an entry written by an older version, missing the amount
+    enhance_cache._put(key, {"enhanced_query": "send usdc to bob", "extracted_name": None, "intent": None})
+    assert asyncio.run(enhance_cache.get("send 10 usdc to bob", False)) is None
+    assert enhance_cache.stats()["rejected"] == 1
+    assert enhance_cache.stats()["memory_entries"] == 0
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+
+import services.fx_rates as fx_rates
+from agent_definitions.planner import ParsedCommand
+from services.fx_rates import FXRateTable, apply_fx_conversion, convert_currency_mentions
+
+
+class FakeSource:
+    def __init__(self, rates):
+        self.rates = rates
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        if isinstance(self.rates, Exception):
+            raise self.rates
+        return {code: Decimal(rate) for code, rate in self.rates.items()}
+
+
+def table(rates=None, **kwargs):
+    return FXRateTable(FakeSource(rates or {"INR": "0.012", "EUR": "1.08", "USD": "1"}), **kwargs)
+
+
+@pytest.mark.parametrize("text, converted", [
+    ("send 100 rupees to bob", "send 1.2 usdc to bob"),
+    ("send ₹ 1,000 to bob", "send 12 usdc to bob"),
+    ("pay 20 euros to alice", "pay 21.6 usdc to alice"),
+    ("send $20 to bob", "send 20 usdc to bob"),
+    ("send $20 usdc to bob", "send $20 usdc to bob"),
+    ("send 20 usdc to bob", "send 20 usdc to bob"),
+])
+def test_currency_mentions_are_rewritten_to_usdc(text, converted):
+    assert convert_currency_mentions(text, table()).text == converted
+
+
+def test_unknown_currency_is_left_for_the_llm():
+    result = convert_currency_mentions("send 500 yen to bob", table())
+    assert result.text == "send 500 yen to bob"
+    assert result.conversions == []
+
+
+def test_conversion_is_recorded_on_the_matching_intent():
+    result = convert_currency_mentions("send 100 rupees to bob", table())
+    command = ParsedCommand(action="transfer", asset="USDC", amount=1.2)
+    converted = apply_fx_conversion(command, result.conversions)
+    assert (converted.source_amount, converted.source_currency, converted.fx_rate) == (100.0, "INR", 0.012)
+    other = ParsedCommand(action="transfer", asset="USDC", amount=5)
+    assert apply_fx_conversion(other, result.conversions) is other
+
+
+def test_stale_table_is_refreshed_on_read(monkeypatch):
+    monkeypatch.setattr(fx_rates, "READ_REFRESH_INTERVAL", 0.0)
+    rates = table(max_age=60)
+    assert rates.get_rate("inr") == Decimal("0.012")
+    rates._updated_at -= 120
+    rates.source.rates = {"INR": "0.013"}
+    assert rates.get_rate("INR") == Decimal("0.013")
+    assert rates.source.fetches == 2
+
+
+def test_failed_refresh_keeps_rates_out_until_fresh():
+    rates = table(max_age=60)
+    rates.source.rates = OSError("missing file")
+    assert rates.get_rate("INR") is None
+    assert rates.get_rate("INR") is None
+    assert rates.source.fetches == 1  # reads retry at most every READ_REFRESH_INTERVAL
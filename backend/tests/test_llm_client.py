@@ -0,0 +1,20 @@
+import asyncio
+
+import httpx
+
+from services.llm_client import AdaptiveRateLimiter, build_openai_client
+
+
+def test_every_request_on_the_shared_client_is_rate_limited(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://llm.internal/v1")
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, burst=5)
+    client = build_openai_client(limiter)
+    assert client._client.event_hooks == {"request": [limiter.on_request], "response": [limiter.on_response]}
+
+    # A custom base URL goes through the same hooks as api.openai.com
+    request = httpx.Request("GET", "http://llm.internal/v1/models")
+    asyncio.run(limiter.on_request(request))
+    asyncio.run(limiter.on_response(httpx.Response(429, headers={"retry-after": "0"}, request=request)))
+    assert limiter.stats()["acquired"] == 1
+    assert limiter.stats()["throttled"] == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from agent_definitions.planner import ParsedCommand, fast_parse_command, intent_matches_text
+
+ADDRESS = "0x" + "ab" * 20
+OTHER_ADDRESS = "0x" + "cd" * 20
+
+
+@pytest.mark.parametrize("text, expected", [
+    (f"send 10 usdc to {ADDRESS}", {"action": "transfer", "asset": "USDC", "amount": 10.0, "destination": ADDRESS}),
+    (f"Transfer 0.5 ETH to {ADDRESS}.", {"action": "transfer", "asset": "ETH", "amount": 0.5, "destination": ADDRESS}),
+    (f"send .5 eth to {ADDRESS}", {"action": "transfer", "asset": "ETH", "amount": 0.5, "destination": ADDRESS}),
+    ("buy 0.5 eth", {"action": "buy", "asset": "ETH", "amount": 0.5}),
+    ("sell 10% of btc", {"action": "sell", "asset": "BTC", "percent": 10.0}),
+    ("please sell 25 % of my eth!", {"action": "sell", "asset": "ETH", "percent": 25.0}),
+])
+def test_exact_grammar_is_fast_pathed(text, expected):
+    result = fast_parse_command(text)
+    assert result.confidence == 1.0
+    assert result.command.model_dump(exclude_none=True, exclude={"raw"}) == expected
+
+
+@pytest.mark.parametrize("text", [
+    f"transfer 10 usdc from {ADDRESS} to bob",
+    f"send 10 usdc from {ADDRESS} to {OTHER_ADDRESS}",
+    "sell all my btc but keep 10%",
+    f"please send 10 usdc to {ADDRESS} now",
+    f"to {ADDRESS} send 10 usdc",
+    "send 10 usdc to bob",
+    "buy some eth",
+])
+def test_anything_outside_the_grammar_goes_to_the_llm(text):
+    result = fast_parse_command(text)
+    assert result.command is None
+    assert result.confidence < 0.9
+    assert result.reason
+
+
+def test_threshold_above_one_disables_the_fast_path(monkeypatch):
+    monkeypatch.setenv("PLANNER_FAST_PATH_MIN_CONFIDENCE", "1.1")
+    result = fast_parse_command(f"send 10 usdc to {ADDRESS}")
+    assert result.command is None
+    assert result.reason == "below confidence threshold"
+
+
+def test_intent_matches_text_accepts_slots_from_the_text():
+    text = f"send 100 usdc to {ADDRESS}"
+    command = ParsedCommand(action="transfer", asset="USDC", amount=100, destination=ADDRESS.upper().replace("0X", "0x"), raw=text)
+    assert intent_matches_text(command, text)
+
+
+@pytest.mark.parametrize("changes", [
+    {"amount": 1000},
+    {"amount": 5},          # ".5" in the text is not 5
+    {"asset": "ETH"},
+    {"destination": OTHER_ADDRESS},
+    {"action": "buy"},
+])
+def test_intent_matches_text_rejects_slots_not_in_the_text(changes):
+    text = f"send .5 usdc to {ADDRESS}"
+    fields = {"action": "transfer", "asset": "USDC", "amount": 0.5, "destination": ADDRESS, "raw": text}
+    fields.update(changes)
+    assert not intent_matches_text(ParsedCommand(**fields), text)
@@ -0,0 +1,64 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+import services.price_oracle as price_oracle
+from services.price_oracle import PriceOracle
+
+
+class FakeSource:
+    def __init__(self, prices):
+        self.prices = prices
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        if isinstance(self.prices, Exception):
+            raise self.prices
+        return {symbol: (Decimal(price), ttl) for symbol, (price, ttl) in self.prices.items()}
+
+
+def test_first_read_loads_quotes():
+    oracle = PriceOracle(FakeSource({"ETH": ("3000", None)}), ttl=60)
+    assert oracle.get_price("ETH-SEPOLIA") == Decimal("3000")
+    assert oracle.get_price("BTC") is None
+
+
+def test_stale_read_refreshes_from_source(monkeypatch):
+    monkeypatch.setattr(price_oracle, "READ_REFRESH_INTERVAL", 0.0)
+    source = FakeSource({"ETH": ("3000", 0.0)})
+    oracle = PriceOracle(source)
+    oracle.get_price("ETH")
+    source.prices = {"ETH": ("3100", 60.0)}
+    assert oracle.get_price("ETH") == Decimal("3100")
+    assert source.fetches == 2
+
+
+def test_stale_reads_are_throttled():
+    source = FakeSource({"ETH": ("3000", 0.0)})
+    oracle = PriceOracle(source)
+    assert oracle.get_price("ETH") is None
+    assert oracle.get_price("ETH") is None
+    assert source.fetches == 1
+
+
+def test_refresh_forever_survives_unexpected_errors():
+    class BrokenSource:
+        calls = 0
+
+        def fetch(self):
+            BrokenSource.calls += 1
+            raise RuntimeError("feed exploded")
+
+    async def run():
+        oracle = PriceOracle(BrokenSource(), refresh_interval=0.0)
+        task = asyncio.create_task(oracle.refresh_forever())
+        while BrokenSource.calls < 3:
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+import pytest
+
+from services.query_enhancer import local_enhance
+
+ADDRESS = "0x" + "ab" * 20
+
+
+@pytest.mark.parametrize("query, enhanced_query, name, destination", [
+    ("send 1.19 usdc to bob", "send 1.19 usdc to bob", "bob", None),
+    ("Please transfer 5 USDC to O'Neil.", "send 5 usdc to O'Neil", "O'Neil", None),
+    (f"5 usdc to {ADDRESS}", f"send 5 usdc to {ADDRESS}", None, ADDRESS),
+])
+def test_simple_transfers_are_enhanced_locally(query, enhanced_query, name, destination):
+    result = local_enhance(query)
+    assert result.enhanced_query == enhanced_query
+    assert result.extracted_name == name
+    assert result.intent.destination == destination
+    assert result.intent.raw == enhanced_query
+
+
+@pytest.mark.parametrize("query", [
+    "send 20 usdc to ali khan",
+    "send 20 usdc to bob tomorrow",
+    "send 20 usdc to my brother",
+    "send 20 usdc to me",
+    "send 20 rupees to bob",
+    "send twenty usdc to bob",
+])
+def test_everything_else_goes_to_the_llm(query):
+    assert local_enhance(query) is None
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+import pytest
+
+from utils.spoken_numbers import find_spoken_amounts, format_amount, normalize_spoken_amounts, parse_spoken_amount
+
+
+@pytest.mark.parametrize("text, normalized", [
+    ("send twenty five usdc to bob", "send 25 usdc to bob"),
+    ("send one hundred and five dollars", "send 105 dollars"),
+    ("send a hundred usdc", "send 100 usdc"),
+    ("send twenty-one thousand rupees", "send 21000 rupees"),
+    ("send five hundred thousand usdc", "send 500000 usdc"),
+    ("send two point five eth", "send 2.5 eth"),
+    ("send three point one four usdc", "send 3.14 usdc"),
+    ("send 1.5k usdc", "send 1500 usdc"),
+    ("send 10 usdc to bob", "send 10 usdc to bob"),
+])
+def test_spelled_out_amounts_become_numerals(text, normalized):
+    assert normalize_spoken_amounts(text) == normalized
+
+
+def test_spans_point_at_the_original_text():
+    text = "send twenty five usdc and 3 eth"
+    [amount] = find_spoken_amounts(text)
+    assert text[amount.start:amount.end] == "twenty five"
+    assert amount.value == Decimal("25")
+
+
+@pytest.mark.parametrize("phrase, value", [
+    ("twenty five point five", Decimal("25.5")),
+    ("2.5k", Decimal("2500")),
+    ("100", Decimal("100")),
+    ("twenty five usdc", None),
+    ("one two three", None),
+])
+def test_parse_spoken_amount_needs_a_single_amount(phrase, value):
+    assert parse_spoken_amount(phrase) == value
+
+
+@pytest.mark.parametrize("value, text", [
+    (Decimal("1.200000"), "1.2"),
+    (Decimal("10"), "10"),
+    (Decimal("0.000001"), "0.000001"),
+])
+def test_format_amount_is_plain_decimal(value, text):
+    assert format_amount(value) == text
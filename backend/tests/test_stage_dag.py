@@ -0,0 +1,157 @@
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.agents_runner import AgentRunner
+from services.stage_dag import Stage, StageDAG, StageHalt
+
+
+def run(dag, context=None):
+    events = []
+    outcome = asyncio.run(dag.run(context or {}, on_event=lambda kind, name, value: events.append((kind, name))))
+    return outcome, events
+
+
+def sleeper(seconds, result=None, error=None):
+    async def fn(context, results):
+        await asyncio.sleep(seconds)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+
+def test_independent_stages_overlap():
+    dag = StageDAG([
+        Stage("a", sleeper(0.1, "a")),
+        Stage("b", sleeper(0.1, "b")),
+        Stage("c", sleeper(0, "c"), deps=("a", "b")),
+    ])
+    started = time.perf_counter()
+    outcome, _ = run(dag)
+    assert time.perf_counter() - started < 0.18
+    assert outcome.halted_by is None
+    assert outcome.results == {"a": "a", "b": "b", "c": "c"}
+
+
+def test_halt_cancels_stages_in_flight():
+    dag = StageDAG([
+        Stage("slow", sleeper(5, "slow")),
+        Stage("reject", sleeper(0.01, error=StageHalt({"message": "no"}))),
+        Stage("after", sleeper(0, "after"), deps=("slow", "reject")),
+    ])
+    started = time.perf_counter()
+    outcome, events = run(dag)
+    assert time.perf_counter() - started < 1
+    assert (outcome.halted_by, outcome.payload) == ("reject", {"message": "no"})
+    assert ("cancelled", "slow") in events
+    assert "after" not in outcome.results
+
+
+def test_timeout_is_reported_through_on_error():
+    dag = StageDAG([Stage("slow", sleeper(5), timeout=0.01, on_error=lambda e: {"error": str(e)})])
+    outcome, _ = run(dag)
+    assert outcome.payload == {"error": "slow stage timed out after 0.01s"}
+
+
+def needs_extra(results):
+    return ("extra",) if results["first"] == "wants extra" else ()
+
+
+def on_demand_dag(first, extra):
+    return StageDAG([
+        Stage("first", sleeper(0.01, first)),
+        Stage("extra", extra, on_demand=True, on_error=lambda e: {"error": str(e)}),
+        Stage("last", lambda context, results: asyncio.sleep(0, results.get("extra")), deps=("first",), needs=needs_extra),
+    ])
+
+
+def test_unneeded_on_demand_stage_neither_delays_nor_fails_the_run():
+    outcome, events = run(on_demand_dag("plain", sleeper(5, "extra")))
+    assert outcome.halted_by is None
+    assert outcome.results["last"] is None
+    assert ("cancelled", "extra") in events
+
+    outcome, events = run(on_demand_dag("plain", sleeper(0, error=RuntimeError("down"))))
+    assert outcome.halted_by is None
+    assert ("failed", "extra") not in events
+
+
+def test_needed_on_demand_stage_is_awaited_and_its_failure_ends_the_run():
+    outcome, _ = run(on_demand_dag("wants extra", sleeper(0.05, "extra")))
+    assert outcome.results["last"] == "extra"
+
+    outcome, events = run(on_demand_dag("wants extra", sleeper(0, error=RuntimeError("down"))))
+    assert (outcome.halted_by, outcome.payload) == ("extra", {"error": "down"})
+    assert ("failed", "extra") in events
+    assert "last" not in outcome.results
+
+
+def test_on_demand_stage_cannot_be_a_static_dependency():
+    with pytest.raises(ValueError):
+        StageDAG([Stage("extra", sleeper(0), on_demand=True), Stage("last", sleeper(0), deps=("extra",))])
+
+
+def fake_registry(action, portfolio_delay=0.0, execute_delay=0.0):
+    recorded = []
+
+    async def get_portfolio(user_id):
+        await asyncio.sleep(portfolio_delay)
+        return {"total_value_usd": 1000.0, "balances": []}
+
+    async def execute_transaction(**intent):
+        await asyncio.sleep(execute_delay)
+        return {"status": "pending", "requires_confirmation": True, "challenge_id": "c1"}
+
+    command = {"action": action, "asset": "USDC", "amount": 10.0, "destination": "0x" + "ab" * 20, "raw": "cmd"}
+    registry = SimpleNamespace(
+        planner_agent=None, portfolio_agent=None, risk_agent=None,
+        security_agent=None, executor_agent=None, auditor_agent=None,
+        intent_matches_text=lambda command, text: True,
+        normalize_spoken_amounts=lambda text: text,
+        convert_currency_mentions=lambda text: SimpleNamespace(text=text, conversions=[]),
+        fast_parse_command=lambda text: SimpleNamespace(command=command, confidence=1.0),
+        ParsedCommand=dict,
+        apply_fx_conversion=lambda command, conversions: command,
+        get_portfolio=get_portfolio,
+        invalidate_portfolio=lambda user_id: None,
+        risk_check=lambda **kwargs: {"approved": True, "reasons": [], "usd_value": 10.0, "portfolio": kwargs["portfolio_total_value_usd"]},
+        load_screening_index=lambda: asyncio.sleep(0),
+        security_validate=lambda **kwargs: {"valid": True},
+        execute_transaction=execute_transaction,
+        record_transfer=lambda *args: recorded.append(args),
+    )
+    return registry, recorded
+
+
+def test_transfer_does_not_wait_for_the_portfolio():
+    registry, recorded = fake_registry("transfer", portfolio_delay=5)
+    started = time.perf_counter()
+    result = asyncio.run(AgentRunner(registry).run("cmd", user_id="u1"))
+    assert time.perf_counter() - started < 1
+    assert result["challenge_id"] == "c1"
+    assert len(recorded) == 1
+
+
+def test_transfer_is_recorded_even_if_the_executor_stage_times_out(monkeypatch):
+    monkeypatch.setenv("AGENT_STAGE_TIMEOUT_EXECUTOR", "0.01")
+    registry, recorded = fake_registry("transfer", execute_delay=0.1)
+
+    async def scenario():
+        result = await AgentRunner(registry).run("cmd", user_id="u1")
+        assert result["status"] == "failed"
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert [args[4] for args in recorded] == ["c1"]
+
+
+def test_buy_waits_for_the_portfolio():
+    registry, _ = fake_registry("buy", portfolio_delay=0.05)
+    checked = []
+    registry.risk_check = lambda **kwargs: checked.append(kwargs["portfolio_total_value_usd"]) or {"approved": False, "reasons": ["no"]}
+    result = asyncio.run(AgentRunner(registry).run("cmd", user_id="u1"))
+    assert result["status"] == "rejected"
+    assert checked == [1000.0]
@@ -0,0 +1,113 @@
+import time
+import asyncio
+
+import pytest
+
+import services.mongodb_service as mongodb_service
+from services.risk_rules import get_risk_engine
+from services.velocity_limits import WINDOWS, RollingWindow, VelocityTracker, velocity_limits_for
+
+LIMITS = {"minute": 100.0, "hour": 200.0, "day": 300.0}
+
+
+class FakeMongo:
+    written = []
+
+    def create_transaction(self, transaction):
+        FakeMongo.written.append(transaction)
+
+
+@pytest.fixture
+def written(monkeypatch):
+    FakeMongo.written = []
+    monkeypatch.setattr(mongodb_service, "MongoDBService", FakeMongo)
+    return FakeMongo.written
+
+
+def transfer(value, status="completed", challenge_id=None):
+    return {"user_id": "u1", "type": "transfer", "value": value, "status": status, "challenge_id": challenge_id}
+
+
+async def settle(tracker):
+    await asyncio.gather(*tracker._pending_writes)
+
+
+def test_rolling_window_expires_old_values():
+    now = time.time()
+    window = RollingWindow(60)
+    window.add(10.0, at=now - 50)
+    window.add(5.0, at=now)
+    assert window.total(now) == 15.0
+    assert window.total(now + 15) == 5.0
+    assert window.total(now + 120) == 0.0
+
+
+def test_check_names_exceeded_windows():
+    tracker = VelocityTracker()
+    assert tracker.check("u1", 150.0, LIMITS) == ["minute"]
+    tracker.record("u1", 90.0)
+    assert tracker.check("u1", 20.0, LIMITS) == ["minute"]
+    assert tracker.check("u1", 150.0, LIMITS) == ["minute", "hour"]
+    assert tracker.check("u2", 20.0, LIMITS) == []
+
+
+def test_completed_transfer_is_counted_and_persisted(written):
+    async def run():
+        tracker = VelocityTracker()
+        tracker.record_transfer("u1", transfer(80.0))
+        await settle(tracker)
+        return tracker
+
+    tracker = asyncio.run(run())
+    assert tracker.spent("u1") == {"minute": 80.0, "hour": 80.0, "day": 80.0}
+    assert [tx["status"] for tx in written] == ["completed"]
+
+
+def test_pending_challenge_is_reserved_until_confirmed(written):
+    async def run():
+        tracker = VelocityTracker()
+        tracker.record_transfer("u1", transfer(80.0, "pending", "c1"))
+        assert tracker.spent("u1") == {}
+        assert tracker.check("u1", 30.0, LIMITS) == ["minute"]
+        assert not written
+
+        assert not tracker.resolve("c1", True, user_id="u2")
+        assert tracker.resolve("c1", True, user_id="u1")
+        assert not tracker.resolve("c1", True, user_id="u1")
+        await settle(tracker)
+        return tracker
+
+    tracker = asyncio.run(run())
+    assert tracker.spent("u1")["minute"] == 80.0
+    assert [(tx["challenge_id"], tx["status"]) for tx in written] == [("c1", "completed")]
+
+
+def test_failed_or_expired_challenge_is_dropped(written):
+    tracker = VelocityTracker(pending_ttl=0.0)
+    tracker.record_transfer("u1", transfer(80.0, "pending", "c1"))
+    assert tracker.check("u1", 30.0, LIMITS) == []
+    assert not tracker.resolve("c1", True)
+
+    tracker = VelocityTracker()
+    tracker.record_transfer("u1", transfer(80.0, "pending", "c2"))
+    assert tracker.resolve("c2", False)
+    assert tracker.check("u1", 30.0, LIMITS) == []
+    assert tracker.spent("u1") == {}
+    assert not written
+
+
+def test_limits_follow_the_users_tier(monkeypatch):
+    engine = get_risk_engine()
+    monkeypatch.setitem(engine.user_tiers, "vip", "verified")
+    standard = velocity_limits_for("someone")
+    verified = velocity_limits_for("vip")
+    assert set(standard) == set(WINDOWS)
+    assert all(verified[name] > standard[name] for name in WINDOWS)
+
+
+def test_one_allowed_transfer_fits_every_window():
+    engine = get_risk_engine()
+    for tier in engine.tiers:
+        limits = engine.limits_for(tier, None)
+        for _, param in WINDOWS.values():
+            assert limits[param] >= limits["max_transfer_usd"], (tier, param)
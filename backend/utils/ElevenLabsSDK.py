@@ -3,11 +3,13 @@ import requests
 import base64
 import io
 import uuid
+import asyncio
 from io import BytesIO
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 from dotenv import load_dotenv
 from elevenlabs import VoiceSettings
 from elevenlabs.client import ElevenLabs
+from .tts_cache import TTSCache, get_tts_cache
 
 load_dotenv()
 
@@ -31,6 +33,11 @@ class ElevenLabsSDK:
         self.headers = {
             "xi-api-key": self.api_key
         }
+        
+        # Content-addressed cache for synthesized audio (set TTS_CACHE_ENABLED=false to disable)
+        self.tts_cache: Optional[TTSCache] = None
+        if os.getenv("TTS_CACHE_ENABLED", "true").lower() != "false":
+            self.tts_cache = get_tts_cache()
     
     def speech_to_text(self, audio_data: bytes, model_id: Optional[str] = None) -> str:
         """
@@ -150,10 +157,12 @@ class ElevenLabsSDK:
         style: float = 0.0,
         use_speaker_boost: bool = True,
         speed: float = 1.0,
-        output_format: str = "mp3_22050_32"
+        output_format: str = "mp3_22050_32",
+        use_cache: bool = True
     ) -> bytes:
         """
         Convert text to speech using ElevenLabs TTS API
+        Results are served from / stored in the TTS cache when enabled
         
         Args:
             text: Text to convert to speech
@@ -165,6 +174,7 @@ class ElevenLabsSDK:
             use_speaker_boost: Whether to use speaker boost
             speed: Speech speed (0.25-4.0)
             output_format: Audio output format (default: mp3_22050_32)
+            use_cache: Read from and write to the TTS cache (default: True)
         
         Returns:
             Audio bytes (MP3 format)
@@ -173,6 +183,15 @@ class ElevenLabsSDK:
             # Default to Adam voice (pNInz6obpgDQGcFmaJgB) if not provided
             voice_id = "pNInz6obpgDQGcFmaJgB"
         
+        cache_key = None
+        if use_cache and self.tts_cache is not None:
+            cache_key = self.tts_cache_key(
+                text, voice_id, model_id, stability, similarity_boost, style, use_speaker_boost, speed, output_format
+            )
+            cached = self.tts_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Convert text to speech using official SDK
         response = self.client.text_to_speech.convert(
             voice_id=voice_id,
@@ -194,7 +213,109 @@ class ElevenLabsSDK:
             if chunk:
                 audio_bytes.write(chunk)
         
-        return audio_bytes.getvalue()
+        audio = audio_bytes.getvalue()
+        if cache_key is not None:
+            self.tts_cache.put(cache_key, audio)
+        return audio
+    
+    def tts_cache_key(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model_id: str = "eleven_multilingual_v2",
+        stability: float = 0.5,
+        similarity_boost: float = 0.8,
+        style: float = 0.0,
+        use_speaker_boost: bool = True,
+        speed: float = 1.0,
+        output_format: str = "mp3_22050_32"
+    ) -> str:
+        """Build the TTS cache key from every parameter that changes the audio (same defaults as text_to_speech)"""
+        if not voice_id:
+            voice_id = self.get_default_voice_id()
+        return TTSCache.make_key(
+            text=text,
+            voice_id=voice_id,
+            model_id=model_id,
+            voice_settings={
+                "stability": stability,
+                "similarity_boost": similarity_boost,
+                "style": style,
+                "use_speaker_boost": use_speaker_boost,
+                "speed": speed,
+            },
+            output_format=output_format,
+        )
+    
+    def text_to_speech_stream(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model_id: str = "eleven_multilingual_v2",
+        stability: float = 0.5,
+        similarity_boost: float = 0.8,
+        style: float = 0.0,
+        use_speaker_boost: bool = True,
+        speed: float = 1.0,
+        output_format: str = "mp3_22050_32",
+        use_cache: bool = True
+    ) -> Iterator[bytes]:
+        """
+        Convert text to speech using the ElevenLabs streaming endpoint
+        Same arguments as text_to_speech, but returns the chunk iterator instead of
+        buffering it, so callers can forward audio as soon as it is synthesized.
+        Nothing is requested until the iterator is first advanced; close() it to stop early.
+        Cached audio is returned as a single chunk; a fully consumed stream is added to the cache.
+        
+        Returns:
+            Iterator of audio byte chunks (MP3 format)
+        """
+        if not voice_id:
+            voice_id = self.get_default_voice_id()
+        
+        if use_cache and self.tts_cache is not None:
+            cache_key = self.tts_cache_key(
+                text, voice_id, model_id, stability, similarity_boost, style, use_speaker_boost, speed, output_format
+            )
+            return self._cached_stream(cache_key, lambda: self.text_to_speech_stream(
+                text, voice_id, model_id, stability, similarity_boost, style,
+                use_speaker_boost, speed, output_format, use_cache=False
+            ))
+        
+        return self.client.text_to_speech.stream(
+            voice_id=voice_id,
+            output_format=output_format,
+            text=text,
+            model_id=model_id,
+            voice_settings=VoiceSettings(
+                stability=stability,
+                similarity_boost=similarity_boost,
+                style=style,
+                use_speaker_boost=use_speaker_boost,
+                speed=speed,
+            ),
+        )
+    
+    def _cached_stream(self, cache_key: str, open_stream) -> Iterator[bytes]:
+        """Serve a cache hit, or forward the upstream stream and cache it once complete"""
+        cached = self.tts_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        upstream = open_stream()
+        buffer = io.BytesIO()
+        try:
+            for chunk in upstream:
+                if chunk:
+                    buffer.write(chunk)
+                    yield chunk
+        finally:
+            close = getattr(upstream, "close", None)
+            if close:
+                close()
+        # Only reached when the stream finished; abandoned streams are not cached
+        self.tts_cache.put(cache_key, buffer.getvalue())
     
     def get_voices(self) -> list:
         """
@@ -230,18 +351,19 @@ class ElevenLabsSDK:
         audio_bytes = base64.b64decode(base64_audio)
         return self.speech_to_text(audio_bytes)
     
-    def text_to_speech_base64(self, text: str, voice_id: Optional[str] = None) -> str:
+    def text_to_speech_base64(self, text: str, voice_id: Optional[str] = None, use_cache: bool = True) -> str:
         """
         Convert text to speech and return as base64 encoded string
         
         Args:
             text: Text to convert to speech
             voice_id: Voice ID to use (optional)
+            use_cache: Read from and write to the TTS cache (default: True)
         
         Returns:
             Base64 encoded audio string
         """
-        audio_bytes = self.text_to_speech(text, voice_id)
+        audio_bytes = self.text_to_speech(text, voice_id, use_cache=use_cache)
         return base64.b64encode(audio_bytes).decode('utf-8')
     
     def text_to_speech_file(
@@ -305,6 +427,48 @@ class ElevenLabsSDK:
         return output_path
 
 
+async def iterate_audio_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Forward chunks from a blocking SDK iterator without blocking the event loop
+    
+    Each pull runs in a worker thread. If the consumer stops early (e.g. the client
+    disconnects and the response is cancelled), the upstream iterator is closed so
+    ElevenLabs stops sending audio nobody will hear.
+    
+    Args:
+        chunks: Iterator returned by text_to_speech_stream
+    
+    Yields:
+        Non-empty audio byte chunks
+    """
+    loop = asyncio.get_running_loop()
+    pending = None
+    
+    def close_upstream(future=None):
+        if future is not None and not future.cancelled():
+            future.exception()  # Consume errors from a pull nobody is waiting for
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    
+    try:
+        while True:
+            pending = loop.run_in_executor(None, next, chunks, None)
+            # Shield so cancellation doesn't abandon a pull that is still running in its thread
+            chunk = await asyncio.shield(pending)
+            pending = None
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+    finally:
+        if pending is not None and not pending.done():
+            # A generator can't be closed while another thread is advancing it
+            pending.add_done_callback(close_upstream)
+        else:
+            close_upstream()
+
+
 # Singleton instance
 _elevenlabs_instance: Optional[ElevenLabsSDK] = None
 
@@ -0,0 +1,76 @@
+import os
+from typing import AsyncGenerator, Optional, Tuple
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartParser
+from starlette.requests import Request
+
+# Default cap for uploaded recordings (10 MB)
+DEFAULT_MAX_AUDIO_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+class AudioUploadTooLarge(Exception):
+    """Raised as soon as an upload body grows past the configured limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Audio upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+def get_max_audio_upload_bytes() -> int:
+    return int(os.getenv("STT_MAX_UPLOAD_BYTES", str(DEFAULT_MAX_AUDIO_UPLOAD_BYTES)))
+
+
+async def _bounded_stream(request: Request, max_bytes: int) -> AsyncGenerator[bytes, None]:
+    """Yield body chunks as they arrive, aborting once max_bytes is exceeded"""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise AudioUploadTooLarge(max_bytes)
+        yield chunk
+
+
+async def read_audio_upload(request: Request, max_bytes: Optional[int] = None) -> Tuple[bytes, Optional[str]]:
+    """
+    Read an audio upload sent either as the raw request body or as multipart/form-data
+    (first file part, e.g. field "file" or "audio"). The size limit is enforced while
+    the body is still arriving, and the result is a single bytes object that callers
+    can hand to several consumers without copying.
+
+    Returns:
+        (audio_bytes, content_type)
+    Raises:
+        AudioUploadTooLarge: body larger than max_bytes
+        ValueError: empty body or no file part in a multipart request
+    """
+    if max_bytes is None:
+        max_bytes = get_max_audio_upload_bytes()
+
+    # Reject early when the client declares an oversized body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise AudioUploadTooLarge(max_bytes)
+
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        parser = MultiPartParser(request.headers, _bounded_stream(request, max_bytes), max_files=1)
+        form = await parser.parse()
+        try:
+            upload = next((value for value in form.values() if isinstance(value, UploadFile)), None)
+            if upload is None:
+                raise ValueError("No audio file found in multipart body")
+            # UploadFile spools to a temporary file, so large parts never sit in memory twice
+            audio_bytes = await upload.read()
+            audio_type = upload.content_type
+        finally:
+            await form.close()
+    else:
+        chunks = [chunk async for chunk in _bounded_stream(request, max_bytes)]
+        audio_bytes = b"".join(chunks)
+        audio_type = content_type or None
+
+    if not audio_bytes:
+        raise ValueError("Audio body is empty")
+
+    return audio_bytes, audio_type
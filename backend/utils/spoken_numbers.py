@@ -0,0 +1,206 @@
+import re
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+# Multipliers that close a group: "five thousand", "5k", "two grand", "1.5 million"
+SCALES = {
+    "thousand": 1000, "k": 1000, "grand": 1000,
+    "million": 10 ** 6, "mil": 10 ** 6, "billion": 10 ** 9,
+}
+FRACTIONS = {"half": Decimal("0.5"), "quarter": Decimal("0.25")}
+
+# Words, hyphenated words ("twenty-five") and numerals ("1,000", "2.5", "5k") as single tokens
+_TOKEN = re.compile(r"[A-Za-z0-9]+(?:[.,\-][A-Za-z0-9]+)*")
+_NUMERAL = re.compile(r"^(\d+(?:,\d{3})*(?:\.\d+)?)(k)?$", re.IGNORECASE)
+
+
+class SpokenAmount(NamedTuple):
+    start: int       # character span in the input text
+    end: int
+    value: Decimal
+
+
+class _Token(NamedTuple):
+    word: str
+    start: int
+    end: int
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        word = match.group(0).lower()
+        parts = word.split("-")
+        # "twenty-five" -> "twenty", "five"; other hyphenated words stay whole
+        if len(parts) > 1 and all(part in UNITS or part in TENS for part in parts):
+            tokens.extend(_Token(part, match.start(), match.end()) for part in parts)
+        else:
+            tokens.append(_Token(word, match.start(), match.end()))
+    return tokens
+
+
+def _scan(tokens: List[_Token], i: int):
+    """
+    Consume one amount starting at tokens[i]
+    Returns (value, tokens consumed, spelled) or None. `spelled` is False for a lone
+    numeral that needs no rewriting.
+    """
+    total = Decimal(0)      # closed groups ("five thousand")
+    current = Decimal(0)    # open group ("two hundred twenty")
+    state = None            # last token kind
+    last_scale = None       # scales must decrease: "two million five thousand"
+    spelled = False
+    j = i
+    n = len(tokens)
+
+    def word(k):
+        return tokens[k].word if k < n else None
+
+    while j < n:
+        w = word(j)
+        numeral = _NUMERAL.match(w)
+
+        if state is None and w == "a" and word(j + 1) in ("hundred", "thousand", "million", "grand"):
+            # "a hundred" == "one hundred"
+            current, state, spelled = Decimal(1), "unit", True
+            j += 1
+        elif numeral and state is None:
+            current = Decimal(numeral.group(1).replace(",", ""))
+            state = "numeral"
+            if numeral.group(2):
+                total, current, state, last_scale, spelled = current * 1000, Decimal(0), "scale", 1000, True
+            j += 1
+        elif w in UNITS and state in (None, "tens", "hundred", "scale", "and"):
+            current += UNITS[w]
+            state, spelled = "unit", True
+            j += 1
+        elif w in TEENS and state in (None, "hundred", "scale", "and"):
+            current += TEENS[w]
+            state, spelled = "teen", True
+            j += 1
+        elif w in TENS and state in (None, "hundred", "scale", "and"):
+            current += TENS[w]
+            state, spelled = "tens", True
+            j += 1
+        elif w == "hundred" and state in ("unit", "teen", "numeral") and current < 100:
+            current *= 100
+            state, spelled = "hundred", True
+            j += 1
+        elif w in SCALES and state in ("unit", "teen", "tens", "hundred", "numeral", "fraction", "decimal") \
+                and (last_scale is None or SCALES[w] < last_scale):
+            total += current * SCALES[w]
+            current = Decimal(0)
+            last_scale = SCALES[w]
+            state, spelled = "scale", True
+            j += 1
+        elif w == "and" and word(j + 1) == "a" and word(j + 2) in FRACTIONS \
+                and state in ("unit", "teen", "tens", "hundred", "numeral"):
+            # "two and a half"
+            current += FRACTIONS[word(j + 2)]
+            state, spelled = "fraction", True
+            j += 3
+        elif w == "and" and state in ("hundred", "scale") \
+                and (word(j + 1) in UNITS or word(j + 1) in TEENS or word(j + 1) in TENS):
+            # "one hundred and five"
+            state = "and"
+            j += 1
+        elif w == "point" and state in (None, "unit", "teen", "tens", "hundred", "scale", "numeral"):
+            digits, k = _scan_fraction_digits(tokens, j + 1)
+            if not digits:
+                break
+            current += Decimal(f"0.{digits}")
+            state, spelled = "decimal", True
+            j = k
+        else:
+            break
+
+    if j == i or state == "and":
+        return None
+    return total + current, j - i, spelled
+
+
+def _scan_fraction_digits(tokens: List[_Token], j: int):
+    """Digits after "point": "point two five" -> "25", "point twenty five" -> "25", "point 5" -> "5" """
+    digits = ""
+    n = len(tokens)
+    if j < n and re.fullmatch(r"\d+", tokens[j].word):
+        return tokens[j].word, j + 1
+    if j < n and tokens[j].word in TENS:
+        value = TENS[tokens[j].word]
+        j += 1
+        if j < n and tokens[j].word in UNITS and tokens[j].word != "zero":
+            value += UNITS[tokens[j].word]
+            j += 1
+        return str(value), j
+    while j < n and tokens[j].word in UNITS:
+        digits += str(UNITS[tokens[j].word])
+        j += 1
+    return digits, j
+
+
+def find_spoken_amounts(text: str) -> List[SpokenAmount]:
+    """
+    Find every spelled-out amount in text in one left-to-right pass
+    Handles cardinals ("twenty five", "one hundred and five", "two million"), decimals
+    ("point five", "one point two five"), "and a half"/"and a quarter", and shorthand
+    multipliers ("5k", "two grand", "1.5 million"). Plain numerals like "100" are not
+    reported since they need no rewriting.
+    """
+    tokens = _tokenize(text or "")
+    amounts = []
+    i = 0
+    while i < len(tokens):
+        scanned = _scan(tokens, i)
+        if scanned is None:
+            i += 1
+            continue
+        value, consumed, spelled = scanned
+        if spelled:
+            amounts.append(SpokenAmount(tokens[i].start, tokens[i + consumed - 1].end, value))
+        i += consumed
+    return amounts
+
+
+def parse_spoken_amount(phrase: str) -> Optional[Decimal]:
+    """Exact value of a phrase that is a single amount ("twenty five point five", "2.5k", "100"), else None"""
+    stripped = (phrase or "").strip()
+    numeral = _NUMERAL.match(stripped)
+    if numeral and not numeral.group(2):
+        return Decimal(numeral.group(1).replace(",", ""))
+    amounts = find_spoken_amounts(stripped)
+    if len(amounts) != 1 or amounts[0].start != 0 or amounts[0].end != len(stripped):
+        return None
+    return amounts[0].value
+
+
+def format_amount(value: Decimal) -> str:
+    """Plain decimal string without exponent or trailing zeros"""
+    text = format(value, "f")
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+def normalize_spoken_amounts(text: str) -> str:
+    """Rewrite spelled-out amounts as numerals: "send twenty five usdc" -> "send 25 usdc" """
+    amounts = find_spoken_amounts(text)
+    if not amounts:
+        return text
+    parts = []
+    position = 0
+    for amount in amounts:
+        parts.append(text[position:amount.start])
+        parts.append(format_amount(amount.value))
+        position = amount.end
+    parts.append(text[position:])
+    return "".join(parts)
@@ -0,0 +1,210 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class TTSCache:
+    """
+    Content-addressed cache for synthesized speech
+
+    Keys are a SHA-256 of everything that affects the audio (text, voice, model,
+    voice settings, output format). Two tiers:
+    - Memory: LRU bounded by total bytes
+    - Disk: one file per key, bounded by total bytes, least recently used evicted first
+      (file mtime is bumped on every hit)
+    Disk hits are promoted to memory. Safe to use from multiple threads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_bytes: Optional[int] = None,
+        max_disk_bytes: Optional[int] = None
+    ):
+        self.cache_dir = cache_dir or os.getenv(
+            "TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "voicevault_tts_cache")
+        )
+        self.max_memory_bytes = max_memory_bytes if max_memory_bytes is not None else int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else int(os.getenv("TTS_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+        except OSError as e:
+            print(f"⚠️  TTS disk cache unavailable ({self.cache_dir}): {e}")
+            self.max_disk_bytes = 0
+
+    @staticmethod
+    def make_key(
+        text: str,
+        voice_id: str,
+        model_id: str,
+        voice_settings: Dict[str, object],
+        output_format: str
+    ) -> str:
+        """Hash every input that changes the synthesized audio"""
+        payload = json.dumps(
+            {
+                "text": text,
+                "voice_id": voice_id,
+                "model_id": model_id,
+                "voice_settings": voice_settings,
+                "output_format": output_format,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio or None, updating hit/miss counters"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return audio
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._put_memory(key, audio)
+            return audio
+
+    def contains(self, key: str) -> bool:
+        """Check presence without touching counters or recency"""
+        with self._lock:
+            if key in self._memory:
+                return True
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store audio in both tiers"""
+        if not audio:
+            return
+        with self._lock:
+            self._counters["writes"] += 1
+            self._put_memory(key, audio)
+        self._write_disk(key, audio)
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _put_memory(self, key: str, audio: bytes) -> None:
+        # Caller holds the lock
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if self.max_disk_bytes <= 0:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # Mark as recently used for eviction
+            return audio
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        if self.max_disk_bytes <= 0 or len(audio) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Failed to write TTS cache entry: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += len(audio)
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _scan_disk(self):
+        """Yield (path, size, mtime) for every cached file"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".bin"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the disk tier is back under 90% of budget"""
+        entries = sorted(self._scan_disk(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["evictions"] += evicted
+
+
+# Singleton
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    """Get or create TTS cache singleton"""
+    global _tts_cache
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                _tts_cache = TTSCache()
+    return _tts_cache
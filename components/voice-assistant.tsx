@@ -652,8 +652,22 @@ export function VoiceAssistant() {
                 encryptionKey: result.encryption_key
               })
               
+              // Report the outcome so only confirmed transfers count towards the velocity limits
+              const resolveChallenge = (confirmed: boolean) =>
+                fetch(
+                  `${API_URL}/api/agents/challenges/${result.challenge_id}/resolve${userId ? `?user_id=${userId}` : ''}`,
+                  {
+                    method: "POST",
+                    headers: {
+                      "Content-Type": "application/json",
+                    },
+                    body: JSON.stringify({ confirmed }),
+                  }
+                ).catch((err) => console.error('Failed to report challenge outcome:', err))
+
               // Execute the challenge - SDK will show its own popup
               circleSdkRef.current.execute(result.challenge_id, async (error, sdkResult) => {
+                await resolveChallenge(!error)
                 if (error) {
                   console.error('Transaction confirmation error:', error)
                   await speakText(`Transaction failed: ${error.message || 'Confirmation failed'}`)